@@ -1,6 +1,15 @@
 import streamlit as st
 import pandas as pd
 
+from bq_metadata_cache import get_default_cache
+from dq_metrics import MetricsStore
+from metadata_index import FACETS, MetadataIndex
+
+# Dashboard reads are cached this long; rollups update as DQ results land
+METRICS_TTL_SECONDS = 60
+
+SEARCH_PAGE_SIZE = 20
+
 # --- Page Configuration ---
 st.set_page_config(
     page_title="Data Quality Control Center",
@@ -35,6 +44,54 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+
+
+@st.cache_resource
+def get_metrics_store():
+    return MetricsStore()
+
+
+def register_catalog_assets():
+    """Count every table in the BigQuery metadata cache as an asset, monitored or not."""
+    get_metrics_store().register_assets(get_default_cache().table_ids())
+
+
+@st.cache_data(ttl=METRICS_TTL_SECONDS)
+def load_kpis():
+    register_catalog_assets()
+    return get_metrics_store().kpis()
+
+
+@st.cache_data(ttl=METRICS_TTL_SECONDS)
+def load_asset_summary():
+    return pd.DataFrame(get_metrics_store().asset_summary())
+
+
+@st.cache_data(ttl=METRICS_TTL_SECONDS)
+def load_rule_summary(asset):
+    return pd.DataFrame(get_metrics_store().rule_summary(asset))
+
+
+@st.cache_data(ttl=METRICS_TTL_SECONDS)
+def load_history(asset, days=30):
+    return pd.DataFrame(get_metrics_store().history(asset, days))
+
+
+@st.cache_resource
+def get_metadata_index():
+    return MetadataIndex()
+
+
+def search_results(query, filters=None, page=0, page_size=SEARCH_PAGE_SIZE):
+    """One page of local index matches as a DataFrame, plus the total match count."""
+    rows, total = get_metadata_index().search(query, filters, limit=page_size, offset=page * page_size)
+    return pd.DataFrame(rows), total
+
+
+def format_delta(value, suffix=""):
+    return None if value is None else f"{value:+,}{suffix}"
+
+
 # --- Sidebar ---
 st.sidebar.image("https://via.placeholder.com/150", width=150)  # Optional logo
 
@@ -71,9 +128,10 @@ st.sidebar.button("Logout")
 
 # --- Main Page Content based on selected_page ---
 
-# If nothing selected, default to Overview
+# If nothing selected, stay on the current page (widgets on a page rerun the script)
 if selected_page is None:
-    selected_page = "Overview"
+    selected_page = st.session_state.get("current_page", "Overview")
+st.session_state.current_page = selected_page
 
 # --- Overview Page ---
 if selected_page == "Overview":
@@ -87,15 +145,23 @@ if selected_page == "Overview":
 
     # Search Bar
     search_query = st.text_input(" ", placeholder="Type here to Explore a Data Asset...", key="search_bar")
+    if search_query:
+        results, total = search_results(search_query, page_size=10)
+        st.caption(f"{total:,} matching assets (open 📂 Metadata › Explorer to filter)")
+        if not results.empty:
+            st.dataframe(results[["display_name", "asset_id", "criticality", "owner"]], use_container_width=True)
 
-    # KPIs - Metrics Section
+    # KPIs - Metrics Section (precomputed rollups, see dq_metrics.py)
+    kpis = load_kpis()
+    coverage = f"{kpis['coverage']:.0%} coverage" if kpis["coverage"] is not None else None
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric(label="Total Data Assets", value="1842", delta="+400 (22%)")
+        st.metric(label="Total Data Assets", value=f"{kpis['total_assets']:,}", delta=format_delta(kpis["delta_assets"]))
     with col2:
-        st.metric(label="Active Issues", value="23", delta="-10 less than yesterday")
+        st.metric(label="Active Issues", value=f"{kpis['open_issues']:,}",
+                  delta=format_delta(kpis["delta_open_issues"], " vs yesterday"), delta_color="inverse")
     with col3:
-        st.metric(label="Assets Monitored", value="1658", delta="90% coverage")
+        st.metric(label="Assets Monitored", value=f"{kpis['monitored_assets']:,}", delta=coverage, delta_color="off")
 
     st.markdown("---")
 
@@ -142,6 +208,27 @@ if selected_page == "Overview":
 elif selected_page == "Metadata Explorer":
     st.title("📂 Metadata - Explorer")
     st.info("Explore your metadata assets here.")
+    query = st.text_input("Search", value=st.session_state.get("search_bar", ""), placeholder="Table, column or tag...")
+
+    # Facet counts reflect the query and the other facets' selections
+    index = get_metadata_index()
+    filters = {facet: st.session_state.get(f"facet_{facet}", []) for facet in FACETS}
+    facet_counts = index.facets(query, filters)
+    facet_cols = st.columns(len(FACETS))
+    for col, facet in zip(facet_cols, FACETS):
+        with col:
+            filters[facet] = st.multiselect(
+                facet.replace("_", " ").title(), [value for value, _ in facet_counts[facet]],
+                format_func=lambda value, counts=dict(facet_counts[facet]): f"{value} ({counts.get(value, 0)})",
+                key=f"facet_{facet}",
+            )
+
+    _, total = index.search(query, filters, limit=0)
+    pages = max(1, -(-total // SEARCH_PAGE_SIZE))
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1) - 1
+    results, total = search_results(query, filters, page)
+    st.caption(f"{total:,} matching assets")
+    st.dataframe(results, use_container_width=True)
 
 elif selected_page == "Metadata Lineage":
     st.title("📂 Metadata - Lineage")
@@ -150,10 +237,29 @@ elif selected_page == "Metadata Lineage":
 elif selected_page == "Data Quality Summary":
     st.title("🛡️ Data Quality - Summary")
     st.info("Summary of all data quality checks across assets.")
+    kpis = load_kpis()
+    col1, col2 = st.columns(2)
+    with col1:
+        pass_rate = f"{kpis['pass_rate']:.2%}" if kpis["pass_rate"] is not None else "n/a"
+        delta = f"{kpis['delta_pass_rate']:+.2%}" if kpis["delta_pass_rate"] is not None else None
+        st.metric(label="Pass Rate", value=pass_rate, delta=delta)
+    with col2:
+        st.metric(label="Open Issues", value=f"{kpis['open_issues']:,}",
+                  delta=format_delta(kpis["delta_open_issues"]), delta_color="inverse")
+    st.dataframe(load_asset_summary(), use_container_width=True)
 
 elif selected_page == "Data Quality Details":
     st.title("🛡️ Data Quality - Details")
     st.info("Detailed quality metrics and checks for data assets.")
+    assets = load_asset_summary()
+    if assets.empty:
+        st.warning("No data quality results recorded yet.")
+    else:
+        asset = st.selectbox("Data asset", assets["asset"].tolist())
+        history = load_history(asset)
+        if not history.empty:
+            st.line_chart(history.set_index("day")["pass_rate"])
+        st.dataframe(load_rule_summary(asset), use_container_width=True)
 
 elif selected_page == "Workflow Issue Details":
     st.title("🔧 Workflow - Issue Details")
@@ -0,0 +1,120 @@
+# anomaly_detection.py
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+
+# Fitted models are kept per dataset in the folder structure.py layout
+MODEL_DIR = "data_quality_checks/ai_ml_checks/models/anomaly_detection"
+
+# The forest is fitted on at most this many rows, whatever the data size
+FIT_SAMPLE_ROWS = 100_000
+
+# Rows scored per task; chunks are scored in parallel on every core
+SCORE_CHUNK_ROWS = 250_000
+
+# Saved models older than this are refitted on the next load; None keeps them forever
+MODEL_MAX_AGE_DAYS = 30
+
+DEFAULT_PARAMS = {'contamination': 0.1, 'random_state': 42}
+
+
+def _model_path(dataset_id):
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", dataset_id)
+    return os.path.join(MODEL_DIR, f"{safe_name}.joblib")
+
+
+def fit_anomaly_model(numeric_df, sample_rows=FIT_SAMPLE_ROWS, **params):
+    """Fit an IsolationForest on a bounded uniform sample of numeric_df."""
+    params = {**DEFAULT_PARAMS, **params}
+    sample = numeric_df
+    if len(numeric_df) > sample_rows:
+        sample = numeric_df.sample(n=sample_rows, random_state=params['random_state'])
+    model = IsolationForest(n_jobs=-1, **params)
+    model.fit(sample.fillna(0).to_numpy(dtype=np.float32))
+    return model
+
+
+def load_or_fit_model(dataset_id, numeric_df, refit=False, max_age_days=MODEL_MAX_AGE_DAYS, **params):
+    """Load the saved model for dataset_id, fitting and saving one if needed.
+
+    A dataset is fitted once and later extracts are only scored: the saved
+    model is reused while it has the same columns and parameters and is at
+    most max_age_days old. refit=True forces a new fit.
+    """
+    params = {**DEFAULT_PARAMS, **params}
+    columns = list(map(str, numeric_df.columns))
+    path = _model_path(dataset_id)
+    now = datetime.now(timezone.utc)
+
+    if not refit and os.path.exists(path):
+        saved = joblib.load(path)
+        fitted_at = saved.get('fitted_at')
+        fresh = max_age_days is None or (fitted_at is not None and now - fitted_at <= timedelta(days=max_age_days))
+        if fresh and saved['columns'] == columns and saved['params'] == params:
+            return saved['model'], columns
+
+    model = fit_anomaly_model(numeric_df, **params)
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    joblib.dump({'model': model, 'columns': columns, 'params': params, 'fitted_at': now}, path)
+    return model, columns
+
+
+def score_frame(model, numeric_df, chunk_rows=SCORE_CHUNK_ROWS, max_workers=None):
+    """Anomaly scores for every row (decision_function; < 0 means outlier).
+
+    Rows are scored in chunks on a thread pool; the tree traversal releases
+    the GIL, so this uses all cores without copying the frame to processes.
+    """
+    values = numeric_df.fillna(0).to_numpy(dtype=np.float32)
+    bounds = range(0, len(values), chunk_rows)
+    scores = np.empty(len(values), dtype=np.float32)
+
+    def score(start):
+        scores[start:start + chunk_rows] = model.decision_function(values[start:start + chunk_rows])
+
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        list(pool.map(score, bounds))
+    return scores
+
+
+def score_csv(model, source, columns, chunksize=SCORE_CHUNK_ROWS, **read_csv_kwargs):
+    """Score a whole CSV chunk by chunk, reading only the model's columns."""
+    parts = [
+        # Chunks can infer a different dtype than the fitting sample; coerce
+        score_frame(model, chunk[columns].apply(pd.to_numeric, errors='coerce'))
+        for chunk in pd.read_csv(source, usecols=columns, chunksize=chunksize, **read_csv_kwargs)
+    ]
+    return np.concatenate(parts) if parts else np.empty(0, dtype=np.float32)
+
+
+def read_rows(source, positions, chunksize=SCORE_CHUNK_ROWS, **read_csv_kwargs):
+    """Rows at the given file positions, in that order, from one chunked pass over a CSV."""
+    positions = np.asarray(positions, dtype=np.int64)
+    wanted = np.sort(positions)
+    parts = []
+    if len(wanted):
+        for chunk in pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs):
+            # Chunk indexes continue across chunks, so they are file row positions
+            hits = wanted[(wanted >= chunk.index[0]) & (wanted <= chunk.index[-1])]
+            if len(hits):
+                parts.append(chunk.loc[hits])
+            if chunk.index[-1] >= wanted[-1]:
+                break
+    return pd.concat(parts).loc[positions] if parts else pd.DataFrame()
+
+
+def top_outliers(scores, k, offset=0):
+    """Positions of the k most anomalous rows after skipping offset, most anomalous first."""
+    n = min(offset + k, len(scores))
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(scores, n - 1)[:n] if n < len(scores) else np.arange(len(scores))
+    ranked = candidates[np.argsort(scores[candidates], kind="stable")]
+    return ranked[offset:n]
@@ -0,0 +1,57 @@
+# batch_writer.py
+
+import time
+from abc import ABC, abstractmethod
+
+
+class BatchWriter(ABC):
+    """Buffers items and hands them to _write() in batches.
+
+    A batch is written once flush_rows rows are buffered or, with
+    flush_seconds set, once the oldest buffered item is that old (checked
+    on every add). Use as a context manager, or call close(), so the tail
+    is written.
+    """
+
+    def __init__(self, flush_rows, flush_seconds=None):
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.written = 0
+        self.flushes = 0
+        self._buffer = []
+        self._pending = 0
+        self._oldest = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _append(self, item, rows=1):
+        """Buffer item (worth rows rows) and flush if a limit is reached."""
+        self._buffer.append(item)
+        self._pending += rows
+        self._oldest = self._oldest or time.monotonic()
+        too_old = self.flush_seconds is not None and time.monotonic() - self._oldest >= self.flush_seconds
+        if self._pending >= self.flush_rows or too_old:
+            self.flush()
+
+    def _batch(self):
+        """What _write() receives; the buffered items unless a subclass reshapes them."""
+        return self._buffer
+
+    def flush(self):
+        if not self._pending:
+            return
+        self._write(self._batch())
+        self.written += self._pending
+        self.flushes += 1
+        self._buffer, self._pending, self._oldest = [], 0, None
+
+    def close(self):
+        self.flush()
+
+    @abstractmethod
+    def _write(self, batch):
+        """Persist one batch."""
@@ -0,0 +1,147 @@
+# bq_metadata_cache.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# On-disk cache so table metadata survives restarts
+CACHE_PATH = os.environ.get("BQ_METADATA_CACHE", ".bq_metadata_cache.sqlite")
+
+# Entries younger than this are served without touching BigQuery
+DEFAULT_TTL_SECONDS = 3600
+
+
+def _encode(metadata):
+    def default(value):
+        if isinstance(value, datetime):
+            return {"__datetime__": value.isoformat()}
+        raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+    return json.dumps(metadata, default=default)
+
+
+def _decode(payload):
+    def hook(obj):
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        return obj
+    metadata = json.loads(payload, object_hook=hook)
+    metadata["schema"] = [tuple(field) for field in metadata.get("schema", [])]
+    return metadata
+
+
+class BQMetadataCache:
+    """SQLite-backed cache of collect_bq_table_metadata results keyed by full table ID.
+
+    Entries expire after ttl_seconds. An expired entry is revalidated by
+    comparing the table's etag / last_modified, so callers can tell a table
+    that actually changed from one that was merely re-checked.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS table_metadata (
+                    table_id TEXT PRIMARY KEY,
+                    dataset TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    metadata TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_table_metadata_dataset ON table_metadata (dataset)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, table_id):
+        """Return (metadata, etag, last_modified, is_fresh) or None if not cached."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT metadata, etag, last_modified, fetched_at FROM table_metadata WHERE table_id = ?",
+                (table_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        payload, etag, last_modified, fetched_at = row
+        return _decode(payload), etag, last_modified, time.time() - fetched_at < self.ttl_seconds
+
+    def put(self, metadata, etag=None):
+        """Store metadata and return True if it differs from what was cached."""
+        table_id = metadata["table_id"]
+        last_modified = metadata.get("last_modified")
+        last_modified = last_modified.isoformat() if last_modified else None
+        dataset = table_id.rsplit(".", 1)[0]
+        with self._lock, self._connect() as conn:
+            previous = conn.execute(
+                "SELECT etag, last_modified FROM table_metadata WHERE table_id = ?", (table_id,)
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO table_metadata VALUES (?, ?, ?, ?, ?, ?)",
+                (table_id, dataset, etag, last_modified, time.time(), _encode(metadata)),
+            )
+        if previous is None:
+            return True
+        previous_etag, previous_modified = previous
+        if etag and previous_etag:
+            return etag != previous_etag
+        return last_modified != previous_modified
+
+    def touch(self, table_id):
+        """Mark a cached entry as revalidated without rewriting it."""
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE table_metadata SET fetched_at = ? WHERE table_id = ?", (time.time(), table_id))
+
+    def forget(self, table_id):
+        """Drop a cached entry, so the next collection reports the table as changed."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM table_metadata WHERE table_id = ?", (table_id,))
+
+    def last_modified_by_table(self, project_id, dataset_id):
+        """{table_id: last_modified ISO string} for every cached table of a dataset."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT table_id, last_modified FROM table_metadata WHERE dataset = ?",
+                (f"{project_id}.{dataset_id}",),
+            ).fetchall()
+        return dict(rows)
+
+    def table_ids(self):
+        """IDs of every cached table, without decoding their metadata."""
+        with self._connect() as conn:
+            return [table_id for table_id, in conn.execute("SELECT table_id FROM table_metadata")]
+
+    def all_metadata(self):
+        """Every cached table's metadata, fresh or not."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT metadata FROM table_metadata").fetchall()
+        return [_decode(payload) for payload, in rows]
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Process-wide cache shared by collect_bq_table_metadata callers."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = BQMetadataCache()
+    return _default_cache
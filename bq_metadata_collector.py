@@ -1,14 +1,29 @@
 # bq_metadata_collector.py
 
-from google.cloud import bigquery
+from bq_metadata_cache import get_default_cache
+from gcp_clients import call_with_client
 
-def collect_bq_table_metadata(project_id, dataset_id, table_id):
-    """Collect technical metadata of a BigQuery table."""
-    bq_client = bigquery.Client(project=project_id)
+# INFORMATION_SCHEMA reports "BASE TABLE" where the tables API says "TABLE"
+_TABLE_TYPES = {"BASE TABLE": "TABLE"}
 
+# INFORMATION_SCHEMA.COLUMNS uses standard SQL type names; get_table uses legacy ones
+_FIELD_TYPES = {"INT64": "INTEGER", "FLOAT64": "FLOAT", "BOOL": "BOOLEAN"}
+
+
+def _field_type(data_type):
+    """Map an INFORMATION_SCHEMA data_type onto the get_table field_type name."""
+    if data_type.startswith("ARRAY<"):
+        data_type = data_type[len("ARRAY<"):-1]
+    if data_type.startswith("STRUCT<"):
+        return "RECORD"
+    return _FIELD_TYPES.get(data_type.split("(")[0], data_type.split("(")[0])
+
+
+def _fetch_table_metadata(project_id, dataset_id, table_id):
+    """Fetch one table's metadata with get_table; returns (metadata, etag)."""
     full_table_id = f"{project_id}.{dataset_id}.{table_id}"
 
-    table = bq_client.get_table(full_table_id)
+    table = call_with_client("bigquery", project_id, lambda client: client.get_table(full_table_id))
 
     metadata = {
         "table_id": full_table_id,
@@ -20,4 +35,83 @@ def collect_bq_table_metadata(project_id, dataset_id, table_id):
         "entry_resource_name": None,  # Optional: find via Data Catalog
     }
 
+    return metadata, table.etag
+
+
+def collect_bq_table_metadata(project_id, dataset_id, table_id, cache=None, use_cache=True):
+    """Collect technical metadata of a BigQuery table.
+
+    Results are served from the on-disk metadata cache while fresh; expired
+    entries are refetched and compared by etag / last_modified. The returned
+    dict carries a "changed" flag telling whether the table differs from the
+    previously cached version.
+    """
+    if not use_cache:
+        metadata, _ = _fetch_table_metadata(project_id, dataset_id, table_id)
+        metadata["changed"] = True
+        return metadata
+
+    cache = cache or get_default_cache()
+    full_table_id = f"{project_id}.{dataset_id}.{table_id}"
+
+    cached = cache.get(full_table_id)
+    if cached is not None and cached[3]:
+        metadata = cached[0]
+        metadata["changed"] = False
+        return metadata
+
+    metadata, etag = _fetch_table_metadata(project_id, dataset_id, table_id)
+    metadata["changed"] = cache.put(metadata, etag)
     return metadata
+
+
+def collect_bq_dataset_metadata(project_id, dataset_id, cache=None):
+    """Collect metadata for every table of a dataset with one INFORMATION_SCHEMA query.
+
+    Replaces N get_table calls. Tables whose last_modified matches the cache
+    are only revalidated; the rest are rewritten. Returns
+    {full_table_id: metadata} with each metadata's "changed" flag set.
+    """
+    cache = cache or get_default_cache()
+    dataset_ref = f"`{project_id}.{dataset_id}`"
+    query = f"""
+        SELECT
+            t.table_name,
+            ANY_VALUE(t.table_type) AS table_type,
+            ANY_VALUE(s.row_count) AS row_count,
+            ANY_VALUE(s.size_bytes) AS size_bytes,
+            ANY_VALUE(TIMESTAMP_MILLIS(s.last_modified_time)) AS last_modified,
+            ARRAY_AGG(STRUCT(c.column_name AS name, c.data_type AS field_type) ORDER BY c.ordinal_position) AS columns
+        FROM {dataset_ref}.INFORMATION_SCHEMA.TABLES AS t
+        JOIN {dataset_ref}.INFORMATION_SCHEMA.COLUMNS AS c USING (table_name)
+        LEFT JOIN {dataset_ref}.__TABLES__ AS s ON s.table_id = t.table_name
+        GROUP BY t.table_name
+    """
+
+    rows = call_with_client("bigquery", project_id, lambda client: list(client.query(query).result()))
+    cached_modified = cache.last_modified_by_table(project_id, dataset_id)
+
+    results = {}
+    for row in rows:
+        full_table_id = f"{project_id}.{dataset_id}.{row['table_name']}"
+        metadata = {
+            "table_id": full_table_id,
+            "table_type": _TABLE_TYPES.get(row["table_type"], row["table_type"]),
+            "num_rows": row["row_count"],
+            "size_bytes": row["size_bytes"],
+            "last_modified": row["last_modified"],
+            "schema": [(column["name"], _field_type(column["field_type"])) for column in row["columns"]],
+            "entry_resource_name": None,  # Optional: find via Data Catalog
+        }
+        last_modified = metadata["last_modified"].isoformat() if metadata["last_modified"] else None
+
+        if full_table_id in cached_modified and cached_modified[full_table_id] == last_modified:
+            cache.touch(full_table_id)
+            metadata["changed"] = False
+        else:
+            metadata["changed"] = cache.put(metadata)
+        results[full_table_id] = metadata
+
+    changed = sum(1 for metadata in results.values() if metadata["changed"])
+    print(f"📦 {dataset_ref}: {len(results)} tables, {changed} changed since last collection.")
+    return results
@@ -0,0 +1,261 @@
+# correlation_analysis.py
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Rows sampled for in-memory correlations; Pearson can also stream the full file
+SAMPLE_ROWS = 200_000
+
+# Sub-sample for Spearman ranks and Cramér's V, the per-column / per-pair
+# work; both settle well before this many rows
+RANK_SAMPLE_ROWS = 50_000
+
+# Categorical columns with more distinct values than this are skipped (IDs, free text)
+MAX_CATEGORIES = 50
+
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_TOP_K = 50
+
+# Columns the profiler adds itself, never correlated with the data
+DEFAULT_EXCLUDE = ("anomaly", "anomaly_score")
+
+PAIR_COLUMNS = ["column_a", "column_b", "measure", "value", "rows"]
+
+
+class PearsonAccumulator:
+    """Pairwise-complete Pearson correlations from streamed chunks.
+
+    Keeps, for every column pair, the count of rows where both are present
+    and the sums of x, x² and xy over those rows; every update is a few
+    matrix products, so chunks of any length cost O(rows · columns²) BLAS
+    work and O(columns²) memory. Values are shifted by a per-column
+    reference (the first chunk's means) so large offsets such as epoch
+    timestamps don't cancel out the sums. Accumulators of file shards merge
+    by addition.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.shift = None
+        self.n = np.zeros((k, k))
+        self.sx = np.zeros((k, k))     # sx[i, j]: sum of x_i over rows where i and j are present
+        self.sxx = np.zeros((k, k))
+        self.sxy = np.zeros((k, k))
+
+    def update(self, frame):
+        frame = frame[self.columns]
+        text = [c for c in self.columns if not pd.api.types.is_numeric_dtype(frame[c])]
+        if text:
+            frame = frame.assign(**{c: pd.to_numeric(frame[c], errors="coerce") for c in text})
+        values = frame.to_numpy(dtype=np.float64, na_value=np.nan)
+        present = np.isfinite(values)
+        if self.shift is None:
+            with np.errstate(invalid="ignore"):
+                self.shift = np.nan_to_num(np.nanmean(np.where(present, values, np.nan), axis=0))
+        x = np.where(present, values - self.shift, 0.0)
+        self.sxy += x.T @ x
+        # Pairs of fully present columns share every row, so their counts and
+        # sums are column totals; only columns with nulls need masked products
+        n = np.full(self.n.shape, float(len(x)))
+        sx = np.repeat(x.sum(axis=0)[:, None], len(self.columns), axis=1)
+        sxx = np.repeat((x * x).sum(axis=0)[:, None], len(self.columns), axis=1)
+        holes = np.flatnonzero(~present.all(axis=0))
+        if holes.size:
+            mask = present[:, holes].astype(np.float64)
+            n[:, holes] = present.T.astype(np.float64) @ mask
+            n[holes, :] = n[:, holes].T
+            sx[:, holes] = x.T @ mask
+            sxx[:, holes] = (x * x).T @ mask
+        self.n += n
+        self.sx += sx
+        self.sxx += sxx
+
+    def _reshift(self, shift):
+        """Re-express the sums relative to another per-column shift."""
+        d = (shift - self.shift)[:, None]
+        self.sxy += -d.T * self.sx - d * self.sx.T + d * d.T * self.n
+        self.sxx += -2 * d * self.sx + d * d * self.n
+        self.sx -= d * self.n
+        self.shift = shift
+
+    def merge(self, other):
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.shift = other.shift
+        elif not np.array_equal(self.shift, other.shift):
+            other._reshift(self.shift)
+        for name in ("n", "sx", "sxx", "sxy"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+    def matrix(self, min_rows=3):
+        """(correlation matrix, pairwise row counts); NaN where a pair has too few rows or no variance."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            covariance = self.n * self.sxy - self.sx * self.sx.T
+            variance = self.n * self.sxx - self.sx * self.sx
+            r = covariance / np.sqrt(variance * variance.T)
+        r[(self.n < min_rows) | ~np.isfinite(r)] = np.nan
+        return np.clip(r, -1.0, 1.0), self.n
+
+
+def cramers_v(a_codes, b_codes, a_levels, b_levels):
+    """Bias-corrected Cramér's V (Bergsma 2013) of two factorized columns without nulls.
+
+    Levels that do not occur in these rows are ignored.
+    """
+    n = len(a_codes)
+    if n < 2 or a_levels < 2 or b_levels < 2:
+        return np.nan
+    table = np.bincount(a_codes * b_levels + b_codes, minlength=a_levels * b_levels).reshape(a_levels, b_levels)
+    table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+    a_levels, b_levels = table.shape
+    if a_levels < 2 or b_levels < 2:
+        return np.nan
+    expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        chi2 = np.nansum((table - expected) ** 2 / expected)
+    phi2 = max(chi2 / n - (a_levels - 1) * (b_levels - 1) / (n - 1), 0.0)
+    rows = a_levels - (a_levels - 1) ** 2 / (n - 1)
+    cols = b_levels - (b_levels - 1) ** 2 / (n - 1)
+    denominator = min(rows - 1, cols - 1)
+    return float(np.sqrt(phi2 / denominator)) if denominator > 0 else np.nan
+
+
+def _top_pairs(matrix, counts, columns, measure, threshold, top_k):
+    """Upper-triangle pairs with |value| >= threshold, strongest first."""
+    i, j = np.triu_indices(len(columns), k=1)
+    values = matrix[i, j]
+    keep = np.flatnonzero(np.abs(np.nan_to_num(values)) >= threshold)
+    keep = keep[np.argsort(-np.abs(values[keep]), kind="stable")][:top_k]
+    return [
+        {"column_a": columns[i[p]], "column_b": columns[j[p]], "measure": measure,
+         "value": float(values[p]), "rows": int(counts[i[p], j[p]])}
+        for p in keep
+    ]
+
+
+def _categorical_columns(df, exclude):
+    columns = []
+    for col in df.columns:
+        if col in exclude or pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        if 2 <= df[col].nunique(dropna=True) <= MAX_CATEGORIES:
+            columns.append(col)
+    return columns
+
+
+def categorical_pairs(df, columns, threshold=DEFAULT_THRESHOLD, top_k=DEFAULT_TOP_K,
+                      sample_rows=RANK_SAMPLE_ROWS, random_state=42):
+    """Cramér's V of every pair of columns (rows where both are present).
+
+    Each column is factorized once, on at most sample_rows rows, and its
+    codes are reused by every pair; a pair only costs a bincount.
+    """
+    if sample_rows and len(df) > sample_rows:
+        df = df.sample(sample_rows, random_state=random_state)
+    codes, levels = zip(*((codes, len(uniques)) for codes, uniques in (pd.factorize(df[col]) for col in columns)))
+    present = [c >= 0 for c in codes]
+    complete = [bool(p.all()) for p in present]
+    k = len(columns)
+    matrix, counts = np.full((k, k), np.nan), np.zeros((k, k))
+    for a in range(k):
+        for b in range(a + 1, k):
+            a_codes, b_codes = codes[a], codes[b]
+            if not (complete[a] and complete[b]):
+                both = present[a] & present[b]
+                a_codes, b_codes = a_codes[both], b_codes[both]
+            matrix[a, b] = cramers_v(a_codes, b_codes, levels[a], levels[b])
+            counts[a, b] = len(a_codes)
+    return _top_pairs(matrix, counts, columns, "cramers_v", threshold, top_k)
+
+
+def correlation_pairs(df, method="pearson", threshold=DEFAULT_THRESHOLD, top_k=DEFAULT_TOP_K,
+                      sample_rows=SAMPLE_ROWS, exclude=DEFAULT_EXCLUDE, random_state=42):
+    """Strongest associations of df as a long table, at most top_k rows.
+
+    Numeric pairs use Pearson or Spearman (Pearson on ranks), categorical
+    pairs bias-corrected Cramér's V; frames longer than sample_rows are
+    sampled first, and ranks and Cramér's V use at most RANK_SAMPLE_ROWS
+    of those.
+    Excluded columns are skipped; constant ones never pass the threshold
+    since their correlations are NaN.
+    """
+    if method not in ("pearson", "spearman"):
+        raise ValueError(f"method must be 'pearson' or 'spearman', got {method!r}")
+    if sample_rows and len(df) > sample_rows:
+        df = df.sample(sample_rows, random_state=random_state)
+    exclude = set(exclude or ())
+
+    numeric = [c for c in df.select_dtypes(include=np.number).columns if c not in exclude]
+    pairs = []
+    if len(numeric) > 1:
+        frame = df[numeric]
+        if method == "spearman":
+            if len(frame) > RANK_SAMPLE_ROWS:
+                frame = frame.sample(RANK_SAMPLE_ROWS, random_state=random_state)
+            # Column by column: DataFrame.rank() over a wide 2-D block is far slower
+            frame = frame.apply(pd.Series.rank)
+        accumulator = PearsonAccumulator(numeric)
+        accumulator.update(frame)
+        matrix, counts = accumulator.matrix()
+        pairs += _top_pairs(matrix, counts, numeric, method, threshold, top_k)
+    categorical = _categorical_columns(df, exclude)
+    if len(categorical) > 1:
+        pairs += categorical_pairs(df, categorical, threshold, top_k, random_state=random_state)
+
+    result = pd.DataFrame(pairs, columns=PAIR_COLUMNS)
+    order = result["value"].abs().sort_values(ascending=False, kind="stable").index
+    return result.loc[order].head(top_k).reset_index(drop=True)
+
+
+def correlate_csv(source, threshold=DEFAULT_THRESHOLD, top_k=DEFAULT_TOP_K, chunksize=500_000,
+                  exclude=DEFAULT_EXCLUDE, **read_csv_kwargs):
+    """Exact Pearson pairs over a whole CSV in one chunked pass."""
+    accumulator = None
+    for chunk in pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs):
+        if accumulator is None:
+            numeric = [c for c in chunk.select_dtypes(include=np.number).columns if c not in set(exclude)]
+            accumulator = PearsonAccumulator(numeric)
+        accumulator.update(chunk)
+    if accumulator is None or len(accumulator.columns) < 2:
+        return pd.DataFrame(columns=PAIR_COLUMNS)
+    matrix, counts = accumulator.matrix()
+    return pd.DataFrame(_top_pairs(matrix, counts, accumulator.columns, "pearson", threshold, top_k),
+                        columns=PAIR_COLUMNS)
+
+
+def sample_csv(source, rows=SAMPLE_ROWS, chunksize=500_000, random_state=42, **read_csv_kwargs):
+    """Uniform sample of up to rows CSV rows in one chunked pass (bottom-k of a random key)."""
+    rng = np.random.default_rng(random_state)
+    sample = None
+    for chunk in pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs):
+        chunk = chunk.assign(_sample_key=rng.random(len(chunk)))
+        sample = chunk if sample is None else pd.concat([sample, chunk])
+        sample = sample.nsmallest(rows, "_sample_key")
+    return pd.DataFrame() if sample is None else sample.drop(columns="_sample_key").sort_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List the strongest column associations of a CSV.")
+    parser.add_argument("csv", help="CSV file")
+    parser.add_argument("--method", choices=["pearson", "spearman"], default="pearson")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--full-file", action="store_true", help="Exact streamed Pearson over every row")
+    args = parser.parse_args(argv)
+
+    if args.full_file:
+        pairs = correlate_csv(args.csv, args.threshold, args.top_k)
+    else:
+        # A bounded sample of the file is enough for ranks and contingency tables
+        sample = sample_csv(args.csv)
+        pairs = correlation_pairs(sample, args.method, args.threshold, args.top_k)
+    print(pairs.round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,157 @@
 # datacatalog_tagging.py
 
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
+
 from google.cloud import datacatalog_v1
 
-datacatalog = datacatalog_v1.DataCatalogClient()
+from gcp_clients import call_with_client
+
+# Upper bound on concurrent list_tags / create_tag / update_tag calls
+MAX_TAG_WRITERS = 8
+
+# Operational tag fields stamped by each run; they alone never make a tag "changed"
+OPERATIONAL_RUN_FIELDS = ("start_time", "end_time")
+
+# Field spec kind -> TagField attribute, e.g. {"enum": "HIGH"} sets enum_value
+_FIELD_KINDS = {
+    "string": "string_value",
+    "double": "double_value",
+    "bool": "bool_value",
+    "timestamp": "timestamp_value",
+    "enum": "enum_value",
+}
+
+
+def _tag_field(spec):
+    """Build a TagField from a spec like {'string': 'Sales'} or {'enum': 'HIGH'}."""
+    (kind, value), = spec.items()
+    if kind == "enum":
+        return datacatalog_v1.TagField(enum_value=datacatalog_v1.TagField.EnumValue(display_name=value))
+    return datacatalog_v1.TagField(**{_FIELD_KINDS[kind]: value})
+
+
+def _as_utc(value):
+    # Tag timestamps are UTC; a naive value is taken to be UTC as well
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _field_matches(existing_field, spec):
+    """True if an existing TagField already holds the value in spec."""
+    (kind, value), = spec.items()
+    if kind == "enum":
+        return existing_field.enum_value.display_name == value
+    current = getattr(existing_field, _FIELD_KINDS[kind])
+    if kind == "timestamp" and current is not None and value is not None:
+        return _as_utc(current) == _as_utc(value)
+    return current == value
+
+
+def build_tag(template, fields, column=None):
+    """Build a Tag for template from {field_name: spec}; None values are left unset."""
+    tag = datacatalog_v1.Tag(template=template)
+    if column:
+        tag.column = column
+    for field_name, spec in fields.items():
+        if next(iter(spec.values())) is None:
+            continue
+        tag.fields[field_name] = _tag_field(spec)
+    return tag
+
+
+def _plan_write(request, existing_tags):
+    """Decide whether a tag request needs a create, an update or nothing."""
+    key = (request["template"], request.get("column") or "")
+    existing = existing_tags.get(key)
+    tag = build_tag(request["template"], request["fields"], request.get("column"))
+
+    if existing is None:
+        return "create", tag
+    # Volatile fields (e.g. run timestamps) are written along with a real change but never cause one
+    volatile = set(request.get("volatile") or ())
+    compared = {name: spec for name, spec in request["fields"].items() if name not in volatile}
+
+    def unchanged(name, spec):
+        # A field that is now None must be absent; an update clears it otherwise
+        if next(iter(spec.values())) is None:
+            return name not in existing.fields
+        return name in existing.fields and _field_matches(existing.fields[name], spec)
+
+    if all(unchanged(name, spec) for name, spec in compared.items()):
+        return "skip", existing
+    tag.name = existing.name
+    return "update", tag
 
-def attach_tags(entry_name, project_id, location, operational_data, technical_data, business_data):
-    """Attach operational, technical, and business metadata tags."""
+
+def upsert_tags(tag_requests, project_id, max_workers=MAX_TAG_WRITERS, executor=None):
+    """Create, update or skip many tags with one list_tags call per entry.
+
+    Each request is a dict with keys entry, template, column (None for a
+    table-level tag) and fields ({field_name: {'string'|'enum'|'double'|
+    'bool'|'timestamp': value}}), plus optionally volatile (field names
+    left out of the comparison). Tags whose fields already match are left
+    alone, so re-running is close to free. Returns a summary dict with
+    created/updated/skipped counts and a list of (request, error) failures;
+    an entry whose tags cannot be listed fails all of its requests.
+
+    Calls run on executor if given (share one across callers rather than
+    nesting pools), otherwise on a pool of max_workers threads. Don't pass
+    the executor the caller itself is running on: its workers would block
+    waiting for tasks queued behind them.
+    """
+    requests_by_entry = defaultdict(list)
+    for request in tag_requests:
+        requests_by_entry[request["entry"]].append(request)
+
+    def list_existing(entry):
+        tags = call_with_client("datacatalog", project_id, lambda datacatalog: list(datacatalog.list_tags(parent=entry)))
+        return {(tag.template, tag.column or ""): tag for tag in tags}
+
+    def write(entry, action, tag):
+        if action == "create":
+            call_with_client("datacatalog", project_id, lambda datacatalog: datacatalog.create_tag(parent=entry, tag=tag))
+        elif action == "update":
+            call_with_client("datacatalog", project_id, lambda datacatalog: datacatalog.update_tag(tag=tag))
+
+    summary = {"created": 0, "updated": 0, "skipped": 0, "failed": []}
+
+    def run(pool):
+        listings = {entry: pool.submit(list_existing, entry) for entry in requests_by_entry}
+
+        futures = []
+        for entry, requests in requests_by_entry.items():
+            try:
+                existing = listings[entry].result()
+            except Exception as e:
+                summary["failed"].extend((request, e) for request in requests)
+                print(f"❌ Failed to list tags on {entry}: {e}")
+                continue
+            for request in requests:
+                action, tag = _plan_write(request, existing)
+                if action == "skip":
+                    summary["skipped"] += 1
+                    continue
+                futures.append((request, action, pool.submit(write, entry, action, tag)))
+
+        for request, action, future in futures:
+            try:
+                future.result()
+                summary["created" if action == "create" else "updated"] += 1
+            except Exception as e:
+                summary["failed"].append((request, e))
+                print(f"❌ Failed to {action} tag {request['template']} on {request['entry']}: {e}")
+
+    if executor is not None:
+        run(executor)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            run(pool)
+    return summary
+
+
+def attach_tags(entry_name, project_id, location, operational_data, technical_data, business_data, executor=None):
+    """Attach operational, technical, and business metadata tags (see upsert_tags for executor)."""
 
     # Tag Templates
     operational_template = f"projects/{project_id}/locations/{location}/tagTemplates/operational_metadata"
@@ -13,45 +159,48 @@ def attach_tags(entry_name, project_id, location, operational_data, technical_da
     business_template = f"projects/{project_id}/locations/{location}/tagTemplates/business_metadata"
 
     # Prepare Operational Tag
-    operational_tag = datacatalog_v1.Tag(
-        template=operational_template,
-        fields={
-            "source_file": datacatalog_v1.TagField(string_value=operational_data.get("source_file")),
-            "job_id": datacatalog_v1.TagField(string_value=operational_data.get("job_id")),
-            "job_status": datacatalog_v1.TagField(enum_value=datacatalog_v1.TagField.EnumValue(display_name=operational_data.get("job_status"))),
-            "start_time": datacatalog_v1.TagField(timestamp_value=operational_data.get("start_time")),
-            "end_time": datacatalog_v1.TagField(timestamp_value=operational_data.get("end_time")),
-            "freshness_status": datacatalog_v1.TagField(enum_value=datacatalog_v1.TagField.EnumValue(display_name=operational_data.get("freshness_status"))),
-        }
-    )
+    operational_fields = {
+        "source_file": {"string": operational_data.get("source_file")},
+        "job_id": {"string": operational_data.get("job_id")},
+        "job_status": {"enum": operational_data.get("job_status")},
+        "start_time": {"timestamp": operational_data.get("start_time")},
+        "end_time": {"timestamp": operational_data.get("end_time")},
+        "freshness_status": {"enum": operational_data.get("freshness_status")},
+    }
 
     # Prepare Technical Tag
-    technical_tag = datacatalog_v1.Tag(
-        template=technical_template,
-        fields={
-            "owner": datacatalog_v1.TagField(string_value=technical_data.get("owner")),
-            "last_modified_time": datacatalog_v1.TagField(timestamp_value=technical_data.get("last_modified")),
-            "last_queried_time": datacatalog_v1.TagField(timestamp_value=technical_data.get("last_queried")),
-            "num_rows": datacatalog_v1.TagField(double_value=technical_data.get("num_rows")),
-            "size_bytes": datacatalog_v1.TagField(double_value=technical_data.get("size_bytes")),
-            "table_type": datacatalog_v1.TagField(enum_value=datacatalog_v1.TagField.EnumValue(display_name=technical_data.get("table_type"))),
-        }
-    )
+    technical_fields = {
+        "owner": {"string": technical_data.get("owner")},
+        "last_modified_time": {"timestamp": technical_data.get("last_modified")},
+        "last_queried_time": {"timestamp": technical_data.get("last_queried")},
+        "num_rows": {"double": technical_data.get("num_rows")},
+        "size_bytes": {"double": technical_data.get("size_bytes")},
+        "table_type": {"enum": technical_data.get("table_type")},
+    }
 
     # Prepare Business Tag
-    business_tag = datacatalog_v1.Tag(
-        template=business_template,
-        fields={
-            "business_owner": datacatalog_v1.TagField(string_value=business_data.get("business_owner")),
-            "criticality": datacatalog_v1.TagField(enum_value=datacatalog_v1.TagField.EnumValue(display_name=business_data.get("criticality"))),
-            "sla_hours": datacatalog_v1.TagField(double_value=business_data.get("sla_hours")),
-            "business_process": datacatalog_v1.TagField(string_value=business_data.get("business_process")),
-        }
-    )
+    business_fields = {
+        "business_owner": {"string": business_data.get("business_owner")},
+        "criticality": {"enum": business_data.get("criticality")},
+        "sla_hours": {"double": business_data.get("sla_hours")},
+        "business_process": {"string": business_data.get("business_process")},
+    }
 
-    # Attach Tags
-    datacatalog.create_tag(parent=entry_name, tag=operational_tag)
-    datacatalog.create_tag(parent=entry_name, tag=technical_tag)
-    datacatalog.create_tag(parent=entry_name, tag=business_tag)
+    # Attach Tags (create missing, update changed, skip identical)
+    summary = upsert_tags(
+        [
+            {"entry": entry_name, "template": operational_template, "column": None, "fields": operational_fields,
+             "volatile": OPERATIONAL_RUN_FIELDS},
+            {"entry": entry_name, "template": technical_template, "column": None, "fields": technical_fields},
+            {"entry": entry_name, "template": business_template, "column": None, "fields": business_fields},
+        ],
+        project_id,
+        executor=executor,
+    )
+    if summary["failed"]:
+        raise RuntimeError(f"{len(summary['failed'])} tag write(s) failed for {entry_name}")
 
-    print(f"✅ Tags successfully attached to {entry_name}")
+    print(
+        f"✅ Tags successfully attached to {entry_name} "
+        f"({summary['created']} created, {summary['updated']} updated, {summary['skipped']} unchanged)"
+    )
@@ -1,33 +1,53 @@
 # dataproc_logging_fetcher.py
 
-from google.cloud import logging_v2
+from gcp_clients import iter_pages_with_client
+from log_checkpoint import load_checkpoint, save_checkpoint, split_gcs_pattern, timestamp_filter
 
-def fetch_dataproc_jobs(file_pattern, project_id):
-    """Fetch Dataproc job logs that processed given GCS file pattern."""
-    logging_client = logging_v2.Client(project=project_id)
+def fetch_dataproc_jobs(file_pattern, project_id, since=None, use_checkpoint=True, checkpoints=None):
+    """Stream Dataproc job logs that processed given GCS file pattern.
+
+    The submitted job request is matched server-side against the literal
+    gs://bucket/prefix part of the pattern, bounded below by `since` or the
+    last checkpoint (see fetch_gcs_uploads).
+    """
+    bucket, _, object_prefix = split_gcs_pattern(file_pattern)
+    checkpoint_key = f"dataproc_jobs:{project_id}:{file_pattern}"
+
+    from_checkpoint = False
+    if since is None:
+        since, from_checkpoint = load_checkpoint(checkpoint_key)
 
     filter_str = (
         'resource.type="cloud_dataproc_cluster" '
-        'protoPayload.methodName="google.cloud.dataproc.v1.JobController.SubmitJob"'
+        'protoPayload.methodName="google.cloud.dataproc.v1.JobController.SubmitJob" '
+        f'protoPayload.request:"gs://{bucket}/{object_prefix}" '
+        + timestamp_filter(since, inclusive=not from_checkpoint)
     )
 
-    entries = logging_client.list_entries(filter_=filter_str)
-    
-    matching_jobs = []
+    entries = iter_pages_with_client(
+        "logging", project_id,
+        lambda client, page_token: client.list_entries(
+            filter_=filter_str, order_by="timestamp asc", page_token=page_token
+        ),
+    )
 
+    last_seen = None
     for entry in entries:
-        payload_str = str(entry)
-        if file_pattern in payload_str:
-            job_id = entry.proto_payload.response.get("reference", {}).get("jobId")
-            cluster_name = entry.resource.labels.get("cluster_name")
-            start_time = entry.timestamp
-
-            matching_jobs.append({
-                "job_id": job_id,
-                "cluster_name": cluster_name,
-                "start_time": start_time,
-                "status": "UNKNOWN",
-                "output_tables": []  # Optionally populate if available from job logs
-            })
-
-    return matching_jobs
+        last_seen = entry.timestamp
+        job_id = entry.proto_payload.response.get("reference", {}).get("jobId")
+        cluster_name = entry.resource.labels.get("cluster_name")
+        start_time = entry.timestamp
+
+        yield {
+            "job_id": job_id,
+            "cluster_name": cluster_name,
+            "start_time": start_time,
+            "status": "UNKNOWN",
+            "output_tables": []  # Optionally populate if available from job logs
+        }
+
+    if use_checkpoint and last_seen is not None:
+        if checkpoints is not None:
+            checkpoints[checkpoint_key] = last_seen
+        else:
+            save_checkpoint(checkpoint_key, last_seen)
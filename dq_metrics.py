@@ -0,0 +1,243 @@
+# dq_metrics.py
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+DEFAULT_METRICS_DB = os.environ.get("DQ_METRICS_DB", "dq_metrics.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    asset TEXT PRIMARY KEY,
+    monitored INTEGER NOT NULL DEFAULT 0,
+    open_issues INTEGER NOT NULL DEFAULT 0,
+    last_day TEXT,
+    last_run_at TEXT
+);
+CREATE TABLE IF NOT EXISTS rule_status (
+    asset TEXT NOT NULL,
+    rule_id TEXT NOT NULL,
+    severity TEXT,
+    failing INTEGER NOT NULL,
+    last_run_at TEXT NOT NULL,
+    PRIMARY KEY (asset, rule_id)
+);
+CREATE TABLE IF NOT EXISTS rule_daily (
+    asset TEXT NOT NULL,
+    rule_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    runs INTEGER NOT NULL,
+    rows_checked INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    PRIMARY KEY (asset, rule_id, day)
+);
+CREATE TABLE IF NOT EXISTS asset_daily (
+    asset TEXT NOT NULL,
+    day TEXT NOT NULL,
+    runs INTEGER NOT NULL,
+    checks INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    PRIMARY KEY (asset, day)
+);
+CREATE TABLE IF NOT EXISTS daily_totals (
+    day TEXT PRIMARY KEY,
+    total_assets INTEGER NOT NULL,
+    monitored_assets INTEGER NOT NULL,
+    open_issues INTEGER NOT NULL,
+    checks INTEGER NOT NULL,
+    failed INTEGER NOT NULL
+);
+"""
+
+
+def _utc_now():
+    return datetime.now(timezone.utc)
+
+
+def _pass_rate(checks, failed):
+    return 1 - failed / checks if checks else None
+
+
+class MetricsStore:
+    """Per-asset, per-rule and per-day DQ rollups, updated as results land.
+
+    record_results() folds one run into the rollups and refreshes the day's
+    totals, so dashboard reads are primary-key lookups and never scan raw
+    results: kpis() costs O(1) and asset_summary() O(assets). Open issues
+    are the rules whose latest run failed at least one row. Days are UTC
+    dates throughout.
+    """
+
+    def __init__(self, path=DEFAULT_METRICS_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # --- writes -------------------------------------------------------------
+    def register_assets(self, assets):
+        """Add known assets (e.g. from the catalog) so coverage counts unmonitored ones too."""
+        with self._lock, self._connect() as conn, conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO assets (asset) VALUES (?)", [(a,) for a in assets])
+            if conn.total_changes != before:
+                self._refresh_totals(conn, _utc_now().date().isoformat())
+
+    def record_results(self, asset, results, run_at=None):
+        """Fold one run's per-rule results into the rollups.
+
+        results are summary rows (RuleEngine.summary() or run_table_check()
+        records) with rule_id, severity, rows_checked and failed.
+        """
+        run_at = run_at or _utc_now()
+        # One clock for days and ordering: naive times are taken as UTC
+        run_at = run_at.replace(tzinfo=timezone.utc) if run_at.tzinfo is None else run_at.astimezone(timezone.utc)
+        day, stamp = run_at.date().isoformat(), run_at.isoformat()
+        rows = [(r["rule_id"], r.get("severity"), int(r["rows_checked"]), int(r["failed"])) for r in results]
+        if not rows:
+            return
+        with self._lock, self._connect() as conn, conn:
+            conn.executemany(
+                """
+                INSERT INTO rule_daily VALUES (?, ?, ?, 1, ?, ?)
+                ON CONFLICT (asset, rule_id, day) DO UPDATE SET
+                    runs = runs + 1, rows_checked = rows_checked + excluded.rows_checked,
+                    failed = failed + excluded.failed
+                """,
+                [(asset, rule_id, day, checked, failed) for rule_id, _, checked, failed in rows],
+            )
+            conn.execute(
+                """
+                INSERT INTO asset_daily VALUES (?, ?, 1, ?, ?)
+                ON CONFLICT (asset, day) DO UPDATE SET
+                    runs = runs + 1, checks = checks + excluded.checks, failed = failed + excluded.failed
+                """,
+                (asset, day, sum(r[2] for r in rows), sum(r[3] for r in rows)),
+            )
+            # A backfilled older run must not overwrite the latest status
+            conn.executemany(
+                """
+                INSERT INTO rule_status VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (asset, rule_id) DO UPDATE SET
+                    severity = excluded.severity, failing = excluded.failing, last_run_at = excluded.last_run_at
+                WHERE excluded.last_run_at >= rule_status.last_run_at
+                """,
+                [(asset, rule_id, severity, int(failed > 0), stamp) for rule_id, severity, _, failed in rows],
+            )
+            conn.execute(
+                """
+                INSERT INTO assets (asset, monitored, open_issues, last_day, last_run_at)
+                VALUES (?1, 1, (SELECT COUNT(*) FROM rule_status WHERE asset = ?1 AND failing = 1), ?2, ?3)
+                ON CONFLICT (asset) DO UPDATE SET
+                    monitored = 1, open_issues = excluded.open_issues,
+                    last_day = MAX(COALESCE(last_day, ''), excluded.last_day),
+                    last_run_at = MAX(COALESCE(last_run_at, ''), excluded.last_run_at)
+                """,
+                (asset, day, stamp),
+            )
+            self._refresh_totals(conn, day)
+
+    def _refresh_totals(self, conn, day):
+        # One pass over assets per write keeps every dashboard read O(1); the
+        # pass rate is over each asset's latest day with results. Later
+        # snapshots (a backfilled run) describe the current state as well.
+        later = [row[0] for row in conn.execute("SELECT day FROM daily_totals WHERE day > ?", (day,))]
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO daily_totals
+            SELECT ?, COUNT(*), COALESCE(SUM(s.monitored), 0), COALESCE(SUM(s.open_issues), 0),
+                   COALESCE(SUM(t.checks), 0), COALESCE(SUM(t.failed), 0)
+            FROM assets AS s
+            LEFT JOIN asset_daily AS t ON t.asset = s.asset AND t.day = s.last_day
+            """,
+            [(d,) for d in [day] + later],
+        )
+
+    # --- reads --------------------------------------------------------------
+    def kpis(self):
+        """Latest totals and their change since the previous day with results."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM daily_totals ORDER BY day DESC LIMIT 2").fetchall()
+        latest, previous = (rows + [None, None])[:2]
+        if latest is None:
+            return {"day": None, "total_assets": 0, "monitored_assets": 0, "coverage": None, "open_issues": 0,
+                    "pass_rate": None, "delta_assets": None, "delta_open_issues": None, "delta_pass_rate": None}
+
+        def delta(name):
+            return latest[name] - previous[name] if previous is not None else None
+
+        pass_rate = _pass_rate(latest["checks"], latest["failed"])
+        previous_rate = _pass_rate(previous["checks"], previous["failed"]) if previous is not None else None
+        return {
+            "day": latest["day"],
+            "total_assets": latest["total_assets"],
+            "monitored_assets": latest["monitored_assets"],
+            "coverage": latest["monitored_assets"] / latest["total_assets"] if latest["total_assets"] else None,
+            "open_issues": latest["open_issues"],
+            "pass_rate": pass_rate,
+            "delta_assets": delta("total_assets"),
+            "delta_open_issues": delta("open_issues"),
+            "delta_pass_rate": pass_rate - previous_rate if None not in (pass_rate, previous_rate) else None,
+        }
+
+    def asset_summary(self):
+        """One row per monitored asset: latest day's pass rate, open issues and change vs. the day before."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT s.asset, s.last_day AS day, s.last_run_at, s.open_issues,
+                       t.runs, t.checks, t.failed, y.checks AS prev_checks, y.failed AS prev_failed
+                FROM assets AS s
+                JOIN asset_daily AS t ON t.asset = s.asset AND t.day = s.last_day
+                LEFT JOIN asset_daily AS y ON y.asset = s.asset AND y.day = date(s.last_day, '-1 day')
+                WHERE s.monitored = 1
+                ORDER BY s.open_issues DESC, s.asset
+                """
+            ).fetchall()
+        summary = []
+        for row in rows:
+            rate = _pass_rate(row["checks"], row["failed"])
+            previous = _pass_rate(row["prev_checks"], row["prev_failed"]) if row["prev_checks"] is not None else None
+            summary.append({
+                "asset": row["asset"], "day": row["day"], "last_run_at": row["last_run_at"],
+                "runs": row["runs"], "open_issues": row["open_issues"], "pass_rate": rate,
+                "delta_pass_rate": rate - previous if None not in (rate, previous) else None,
+            })
+        return summary
+
+    def rule_summary(self, asset):
+        """Current status and latest-day pass rate of every rule checked on asset."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT r.rule_id, r.severity, r.failing, r.last_run_at, d.day, d.runs, d.rows_checked, d.failed
+                FROM rule_status AS r
+                JOIN rule_daily AS d ON d.asset = r.asset AND d.rule_id = r.rule_id
+                    AND d.day = substr(r.last_run_at, 1, 10)
+                WHERE r.asset = ?
+                ORDER BY r.failing DESC, r.rule_id
+                """,
+                (asset,),
+            ).fetchall()
+        return [{**dict(row), "pass_rate": _pass_rate(row["rows_checked"], row["failed"])} for row in rows]
+
+    def history(self, asset, days=30):
+        """Daily pass rate of asset over the last days days with results."""
+        since = (_utc_now().date() - timedelta(days=days)).isoformat()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT day, runs, checks, failed FROM asset_daily WHERE asset = ? AND day >= ? ORDER BY day",
+                (asset, since),
+            ).fetchall()
+        return [{**dict(row), "pass_rate": _pass_rate(row["checks"], row["failed"])} for row in rows]
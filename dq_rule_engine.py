@@ -0,0 +1,308 @@
+# dq_rule_engine.py
+
+import re
+
+import numpy as np
+import pandas as pd
+import yaml
+
+# Predefined rules reserved in the folder structure.py layout
+RULES_PATH = "data_quality_checks/sanity_checks/predefined_rules/rules.yaml"
+
+# Rows read per pd.read_csv chunk by run_csv
+DEFAULT_CHUNKSIZE = 500_000
+
+RULE_TYPES = ("completeness", "range", "regex", "accepted_values", "uniqueness", "referential")
+DEFAULT_SEVERITY = "medium"
+
+# Parameters each rule type needs (at least one of each tuple)
+_REQUIRED = {
+    "range": (("min", "max"),),
+    "regex": (("pattern",),),
+    "accepted_values": (("values",),),
+    "referential": (("values", "reference"),),
+}
+
+
+class RuleSet:
+    """Validated DQ rules plus the columns that identify a row.
+
+    YAML layout:
+
+        table: project.dataset.orders     # optional, used by SQL push-down
+        key_columns: [order_id]           # optional, identifies failing rows
+        rules:
+          - id: amount_range
+            type: range
+            column: amount                # or columns: [...]
+            min: 0
+            severity: high
+
+    Every rule ends up with "id", "type", "columns" (a list) and "severity".
+    """
+
+    def __init__(self, rules, key_columns=None, table=None):
+        self.rules = [_normalize_rule(rule, i) for i, rule in enumerate(rules)]
+        self.key_columns = list(key_columns or [])
+        self.table = table
+        ids = [rule["id"] for rule in self.rules]
+        duplicates = sorted({rule_id for rule_id in ids if ids.count(rule_id) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate rule ids: {duplicates}")
+
+    @classmethod
+    def from_dict(cls, spec):
+        if isinstance(spec, list):
+            spec = {"rules": spec}
+        return cls(spec.get("rules") or [], spec.get("key_columns"), spec.get("table"))
+
+    @classmethod
+    def from_yaml(cls, path=RULES_PATH):
+        with open(path) as f:
+            return cls.from_dict(yaml.safe_load(f) or {})
+
+    def get(self, rule_id):
+        return next(rule for rule in self.rules if rule["id"] == rule_id)
+
+
+def _normalize_rule(rule, position):
+    rule = dict(rule)
+    rule_id = rule.setdefault("id", f"rule_{position}")
+    if rule.get("type") not in RULE_TYPES:
+        raise ValueError(f"Rule {rule_id}: type must be one of {RULE_TYPES}, got {rule.get('type')!r}")
+    columns = rule.pop("column", None)
+    columns = rule.get("columns") or ([columns] if columns else [])
+    if not columns:
+        raise ValueError(f"Rule {rule_id}: needs 'column' or 'columns'")
+    rule["columns"] = [columns] if isinstance(columns, str) else list(columns)
+    for options in _REQUIRED.get(rule["type"], ()):
+        if not any(rule.get(option) is not None for option in options):
+            raise ValueError(f"Rule {rule_id}: {rule['type']} needs one of {options}")
+    if rule["type"] == "regex":
+        re.compile(rule["pattern"])
+    rule.setdefault("severity", DEFAULT_SEVERITY)
+    return rule
+
+
+def key_strings(series):
+    """Values as strings that compare equal across chunks and sources.
+
+    Integral floats (ints read next to NaNs) lose their ".0" value by value,
+    so 7 and 7.0 match whatever else a chunk holds; everything else uses
+    str().
+    """
+    keys = series.astype(str)
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        with np.errstate(invalid="ignore"):
+            integral = (values % 1 == 0) & (np.abs(values) < 2 ** 63)
+        keys[integral] = values[integral].astype(np.int64).astype(str)
+    return keys
+
+
+class _ChunkContext:
+    """Per-chunk memo so rules sharing a column reuse its null mask and key strings."""
+
+    def __init__(self, chunk):
+        self.chunk = chunk
+        self._notna = {}
+        self._keys = {}
+
+    def notna(self, column):
+        if column not in self._notna:
+            self._notna[column] = self.chunk[column].notna().to_numpy()
+        return self._notna[column]
+
+    def keys(self, column):
+        if column not in self._keys:
+            self._keys[column] = key_strings(self.chunk[column])
+        return self._keys[column]
+
+
+class _SeenHashes:
+    """Set of uint64 row hashes held as a few sorted arrays, merged when too many pile up."""
+
+    def __init__(self, max_levels=8):
+        self.max_levels = max_levels
+        self.levels = []
+
+    def contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for level in self.levels:
+            positions = np.searchsorted(level, hashes).clip(max=len(level) - 1)
+            found |= level[positions] == hashes
+        return found
+
+    def add(self, hashes):
+        if len(hashes):
+            self.levels.append(np.unique(hashes))
+        if len(self.levels) > self.max_levels:
+            self.levels = [np.unique(np.concatenate(self.levels))]
+
+
+# --- rule compilers: rule -> check(ctx) returning a boolean "failed" array -------
+def _completeness(rule):
+    columns = rule["columns"]
+
+    def check(ctx):
+        return ctx.chunk[columns].isna().to_numpy().any(axis=1)
+    return check
+
+
+def _range(rule):
+    column, low, high = rule["columns"][0], rule.get("min"), rule.get("max")
+
+    def check(ctx):
+        values = pd.to_numeric(ctx.chunk[column], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        # Non-numeric values fail; nulls are left to completeness rules
+        failed = np.isnan(values) & ctx.notna(column)
+        with np.errstate(invalid="ignore"):
+            if low is not None:
+                failed |= values < low
+            if high is not None:
+                failed |= values > high
+        return failed
+    return check
+
+
+def _regex(rule):
+    column, pattern = rule["columns"][0], rule["pattern"]
+
+    def check(ctx):
+        present = ctx.notna(column)
+        failed = np.zeros(len(ctx.chunk), dtype=bool)
+        matched = ctx.chunk[column][present].astype(str).str.fullmatch(pattern)
+        failed[present] = ~matched.to_numpy(dtype=bool)
+        return failed
+    return check
+
+
+def _membership(column, allowed):
+    def check(ctx):
+        return ctx.notna(column) & ~ctx.keys(column).isin(allowed).to_numpy()
+    return check
+
+
+def _accepted_values(rule):
+    return _membership(rule["columns"][0], set(key_strings(pd.Series(rule["values"]))))
+
+
+def reference_keys(rule):
+    """Distinct reference keys of a referential rule as strings (see key_strings)."""
+    if rule.get("values") is not None:
+        return set(key_strings(pd.Series(rule["values"])))
+    reference = rule["reference"]
+    values = pd.read_csv(reference["path"], usecols=[reference["column"]])[reference["column"]].dropna()
+    return set(key_strings(values))
+
+
+def _referential(rule):
+    return _membership(rule["columns"][0], reference_keys(rule))
+
+
+def _uniqueness(rule):
+    columns = rule["columns"]
+    seen = _SeenHashes()
+
+    def check(ctx):
+        # Rows with a null key are never duplicates (SQL semantics)
+        complete = np.logical_and.reduce([ctx.notna(c) for c in columns])
+        keys = pd.DataFrame({c: ctx.keys(c) for c in columns})
+        hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+        # First occurrence passes; later ones fail, within and across chunks
+        duplicate = pd.Series(hashes).duplicated().to_numpy() | seen.contains(hashes)
+        duplicate &= complete
+        seen.add(hashes[complete])
+        return duplicate
+    return check
+
+
+_COMPILERS = {
+    "completeness": _completeness,
+    "range": _range,
+    "regex": _regex,
+    "accepted_values": _accepted_values,
+    "uniqueness": _uniqueness,
+    "referential": _referential,
+}
+
+
+class ChunkResult:
+    """Failures of one chunk: one packed bitmask (np.packbits) per rule."""
+
+    def __init__(self, offset, n_rows, masks, counts):
+        self.offset = offset      # file position of the chunk's first row
+        self.n_rows = n_rows
+        self.masks = masks        # rule id -> packed uint8 array
+        self.counts = counts      # rule id -> failed rows
+
+    def failed(self, rule_id):
+        return np.unpackbits(self.masks[rule_id], count=self.n_rows).astype(bool)
+
+    def any_failed(self):
+        if not self.masks:
+            return np.zeros(self.n_rows, dtype=bool)
+        combined = np.bitwise_or.reduce(list(self.masks.values()))
+        return np.unpackbits(combined, count=self.n_rows).astype(bool)
+
+    def failed_positions(self, rule_id):
+        """File row positions failing rule_id."""
+        return np.flatnonzero(self.failed(rule_id)) + self.offset
+
+
+class RuleEngine:
+    """Evaluates every rule of a RuleSet in one pass per chunk.
+
+    Chunks must arrive in file order (uniqueness remembers the row hashes
+    it has seen). Failing rows are never copied: each chunk yields packed
+    bitmasks, and only per-rule counters accumulate across the run.
+    """
+
+    def __init__(self, rule_set):
+        self.rule_set = rule_set
+        self._checks = [(rule, _COMPILERS[rule["type"]](rule)) for rule in rule_set.rules]
+        self.rows = 0
+        self.failures = {rule["id"]: 0 for rule in rule_set.rules}
+
+    def evaluate(self, chunk):
+        ctx = _ChunkContext(chunk)
+        masks, counts = {}, {}
+        for rule, check in self._checks:
+            try:
+                failed = check(ctx)
+            except KeyError as e:
+                raise ValueError(f"Rule {rule['id']}: column {e} not found in the data") from e
+            masks[rule["id"]] = np.packbits(failed)
+            counts[rule["id"]] = int(failed.sum())
+            self.failures[rule["id"]] += counts[rule["id"]]
+        result = ChunkResult(self.rows, len(chunk), masks, counts)
+        self.rows += len(chunk)
+        return result
+
+    def run(self, chunks, on_chunk=None):
+        """Evaluate an iterable of DataFrames; on_chunk(chunk, result) sees each result."""
+        for chunk in chunks:
+            result = self.evaluate(chunk)
+            if on_chunk is not None:
+                on_chunk(chunk, result)
+        return self.summary()
+
+    def summary(self):
+        return pd.DataFrame([
+            {
+                "rule_id": rule["id"],
+                "type": rule["type"],
+                "columns": ", ".join(rule["columns"]),
+                "severity": rule["severity"],
+                "rows_checked": self.rows,
+                "failed": self.failures[rule["id"]],
+                "pass_rate": 1 - self.failures[rule["id"]] / self.rows if self.rows else 1.0,
+            }
+            for rule in self.rule_set.rules
+        ])
+
+
+def run_csv(source, rule_set, chunksize=DEFAULT_CHUNKSIZE, on_chunk=None, **read_csv_kwargs):
+    """Run rule_set over a CSV in chunks; returns the per-rule summary."""
+    engine = RuleEngine(rule_set)
+    return engine.run(pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs), on_chunk)
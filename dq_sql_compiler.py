@@ -0,0 +1,275 @@
+# dq_sql_compiler.py
+
+import argparse
+import functools
+import re
+import sqlite3
+
+import pandas as pd
+
+from dq_metrics import MetricsStore
+from dq_rule_engine import RULES_PATH, RuleSet
+from gcp_clients import call_with_client
+
+# Failing rows returned per rule by sample queries
+DEFAULT_SAMPLE_ROWS = 100
+
+
+class Dialect:
+    """SQL spelling differences between BigQuery and the SQLite stand-in."""
+
+    def __init__(self, name, quote, count_if, regex_match, to_number, to_string, tuple_key, escape):
+        self.name = name
+        self._quote = quote
+        self._count_if = count_if
+        self._regex_match = regex_match
+        self._to_number = to_number
+        self._to_string = to_string
+        self._tuple_key = tuple_key
+        self._escape = escape
+
+    def quote(self, identifier):
+        return self._quote.format(identifier)
+
+    def count_if(self, condition):
+        return self._count_if.format(condition)
+
+    def regex_match(self, expr, pattern):
+        return self._regex_match.format(expr, self.literal(f"^(?:{pattern})$"))
+
+    def to_number(self, expr):
+        return self._to_number.format(expr)
+
+    def to_string(self, expr):
+        return self._to_string.format(expr)
+
+    def tuple_key(self, exprs):
+        return exprs[0] if len(exprs) == 1 else self._tuple_key.format(", ".join(exprs))
+
+    def literal(self, value):
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, (int, float)):
+            return repr(value)
+        return "'" + self._escape(str(value)) + "'"
+
+
+BIGQUERY = Dialect(
+    "bigquery",
+    quote="`{}`",
+    count_if="COUNTIF({})",
+    regex_match="REGEXP_CONTAINS({}, {})",
+    to_number="SAFE_CAST({} AS FLOAT64)",
+    to_string="CAST({} AS STRING)",
+    tuple_key="TO_JSON_STRING(STRUCT({}))",
+    escape=lambda s: s.replace("\\", "\\\\").replace("'", "\\'"),
+)
+
+# SQLite has no REGEXP implementation or safe cast of its own; sqlite_executor registers both
+SQLITE = Dialect(
+    "sqlite",
+    quote='"{}"',
+    count_if="COALESCE(SUM(CASE WHEN {} THEN 1 ELSE 0 END), 0)",
+    regex_match="({} REGEXP {})",
+    to_number="dq_to_number({})",
+    to_string="CAST({} AS TEXT)",
+    tuple_key="json_array({})",
+    escape=lambda s: s.replace("'", "''"),
+)
+
+DIALECTS = {"bigquery": BIGQUERY, "sqlite": SQLITE}
+
+
+def _column(rule, dialect, alias="t", i=0):
+    return f"{alias}.{dialect.quote(rule['columns'][i])}"
+
+
+def _value_list(values, dialect):
+    return ", ".join(dialect.literal(v) for v in values)
+
+
+def _in_values(expr, values, dialect):
+    """expr NOT IN values, comparing as numbers when every value is numeric, else as strings."""
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        return f"{expr} NOT IN ({_value_list(values, dialect)})"
+    return f"{dialect.to_string(expr)} NOT IN ({_value_list([str(v) for v in values], dialect)})"
+
+
+def _reference_join(rule, alias, dialect):
+    reference = rule.get("reference") or {}
+    if not reference.get("table"):
+        raise ValueError(f"Rule {rule['id']}: SQL push-down needs reference.table (or inline values)")
+    return (
+        f"LEFT JOIN (SELECT DISTINCT {dialect.quote(reference['column'])} AS ref_key "
+        f"FROM {dialect.quote(reference['table'])}) AS {alias} "
+        f"ON {_column(rule, dialect)} = {alias}.ref_key"
+    )
+
+
+def failure_condition(rule, dialect=BIGQUERY, ref_alias=None):
+    """SQL condition that is true for a row failing rule (uniqueness excluded: it is not row-local)."""
+    column = _column(rule, dialect)
+    rule_type = rule["type"]
+    if rule_type == "completeness":
+        return " OR ".join(f"{_column(rule, dialect, i=i)} IS NULL" for i in range(len(rule["columns"])))
+    if rule_type == "range":
+        number = dialect.to_number(column)
+        # Non-numeric values fail; nulls are left to completeness rules
+        checks = [f"{number} IS NULL"]
+        if rule.get("min") is not None:
+            checks.append(f"{number} < {dialect.literal(rule['min'])}")
+        if rule.get("max") is not None:
+            checks.append(f"{number} > {dialect.literal(rule['max'])}")
+        return f"{column} IS NOT NULL AND ({' OR '.join(checks)})"
+    if rule_type == "regex":
+        return f"{column} IS NOT NULL AND NOT {dialect.regex_match(dialect.to_string(column), rule['pattern'])}"
+    if rule_type == "accepted_values":
+        return f"{column} IS NOT NULL AND {_in_values(column, rule['values'], dialect)}"
+    if rule_type == "referential":
+        if rule.get("values") is not None:
+            return f"{column} IS NOT NULL AND {_in_values(column, rule['values'], dialect)}"
+        return f"{column} IS NOT NULL AND {ref_alias}.ref_key IS NULL"
+    raise ValueError(f"Rule {rule['id']}: {rule_type} has no row-level condition")
+
+
+def _needs_join(rule):
+    return rule["type"] == "referential" and rule.get("values") is None
+
+
+def compile_table_check(rule_set, table=None, dialect=BIGQUERY):
+    """One aggregated statement evaluating every rule of rule_set in a single scan of table.
+
+    Returns (sql, rule_ids); result column "row_count" holds the row count
+    and column f"r{i}" the failure count of rule_ids[i]. Uniqueness counts
+    rows after the first occurrence of their key; referential rules join
+    the distinct reference keys once each.
+    """
+    table = table or rule_set.table
+    if not table:
+        raise ValueError("No table given and the rule set has none")
+    selects, joins = ["COUNT(*) AS row_count"], []
+    for i, rule in enumerate(rule_set.rules):
+        if rule["type"] == "uniqueness":
+            columns = [_column(rule, dialect, i=j) for j in range(len(rule["columns"]))]
+            complete = " AND ".join(f"{c} IS NOT NULL" for c in columns)
+            key = dialect.tuple_key(columns)
+            expr = f"{dialect.count_if(complete)} - COUNT(DISTINCT CASE WHEN {complete} THEN {key} END)"
+        else:
+            ref_alias = f"ref{i}" if _needs_join(rule) else None
+            if ref_alias:
+                joins.append(_reference_join(rule, ref_alias, dialect))
+            expr = dialect.count_if(failure_condition(rule, dialect, ref_alias))
+        selects.append(f"{expr} AS r{i}")
+
+    sql = "SELECT\n    " + ",\n    ".join(selects) + f"\nFROM {dialect.quote(table)} AS t"
+    if joins:
+        sql += "\n" + "\n".join(joins)
+    return sql, [rule["id"] for rule in rule_set.rules]
+
+
+def compile_sample_query(rule, table, dialect=BIGQUERY, limit=DEFAULT_SAMPLE_ROWS):
+    """Bounded query returning up to limit rows failing rule."""
+    if rule["type"] == "uniqueness":
+        keys = ", ".join(dialect.quote(c) for c in rule["columns"])
+        complete = " AND ".join(f"{dialect.quote(c)} IS NOT NULL" for c in rule["columns"])
+        return (
+            f"SELECT * FROM (SELECT t.*, ROW_NUMBER() OVER (PARTITION BY {keys} ORDER BY {keys}) AS dq_occurrence "
+            f"FROM {dialect.quote(table)} AS t WHERE {complete}) AS d WHERE dq_occurrence > 1 LIMIT {int(limit)}"
+        )
+    ref_alias = "ref0" if _needs_join(rule) else None
+    join = f" {_reference_join(rule, ref_alias, dialect)}" if ref_alias else ""
+    return (
+        f"SELECT t.* FROM {dialect.quote(table)} AS t{join} "
+        f"WHERE {failure_condition(rule, dialect, ref_alias)} LIMIT {int(limit)}"
+    )
+
+
+# --- executors: callables sql -> list of row dicts ----------------------------
+def bigquery_executor(project_id):
+    def execute(sql):
+        return call_with_client(
+            "bigquery", project_id, lambda client: [dict(row.items()) for row in client.query(sql).result()]
+        )
+    return execute
+
+
+@functools.lru_cache(maxsize=256)
+def _compiled(pattern):
+    return re.compile(pattern)
+
+
+def _regexp(pattern, value):
+    return value is not None and _compiled(pattern).search(str(value)) is not None
+
+
+def _to_number(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def sqlite_executor(conn):
+    """Executor over a sqlite3 connection, with REGEXP and dq_to_number registered."""
+    conn.create_function("regexp", 2, _regexp, deterministic=True)
+    conn.create_function("dq_to_number", 1, _to_number, deterministic=True)
+    conn.row_factory = sqlite3.Row
+
+    def execute(sql):
+        return [dict(row) for row in conn.execute(sql).fetchall()]
+    return execute
+
+
+def run_table_check(rule_set, execute, table=None, dialect=BIGQUERY):
+    """Per-rule summary (as RuleEngine.summary) from a single aggregated query."""
+    sql, rule_ids = compile_table_check(rule_set, table, dialect)
+    row = execute(sql)[0]
+    rows = row["row_count"]
+    return pd.DataFrame([
+        {
+            "rule_id": rule_id,
+            "type": rule_set.get(rule_id)["type"],
+            "columns": ", ".join(rule_set.get(rule_id)["columns"]),
+            "severity": rule_set.get(rule_id)["severity"],
+            "rows_checked": rows,
+            "failed": int(row[f"r{i}"] or 0),
+            "pass_rate": 1 - (row[f"r{i}"] or 0) / rows if rows else 1.0,
+        }
+        for i, rule_id in enumerate(rule_ids)
+    ])
+
+
+def sample_failures(rule_set, rule_id, execute, table=None, dialect=BIGQUERY, limit=DEFAULT_SAMPLE_ROWS):
+    """Up to limit failing rows of one rule, as a DataFrame."""
+    sql = compile_sample_query(rule_set.get(rule_id), table or rule_set.table, dialect, limit)
+    return pd.DataFrame(execute(sql))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run DQ rules inside BigQuery with one aggregated query per table.")
+    parser.add_argument("--rules", default=RULES_PATH, help="Rules YAML")
+    parser.add_argument("--table", help="Table to check (default: the rules file's table)")
+    parser.add_argument("--project", help="Project running the query (default: the table's project)")
+    parser.add_argument("--samples", type=int, default=0, help="Failing rows to fetch per failed rule")
+    parser.add_argument("--print-sql", action="store_true", help="Only print the compiled statement")
+    args = parser.parse_args(argv)
+
+    rule_set = RuleSet.from_yaml(args.rules)
+    table = args.table or rule_set.table
+    if args.print_sql:
+        print(compile_table_check(rule_set, table)[0])
+        return
+
+    execute = bigquery_executor(args.project or table.split(".")[0])
+    summary = run_table_check(rule_set, execute, table)
+    print(summary.to_string(index=False))
+    MetricsStore().record_results(table, summary.to_dict("records"))
+    for rule_id in summary.loc[summary["failed"] > 0, "rule_id"] if args.samples else []:
+        print(f"\n🚩 {rule_id}")
+        print(sample_failures(rule_set, rule_id, execute, table, limit=args.samples).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
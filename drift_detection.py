@@ -0,0 +1,248 @@
+# drift_detection.py
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from streaming_profiler import ColumnProfile, profile_csv_in_chunks
+
+# Per-run column sketches; old data is never re-read to build a baseline
+SKETCH_STORE_PATH = os.environ.get("PROFILE_SKETCH_STORE", "profile_sketches.sqlite")
+
+# Baseline = runs of the same dataset in this many days before the current run
+BASELINE_DAYS = 30
+
+# Quantile bins of the baseline used for numeric PSI
+PSI_BINS = 10
+
+# Conventional alert levels: PSI > 0.2 is a significant shift
+THRESHOLDS = {"psi": 0.2, "ks": 0.1, "cardinality_change": 0.5, "null_rate_change": 0.05}
+
+# Floor for bin probabilities so empty bins keep PSI finite
+_EPSILON = 1e-4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    dataset TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    run_at TEXT NOT NULL,
+    n_rows INTEGER NOT NULL,
+    PRIMARY KEY (dataset, run_id)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_dataset_time ON runs (dataset, run_at);
+CREATE TABLE IF NOT EXISTS column_sketches (
+    dataset TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    column_name TEXT NOT NULL,
+    distinct_count INTEGER,
+    sketch BLOB NOT NULL,
+    PRIMARY KEY (dataset, run_id, column_name)
+);
+"""
+
+
+class SketchStore:
+    """ColumnProfile sketches of every profiling run, keyed by (dataset, run).
+
+    Each run stores one compressed, mergeable sketch per column (t-digest,
+    HyperLogLog, top-K, null and row counts) plus its distinct count, so a
+    baseline is the merge of a few kilobytes per run rather than a re-read
+    of the data.
+    """
+
+    def __init__(self, path=SKETCH_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def save_run(self, dataset, run_id, profiles, n_rows, run_at=None):
+        """Store (or replace) one run's column profiles."""
+        run_at = (run_at or datetime.now(timezone.utc)).isoformat()
+        rows = [
+            (dataset, run_id, str(name), profile.distinct.count(),
+             zlib.compress(json.dumps(profile.to_dict()).encode("utf-8")))
+            for name, profile in profiles.items()
+        ]
+        with self._lock, self._connect() as conn, conn:
+            conn.execute("DELETE FROM column_sketches WHERE dataset = ? AND run_id = ?", (dataset, run_id))
+            conn.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?)", (dataset, run_id, run_at, n_rows))
+            conn.executemany("INSERT INTO column_sketches VALUES (?, ?, ?, ?, ?)", rows)
+
+    def runs(self, dataset, since=None, until=None, exclude=None):
+        """[(run_id, run_at)] of dataset in [since, until), oldest first."""
+        query, params = "SELECT run_id, run_at FROM runs WHERE dataset = ?", [dataset]
+        if since is not None:
+            query += " AND run_at >= ?"
+            params.append(since.isoformat())
+        if until is not None:
+            query += " AND run_at < ?"
+            params.append(until.isoformat())
+        if exclude is not None:
+            query += " AND run_id != ?"
+            params.append(exclude)
+        with self._connect() as conn:
+            return conn.execute(query + " ORDER BY run_at", params).fetchall()
+
+    def run_at(self, dataset, run_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT run_at FROM runs WHERE dataset = ? AND run_id = ?", (dataset, run_id)).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def load_run(self, dataset, run_id):
+        """{column: ColumnProfile} of one run."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT column_name, sketch FROM column_sketches WHERE dataset = ? AND run_id = ?", (dataset, run_id)
+            ).fetchall()
+        return {name: ColumnProfile.from_dict(json.loads(zlib.decompress(sketch))) for name, sketch in rows}
+
+    def baseline(self, dataset, before=None, days=BASELINE_DAYS, exclude=None):
+        """Merged profiles of dataset's runs in the days before `before`, plus mean per-run distinct counts.
+
+        Returns ({column: ColumnProfile}, {column: mean distinct count}, run count).
+        """
+        before = before or datetime.now(timezone.utc)
+        run_ids = [run_id for run_id, _ in self.runs(dataset, before - timedelta(days=days), before, exclude)]
+        if not run_ids:
+            return {}, {}, 0
+        placeholders = ", ".join("?" * len(run_ids))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT column_name, distinct_count, sketch FROM column_sketches "
+                f"WHERE dataset = ? AND run_id IN ({placeholders})",
+                [dataset] + run_ids,
+            ).fetchall()
+        merged, distinct = {}, {}
+        for name, distinct_count, sketch in rows:
+            profile = ColumnProfile.from_dict(json.loads(zlib.decompress(sketch)))
+            merged[name] = merged[name].merge(profile) if name in merged else profile
+            distinct.setdefault(name, []).append(distinct_count)
+        # A union HLL over many runs overstates per-run cardinality; compare like with like
+        return merged, {name: float(np.mean(counts)) for name, counts in distinct.items()}, len(run_ids)
+
+
+# --- drift metrics ------------------------------------------------------------
+def psi(expected, actual):
+    """Population stability index of two probability vectors over the same bins."""
+    expected = np.clip(np.asarray(expected, dtype=np.float64), _EPSILON, None)
+    actual = np.clip(np.asarray(actual, dtype=np.float64), _EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def numeric_psi(baseline, current, bins=PSI_BINS):
+    """PSI over the baseline's quantile bins, from the two t-digests."""
+    edges = np.unique(baseline.quantile(np.linspace(0, 1, bins + 1)[1:-1]))
+    expected = np.diff(np.r_[0.0, baseline.cdf(edges), 1.0])
+    actual = np.diff(np.r_[0.0, current.cdf(edges), 1.0])
+    return psi(expected, actual)
+
+
+def ks_distance(baseline, current):
+    """Largest gap between the two digests' CDFs, checked at every centroid."""
+    grid = np.union1d(baseline.means, current.means)
+    return float(np.max(np.abs(baseline.cdf(grid) - current.cdf(grid))))
+
+
+def categorical_psi(baseline, current):
+    """PSI over the baseline's heavy hitters plus one "other" bin, from the top-K sketches."""
+    base_total = baseline.count - baseline.null_count
+    current_total = current.count - current.null_count
+    values = [value for value, _ in baseline.top.top()]
+    expected = np.array([baseline.top.counts[v] for v in values], dtype=np.float64) / base_total
+    actual = np.array([current.top.counts.get(v, 0) for v in values], dtype=np.float64) / current_total
+    return psi(np.r_[expected, max(1 - expected.sum(), 0)], np.r_[actual, max(1 - actual.sum(), 0)])
+
+
+def column_drift(baseline, current, baseline_distinct):
+    """Drift metrics of one column; None where a metric does not apply."""
+    result = {
+        "column": current.name,
+        "null_rate": current.null_rate,
+        "null_rate_change": current.null_rate - baseline.null_rate,
+        "distinct": current.distinct.count(),
+        "cardinality_change": None,
+        "psi": None,
+        "ks": None,
+    }
+    if baseline_distinct:
+        result["cardinality_change"] = result["distinct"] / baseline_distinct - 1
+    if current.count == current.null_count or baseline.count == baseline.null_count:
+        return result
+    if current.numeric and baseline.numeric:
+        result["psi"] = numeric_psi(baseline.digest, current.digest)
+        result["ks"] = ks_distance(baseline.digest, current.digest)
+    elif baseline.top.counts:
+        result["psi"] = categorical_psi(baseline, current)
+    return result
+
+
+def detect_drift(store, dataset, run_id, days=BASELINE_DAYS, thresholds=THRESHOLDS):
+    """Per-column drift of run_id against the dataset's rolling baseline, as a DataFrame.
+
+    "drifted" lists the metrics over their threshold; empty when the
+    dataset has no earlier runs in the window.
+    """
+    run_at = store.run_at(dataset, run_id)
+    if run_at is None:
+        raise ValueError(f"No stored run {run_id!r} for dataset {dataset!r}")
+    baseline, distinct, n_runs = store.baseline(dataset, run_at, days, exclude=run_id)
+    if not n_runs:
+        return pd.DataFrame()
+
+    results = []
+    for name, profile in store.load_run(dataset, run_id).items():
+        if name not in baseline:
+            continue
+        result = column_drift(baseline[name], profile, distinct.get(name))
+        result["drifted"] = ", ".join(
+            metric for metric, limit in thresholds.items()
+            if result.get(metric) is not None and abs(result[metric]) > limit
+        )
+        results.append(result)
+    drift = pd.DataFrame(results)
+    drift.attrs["baseline_runs"] = n_runs
+    return drift
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile a CSV run into sketches and report drift vs. the rolling baseline.")
+    parser.add_argument("csv", help="CSV file of this run")
+    parser.add_argument("--dataset", help="Dataset name (default: the file name)")
+    parser.add_argument("--run-id", help="Run ID (default: current UTC timestamp)")
+    parser.add_argument("--store", default=SKETCH_STORE_PATH, help="Sketch store database")
+    parser.add_argument("--days", type=int, default=BASELINE_DAYS, help="Baseline window in days")
+    args = parser.parse_args(argv)
+
+    dataset = args.dataset or os.path.basename(args.csv)
+    run_id = args.run_id or f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}"
+    profiles, n_rows, _ = profile_csv_in_chunks(args.csv)
+    store = SketchStore(args.store)
+    store.save_run(dataset, run_id, profiles, n_rows)
+    drift = detect_drift(store, dataset, run_id, args.days)
+    if drift.empty:
+        print(f"📦 Stored run {run_id} of {dataset}; no earlier runs in the last {args.days} days to compare with.")
+        return
+    print(drift.round(4).to_string(index=False))
+    flagged = drift[drift["drifted"] != ""]
+    print(f"📉 {len(flagged)} of {len(drift)} columns drifted vs. {drift.attrs['baseline_runs']} baseline runs.")
+
+
+if __name__ == "__main__":
+    main()
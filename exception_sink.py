@@ -0,0 +1,214 @@
+# exception_sink.py
+
+import argparse
+import io
+import os
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from batch_writer import BatchWriter
+from dq_rule_engine import DEFAULT_CHUNKSIZE, RULES_PATH, RuleEngine, RuleSet, key_strings
+from gcp_clients import call_with_client
+
+# Local exception tables; outputs/ is kept out of git
+EXCEPTIONS_DIR = "data_quality_checks/ai_ml_checks/outputs/results/exceptions"
+
+EXCEPTION_COLUMNS = ["run_id", "rule_id", "row_key", "severity", "detected_at"]
+
+# A buffer is written once it holds this many exceptions or is this old
+FLUSH_ROWS = 250_000
+FLUSH_SECONDS = 30.0
+
+
+def new_run_id():
+    return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def row_keys(chunk, positions, key_columns):
+    """Row keys of the chunk rows at positions (chunk-relative).
+
+    With key_columns the key is their values joined by "|" (see
+    key_strings); without, it is the row's position in the file, which
+    the caller passes as chunk-relative positions plus the chunk offset.
+    """
+    if not key_columns:
+        return positions.astype(str)
+    rows = chunk.iloc[positions]
+    keys = key_strings(rows[key_columns[0]]).to_numpy(dtype=object)
+    for column in key_columns[1:]:
+        keys = keys + "|" + key_strings(rows[column]).to_numpy(dtype=object)
+    return keys.astype(str)
+
+
+class ExceptionSink(BatchWriter):
+    """Buffers failed (rule, row) pairs of one run and writes them in bulk.
+
+    Exceptions are held as one array of row keys per (rule, chunk), never
+    as per-row objects, and handed to _write() as columns once FLUSH_ROWS
+    accumulate or the oldest buffered entry is FLUSH_SECONDS old (see
+    BatchWriter). Memory is bounded by one flush plus one chunk.
+    """
+
+    def __init__(self, run_id=None, flush_rows=FLUSH_ROWS, flush_seconds=FLUSH_SECONDS):
+        super().__init__(flush_rows, flush_seconds)
+        self.run_id = run_id or new_run_id()
+
+    def add(self, rule_id, severity, keys, detected_at=None):
+        if not len(keys):
+            return
+        detected_at = detected_at or datetime.now(timezone.utc)
+        # Buffered as (rule_id, severity, detected_at, keys)
+        self._append((rule_id, severity, detected_at, np.asarray(keys, dtype=str)), len(keys))
+
+    def add_chunk(self, chunk, result, rule_set):
+        """Record every failure of one RuleEngine chunk result (usable as on_chunk via functools.partial)."""
+        detected_at = datetime.now(timezone.utc)
+        for rule in rule_set.rules:
+            if not result.counts.get(rule["id"]):
+                continue
+            positions = np.flatnonzero(result.failed(rule["id"]))
+            if rule_set.key_columns:
+                keys = row_keys(chunk, positions, rule_set.key_columns)
+            else:
+                keys = row_keys(chunk, positions + result.offset, None)
+            self.add(rule["id"], rule["severity"], keys, detected_at)
+
+    def columns(self):
+        """The buffered exceptions as {column: array}."""
+        sizes = [len(keys) for *_, keys in self._buffer]
+        return {
+            "run_id": np.full(self._pending, self.run_id, dtype=object),
+            "rule_id": np.repeat([rule_id for rule_id, *_ in self._buffer], sizes).astype(object),
+            "row_key": np.concatenate([keys for *_, keys in self._buffer]).astype(object),
+            "severity": np.repeat([severity for _, severity, *_ in self._buffer], sizes).astype(object),
+            "detected_at": np.repeat(
+                np.array([ts.replace(tzinfo=None) for _, _, ts, _ in self._buffer], dtype="datetime64[us]"), sizes
+            ),
+        }
+
+    def _batch(self):
+        return self.columns()
+
+
+def _arrow_table(columns):
+    """Arrow table of the given exception columns; repeated strings are dictionary encoded."""
+    import pyarrow as pa
+
+    arrays = {}
+    for name in EXCEPTION_COLUMNS:
+        if name not in columns:
+            continue
+        if name == "detected_at":
+            arrays[name] = pa.array(columns[name], pa.timestamp("us", tz="UTC"))
+        elif name == "row_key":
+            arrays[name] = pa.array(columns[name], pa.string())
+        else:
+            arrays[name] = pa.array(columns[name], pa.string()).dictionary_encode()
+    return pa.table(arrays)
+
+
+class ParquetExceptionSink(ExceptionSink):
+    """Writes one Parquet file per rule and flush under
+    <base_dir>/run_date=YYYY-MM-DD/rule_id=<id>/<run_id>-<n>.parquet (Hive layout).
+    """
+
+    def __init__(self, base_dir=EXCEPTIONS_DIR, run_id=None, compression="zstd", **kwargs):
+        super().__init__(run_id, **kwargs)
+        self.base_dir = base_dir
+        self.compression = compression
+        self.files = []
+
+    def _write(self, columns):
+        import pyarrow.parquet as pq
+
+        run_date = f"{datetime.now(timezone.utc):%Y-%m-%d}"
+        # Group by rule with one stable sort instead of a boolean mask per rule
+        order = np.argsort(columns["rule_id"], kind="stable")
+        sorted_rules = columns["rule_id"][order]
+        rule_ids, starts = np.unique(sorted_rules, return_index=True)
+        bounds = list(starts[1:]) + [len(order)]
+        for rule_id, start, end in zip(rule_ids, starts, bounds):
+            rows = order[start:end]
+            part = {name: values[rows] for name, values in columns.items() if name != "rule_id"}
+            directory = os.path.join(self.base_dir, f"run_date={run_date}", f"rule_id={_safe(rule_id)}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{self.run_id}-{self.flushes:05d}.parquet")
+            # rule_id lives in the directory name, as partitioned readers expect
+            pq.write_table(_arrow_table(part), path, compression=self.compression)
+            self.files.append(path)
+
+
+def _safe(value):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in str(value))
+
+
+class BigQueryExceptionSink(ExceptionSink):
+    """Appends each flush to a BigQuery table with one Parquet load job.
+
+    Load jobs are free and batch any number of rows, unlike streaming
+    inserts; the table is created on first load, partitioned by day of
+    detected_at and clustered by rule_id.
+    """
+
+    def __init__(self, table_id, project_id=None, run_id=None, **kwargs):
+        super().__init__(run_id, **kwargs)
+        self.table_id = table_id
+        self.project_id = project_id or table_id.split(".")[0]
+        self.jobs = []
+
+    def _write(self, columns):
+        import pyarrow.parquet as pq
+        from google.cloud import bigquery
+
+        payload = io.BytesIO()
+        pq.write_table(_arrow_table(columns), payload, compression="zstd")
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.PARQUET,
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+            time_partitioning=bigquery.TimePartitioning(field="detected_at"),
+            clustering_fields=["rule_id"],
+        )
+
+        def load(client):
+            payload.seek(0)
+            return client.load_table_from_file(payload, self.table_id, job_config=job_config).result()
+
+        job = call_with_client("bigquery", self.project_id, load)
+        self.jobs.append(job.job_id)
+
+
+def run_csv_to_sink(source, rule_set, sink, chunksize=DEFAULT_CHUNKSIZE, **read_csv_kwargs):
+    """Run rule_set over a CSV in chunks, streaming every failure into sink; returns the summary."""
+    engine = RuleEngine(rule_set)
+    with sink:
+        return engine.run(
+            pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs),
+            lambda chunk, result: sink.add_chunk(chunk, result, rule_set),
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run DQ rules over a CSV and write every failure to an exception table.")
+    parser.add_argument("csv", help="CSV file to check")
+    parser.add_argument("--rules", default=RULES_PATH, help="Rules YAML")
+    parser.add_argument("--output", default=EXCEPTIONS_DIR, help="Local directory for partitioned Parquet files")
+    parser.add_argument("--bq-table", help="Load into this BigQuery table instead (project.dataset.table)")
+    parser.add_argument("--run-id", help="Run ID (default: timestamp + random suffix)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    rule_set = RuleSet.from_yaml(args.rules)
+    if args.bq_table:
+        sink = BigQueryExceptionSink(args.bq_table, run_id=args.run_id)
+    else:
+        sink = ParquetExceptionSink(args.output, run_id=args.run_id)
+    summary = run_csv_to_sink(args.csv, rule_set, sink, args.chunksize)
+    print(summary.to_string(index=False))
+    print(f"🗂️ Run {sink.run_id}: wrote {sink.written:,} exceptions in {sink.flushes} flushes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# gcp_clients.py
+
+import threading
+from contextlib import contextmanager
+
+
+def _bigquery_client(project_id):
+    from google.cloud import bigquery
+    return bigquery.Client(project=project_id)
+
+
+def _logging_client(project_id):
+    from google.cloud import logging_v2
+    return logging_v2.Client(project=project_id)
+
+
+def _storage_client(project_id):
+    from google.cloud import storage
+    return storage.Client(project=project_id)
+
+
+def _datacatalog_client(project_id):
+    from google.cloud import datacatalog_v1
+    return datacatalog_v1.DataCatalogClient()
+
+
+# Service name -> factory(project_id). Data Catalog clients are not bound to a
+# project, so they are registered once under project None.
+_FACTORIES = {
+    "bigquery": _bigquery_client,
+    "logging": _logging_client,
+    "storage": _storage_client,
+    "datacatalog": _datacatalog_client,
+}
+_PROJECTLESS = {"datacatalog"}
+
+_clients = {}
+_fakes = {}
+_lock = threading.Lock()
+
+
+def _key(service, project_id):
+    if service not in _FACTORIES:
+        raise ValueError(f"Unknown GCP service: {service}")
+    return service, None if service in _PROJECTLESS else project_id
+
+
+def _auth_errors():
+    """Exception types that mean the cached client's credentials went stale."""
+    try:
+        from google.api_core import exceptions as api_exceptions
+        from google.auth import exceptions as auth_exceptions
+    except ImportError:
+        return ()
+    return (auth_exceptions.RefreshError, api_exceptions.Unauthenticated)
+
+
+def get_client(service, project_id=None):
+    """Return the shared client for (service, project), creating it once.
+
+    Google Cloud clients are thread-safe, so one instance (and its gRPC/HTTP
+    transport) is shared by every worker thread.
+    """
+    key = _key(service, project_id)
+    fake = _fakes.get(key, _fakes.get((service, "*")))
+    if fake is not None:
+        return fake
+
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _FACTORIES[service](project_id)
+                _clients[key] = client
+    return client
+
+
+def invalidate_client(service, project_id=None):
+    """Drop the cached client so the next get_client() builds a fresh one."""
+    with _lock:
+        _clients.pop(_key(service, project_id), None)
+
+
+def call_with_client(service, project_id, func):
+    """Call func(client), rebuilding the client once after an auth failure.
+
+    Only errors raised inside func are retried, so func must fully
+    materialize its result (e.g. list() a pager or iterator): a lazy result
+    would fetch its pages, and hit any auth error, after the retry is over.
+    Use iter_pages_with_client to stream a long listing instead.
+    """
+    try:
+        return func(get_client(service, project_id))
+    except _auth_errors() as e:
+        print(f"🔑 Auth failure on {service} client ({e}); rebuilding client and retrying.")
+        invalidate_client(service, project_id)
+        return func(get_client(service, project_id))
+
+
+def iter_pages_with_client(service, project_id, list_func):
+    """Yield the items of list_func(client, page_token) as each page arrives.
+
+    list_func returns a google.api_core page iterator starting at
+    page_token. Each page fetch is retried once after an auth failure, on a
+    rebuilt client, resuming from the page that failed; memory stays at one
+    page however long the listing is.
+    """
+    token, retried = None, False
+    iterator = list_func(get_client(service, project_id), token)
+    pages = iterator.pages
+    while True:
+        try:
+            page = next(pages, None)
+        except _auth_errors() as e:
+            if retried:
+                raise
+            print(f"🔑 Auth failure on {service} client ({e}); rebuilding client and resuming.")
+            invalidate_client(service, project_id)
+            iterator = list_func(get_client(service, project_id), token)
+            pages, retried = iterator.pages, True
+            continue
+        if page is None:
+            return
+        token, retried = iterator.next_page_token, False
+        yield from page
+
+
+def register_fake_client(service, client, project_id="*"):
+    """Serve client for service (and project, or every project with "*")."""
+    key = (service, "*") if project_id == "*" else _key(service, project_id)
+    _fakes[key] = client
+
+
+def clear_clients():
+    """Forget every cached and fake client."""
+    with _lock:
+        _clients.clear()
+        _fakes.clear()
+
+
+@contextmanager
+def fake_clients(clients):
+    """Temporarily serve {service: fake_client} for every project.
+
+    Lets the whole pipeline run (and be benchmarked) offline:
+
+        with fake_clients({"bigquery": FakeBQ(), "logging": FakeLogging()}):
+            orchestrate_metadata_collection(FILE_PATTERN)
+    """
+    previous = dict(_fakes)
+    for service, client in clients.items():
+        register_fake_client(service, client)
+    try:
+        yield
+    finally:
+        _fakes.clear()
+        _fakes.update(previous)
@@ -1,30 +1,58 @@
 # gcs_logging_fetcher.py
 
-from google.cloud import logging_v2
+from fnmatch import fnmatchcase
 
-def fetch_gcs_uploads(file_pattern, project_id):
-    """Fetch GCS file creation logs matching file pattern."""
-    logging_client = logging_v2.Client(project=project_id)
+from gcp_clients import iter_pages_with_client
+from log_checkpoint import load_checkpoint, save_checkpoint, split_gcs_pattern, timestamp_filter
+
+def fetch_gcs_uploads(file_pattern, project_id, since=None, use_checkpoint=True, checkpoints=None):
+    """Stream GCS file creation logs matching file pattern.
+
+    Bucket, object-name prefix and a timestamp lower bound are pushed into the
+    Logging filter, so only candidate entries cross the network. The lower
+    bound is `since` if given, otherwise the last timestamp seen by a previous
+    run (or the default lookback on the first run). The checkpoint only
+    advances once the generator has been fully consumed; pass a dict as
+    `checkpoints` to receive {key: timestamp} instead and save it (with
+    save_checkpoint) once the entries have been processed.
+    """
+    bucket, object_glob, object_prefix = split_gcs_pattern(file_pattern)
+    checkpoint_key = f"gcs_uploads:{project_id}:{file_pattern}"
+
+    from_checkpoint = False
+    if since is None:
+        since, from_checkpoint = load_checkpoint(checkpoint_key)
 
     filter_str = (
         'resource.type="gcs_bucket" '
-        'protoPayload.methodName="storage.objects.create"'
+        f'resource.labels.bucket_name="{bucket}" '
+        'protoPayload.methodName="storage.objects.create" '
+        f'protoPayload.resourceName:"projects/_/buckets/{bucket}/objects/{object_prefix}" '
+        + timestamp_filter(since, inclusive=not from_checkpoint)
     )
 
-    entries = logging_client.list_entries(filter_=filter_str)
-    
-    matching_files = []
+    entries = iter_pages_with_client(
+        "logging", project_id,
+        lambda client, page_token: client.list_entries(
+            filter_=filter_str, order_by="timestamp asc", page_token=page_token
+        ),
+    )
 
+    last_seen = None
     for entry in entries:
-        payload_str = str(entry)
-        if file_pattern in payload_str:
-            bucket_name = entry.resource.labels.get("bucket_name")
-            object_name = entry.proto_payload.resource_name.split("/")[-1]
-            timestamp = entry.timestamp
-            matching_files.append({
-                "bucket": bucket_name,
-                "object": object_name,
-                "created_at": timestamp
-            })
-
-    return matching_files
+        last_seen = entry.timestamp
+        object_name = entry.proto_payload.resource_name.split("/objects/", 1)[-1]
+        # The server filter matched the literal prefix; finish the glob locally
+        if not fnmatchcase(object_name, object_glob):
+            continue
+        yield {
+            "bucket": entry.resource.labels.get("bucket_name"),
+            "object": object_name.split("/")[-1],
+            "created_at": entry.timestamp
+        }
+
+    if use_checkpoint and last_seen is not None:
+        if checkpoints is not None:
+            checkpoints[checkpoint_key] = last_seen
+        else:
+            save_checkpoint(checkpoint_key, last_seen)
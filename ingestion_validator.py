@@ -0,0 +1,379 @@
+# ingestion_validator.py
+
+import argparse
+import base64
+import csv
+import getpass
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
+from fnmatch import fnmatchcase
+
+import yaml
+
+from batch_writer import BatchWriter
+from gcp_clients import call_with_client
+from log_checkpoint import split_gcs_pattern
+
+# Local stand-in for the BigQuery Audit Table
+AUDIT_PATH = os.environ.get("INGESTION_AUDIT", "ingestion_audit.sqlite")
+
+# Bytes read per block; every check is fed from the same block
+BLOCK_SIZE = 8 * 1024 * 1024
+
+# Files validated concurrently (reads are I/O bound)
+MAX_WORKERS = 8
+
+# Audit rows buffered before one batched write
+AUDIT_BATCH_ROWS = 500
+
+AUDIT_COLUMNS = [
+    "run_id", "file_name", "source", "size_bytes", "row_count", "checksum_md5", "header",
+    "status", "errors", "started_at", "loaded_at", "duration_seconds", "user",
+]
+
+
+class FileSpec:
+    """Expectations for one vendor feed (Flow step 4).
+
+    YAML layout (every key optional):
+
+        name_pattern: sales-data-*.csv     # glob on the file name
+        min_bytes: 1
+        max_bytes: 10737418240
+        header: [order_id, customer_id, amount, order_date]
+        header_order: true                  # false: same columns, any order
+        date_pattern: '(\\d{8})'            # first group is the file date
+        date_format: '%Y%m%d'
+        max_age_days: 7                     # file date window ending today
+        delimiter: ','
+        encoding: utf-8
+    """
+
+    def __init__(self, name_pattern=None, min_bytes=1, max_bytes=None, header=None, header_order=True,
+                 date_pattern=None, date_format="%Y%m%d", max_age_days=None, delimiter=",", encoding="utf-8"):
+        self.name_pattern = name_pattern
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.header = list(header) if header else None
+        self.header_order = header_order
+        self.date_pattern = re.compile(date_pattern) if date_pattern else None
+        self.date_format = date_format
+        self.max_age_days = max_age_days
+        self.delimiter = delimiter
+        self.encoding = encoding
+
+    @classmethod
+    def from_yaml(cls, path):
+        with open(path) as f:
+            return cls(**(yaml.safe_load(f) or {}))
+
+    def check_name(self, name, today=None):
+        errors = []
+        if self.name_pattern and not fnmatchcase(name, self.name_pattern):
+            errors.append(f"name does not match {self.name_pattern}")
+        if self.date_pattern:
+            match = self.date_pattern.search(name)
+            try:
+                file_date = datetime.strptime(match.group(1), self.date_format).date() if match else None
+            except ValueError:
+                file_date = None
+            today = today or date.today()
+            if file_date is None:
+                errors.append("no valid date in file name")
+            elif file_date > today:
+                errors.append(f"file date {file_date} is in the future")
+            elif self.max_age_days is not None and file_date < today - timedelta(days=self.max_age_days):
+                errors.append(f"file date {file_date} is older than {self.max_age_days} days")
+        return errors
+
+    def check_size(self, size):
+        if size is None:
+            return []
+        if size < self.min_bytes:
+            return [f"size {size} B is below {self.min_bytes} B"]
+        if self.max_bytes is not None and size > self.max_bytes:
+            return [f"size {size} B exceeds {self.max_bytes} B"]
+        return []
+
+    def check_header(self, columns):
+        if self.header is None:
+            return []
+        if columns == self.header or (not self.header_order and sorted(columns) == sorted(self.header)):
+            return []
+        missing = [c for c in self.header if c not in columns]
+        extra = [c for c in columns if c not in self.header]
+        if missing or extra:
+            return [f"header mismatch (missing {missing}, unexpected {extra})"]
+        return ["header columns out of order"]
+
+
+# --- sources: local paths or gs:// URIs -----------------------------------
+class SourceFile:
+    """A landed file: name, size, optional stored MD5 and a binary stream opener."""
+
+    def __init__(self, uri, name, size, open_stream, md5=None):
+        self.uri = uri
+        self.name = name
+        self.size = size
+        self.open_stream = open_stream
+        self.md5 = md5
+
+
+def _local_file(path):
+    return SourceFile(path, os.path.basename(path), os.path.getsize(path), lambda: open(path, "rb"))
+
+
+def _gcs_file(blob):
+    # GCS keeps the MD5 of non-composite objects, so the streamed hash doubles as an integrity check
+    md5 = base64.b64decode(blob.md5_hash).hex() if blob.md5_hash else None
+    uri = f"gs://{blob.bucket.name}/{blob.name}"
+    return SourceFile(uri, blob.name.rsplit("/", 1)[-1], blob.size, lambda: blob.open("rb", chunk_size=BLOCK_SIZE), md5)
+
+
+def list_sources(pattern, project_id=None):
+    """SourceFiles matching a local glob or a gs://bucket/prefix-*.csv pattern."""
+    if not pattern.startswith("gs://"):
+        return [_local_file(path) for path in sorted(glob.glob(pattern)) if os.path.isfile(path)]
+    bucket, object_glob, prefix = split_gcs_pattern(pattern)
+    blobs = call_with_client("storage", project_id, lambda client: list(client.list_blobs(bucket, prefix=prefix)))
+    return [_gcs_file(blob) for blob in blobs if fnmatchcase(blob.name, object_glob)]
+
+
+# --- single-pass scan -----------------------------------------------------
+class _RecordCounter:
+    """Counts CSV records (not physical lines) from raw blocks.
+
+    Newlines inside quoted fields do not end a record. As in the csv
+    module, a '"' only opens a quoted field at the start of a field; one
+    inside an unquoted field (5" tv) is literal, and "" inside quotes is
+    an escape. Blocks whose quotes all sit at field boundaries are counted
+    by quote parity with C string methods; only blocks with a literal
+    quote are stepped through quote by quote. Blank lines at the end of
+    the file are not records.
+    """
+
+    def __init__(self, delimiter=b","):
+        self.records = 0
+        self.in_quotes = False
+        self.last_byte = b""
+        self.blank_tail = 0
+        self.has_data = False
+        # Bytes after which a quote opens a field; b"" is the start of the file
+        self._field_starts = {b"", b"\n", b"\r", delimiter}
+        # A quote that would open a field by parity but follows a data byte
+        self._literal_quote = re.compile(rb'[^\n\r"' + re.escape(delimiter) + rb']"')
+        self._after_close = False
+
+    def feed(self, block):
+        if not block:
+            return
+        parts = block.split(b'"')
+        start = 1 if self.in_quotes else 0
+        if self.in_quotes or self._after_close:
+            context = b'"'
+        else:
+            # A literal quote just before the block can't precede an opening one
+            context = b"x" if self.last_byte == b'"' else self.last_byte or b"\n"
+        # Parts followed by a quote that opens a field when counting by parity
+        heads = parts[start:-1:2]
+        if not heads or not self._literal_quote.search(context + b'"'.join(heads) + b'"'):
+            self.records += b"".join(parts[start::2]).count(b"\n")
+            self.in_quotes ^= len(parts) % 2 == 0
+            self.last_byte = parts[-1][-1:] or b'"'
+            self._after_close = not parts[-1] and not self.in_quotes
+        else:
+            self._feed_quotes(parts)
+
+        # Newlines ending the data so far, beyond the one closing the last record
+        body = block.rstrip(b"\r\n")
+        newlines = 0 if self.in_quotes else block[len(body):].count(b"\n")
+        self.blank_tail = self.blank_tail + newlines if not body else newlines
+        self.has_data = self.has_data or bool(body)
+
+    def _feed_quotes(self, parts):
+        if not self.in_quotes:
+            self.records += parts[0].count(b"\n")
+        last, after_close = parts[0][-1:] or self.last_byte, self._after_close and not parts[0]
+        for part in parts[1:]:
+            # Classify the quote that precedes part
+            if self.in_quotes:
+                self.in_quotes, after_close = False, True
+            elif after_close or last in self._field_starts:
+                self.in_quotes, after_close = True, False
+            else:
+                after_close = False
+            if not self.in_quotes:
+                self.records += part.count(b"\n")
+            if part:
+                last, after_close = part[-1:], False
+            else:
+                last = b'"'
+        self.last_byte, self._after_close = last, after_close
+
+    def total(self):
+        if not self.has_data:
+            return 0
+        # A last record without a trailing newline still counts
+        return (self.records - max(self.blank_tail - 1, 0)
+                + (1 if self.last_byte not in (b"", b"\n") else 0))
+
+
+def scan_stream(stream, block_size=BLOCK_SIZE, delimiter=b","):
+    """(bytes, md5 hex, CSV records, first line) from one sequential read of stream."""
+    md5 = hashlib.md5()
+    counter = _RecordCounter(delimiter)
+    first_line, size = b"", 0
+    for block in iter(lambda: stream.read(block_size), b""):
+        md5.update(block)
+        counter.feed(block)
+        if size == 0 or (b"\n" not in first_line and len(first_line) < 1024 * 1024):
+            first_line += block[:1024 * 1024]
+        size += len(block)
+    return size, md5.hexdigest(), counter.total(), first_line.split(b"\n", 1)[0]
+
+
+def parse_header(first_line, spec):
+    text = first_line.decode(spec.encoding, errors="replace").lstrip("\ufeff").rstrip("\r")
+    return [column.strip() for column in next(csv.reader(io.StringIO(text), delimiter=spec.delimiter), [])]
+
+
+def validate_file(source, spec, run_id, today=None):
+    """Audit record for one file; name, size, date window, header, row count and checksum from one read."""
+    started = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    errors = spec.check_name(source.name, today) + spec.check_size(source.size)
+    record = {"run_id": run_id, "file_name": source.name, "source": source.uri, "size_bytes": source.size,
+              "row_count": None, "checksum_md5": None, "header": None}
+    if not errors:
+        try:
+            with source.open_stream() as stream:
+                size, checksum, records, first_line = scan_stream(
+                    stream, delimiter=spec.delimiter.encode(spec.encoding))
+            columns = parse_header(first_line, spec)
+            record.update(size_bytes=size, checksum_md5=checksum, header=json.dumps(columns),
+                          row_count=max(records - 1, 0))
+            errors += spec.check_header(columns)
+            if source.md5 and source.md5 != checksum:
+                errors.append(f"checksum {checksum} differs from stored MD5 {source.md5}")
+            if records <= 1:
+                errors.append("no data rows")
+        except (OSError, UnicodeError) as e:
+            errors.append(f"read failed: {e}")
+        except Exception as e:
+            # Storage API errors fail this file only, never the whole run
+            errors.append(f"read failed: {type(e).__name__}: {e}")
+    record.update(
+        status="failed" if errors else "passed",
+        errors="; ".join(errors) or None,
+        started_at=started.isoformat(),
+        loaded_at=datetime.now(timezone.utc).isoformat(),
+        duration_seconds=round(time.perf_counter() - start, 3),
+        user=getpass.getuser(),
+    )
+    return record
+
+
+# --- audit writers ----------------------------------------------------------
+class AuditWriter(BatchWriter):
+    """Buffers audit records and writes them AUDIT_BATCH_ROWS at a time; close() writes the rest."""
+
+    def __init__(self, batch_rows=AUDIT_BATCH_ROWS):
+        super().__init__(batch_rows)
+
+    def add(self, record):
+        self._append(record)
+
+
+class SQLiteAuditWriter(AuditWriter):
+    """Local Audit Table: one executemany per batch."""
+
+    def __init__(self, path=AUDIT_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS ingestion_audit ({', '.join(AUDIT_COLUMNS)})")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ingestion_audit_file ON ingestion_audit (file_name)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _write(self, records):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO ingestion_audit VALUES ({', '.join('?' * len(AUDIT_COLUMNS))})",
+                    [tuple(record[c] for c in AUDIT_COLUMNS) for record in records],
+                )
+        finally:
+            conn.close()
+
+
+class BigQueryAuditWriter(AuditWriter):
+    """BigQuery Audit Table: one load job per batch instead of per-row streaming inserts."""
+
+    def __init__(self, table_id, project_id=None, **kwargs):
+        super().__init__(**kwargs)
+        self.table_id = table_id
+        self.project_id = project_id or table_id.split(".")[0]
+
+    def _write(self, records):
+        from google.cloud import bigquery
+
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+            autodetect=True,
+        )
+        call_with_client("bigquery", self.project_id, lambda client: client.load_table_from_json(
+            records, self.table_id, job_config=job_config
+        ).result())
+
+
+def validate_files(sources, spec, writer, run_id=None, max_workers=MAX_WORKERS, today=None):
+    """Validate sources in parallel, streaming audit records into writer; returns the records."""
+    run_id = run_id or f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    records = []
+    with writer, ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(validate_file, source, spec, run_id, today) for source in sources]
+        for future in as_completed(futures):
+            record = future.result()
+            writer.add(record)
+            records.append(record)
+            icon = "✅" if record["status"] == "passed" else "❌"
+            print(f"{icon} {record['file_name']}: {record['row_count']} rows {record['errors'] or ''}")
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate landed files in one streaming pass and write audit rows.")
+    parser.add_argument("pattern", help="Local glob or gs://bucket/prefix-*.csv")
+    parser.add_argument("--spec", help="FileSpec YAML")
+    parser.add_argument("--project", help="GCP project for gs:// patterns and BigQuery")
+    parser.add_argument("--audit", default=AUDIT_PATH, help="Local audit database")
+    parser.add_argument("--bq-table", help="Write audit rows to this BigQuery table instead")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args(argv)
+
+    spec = FileSpec.from_yaml(args.spec) if args.spec else FileSpec()
+    sources = list_sources(args.pattern, args.project)
+    writer = BigQueryAuditWriter(args.bq_table, args.project) if args.bq_table else SQLiteAuditWriter(args.audit)
+    records = validate_files(sources, spec, writer, max_workers=args.workers)
+    failed = sum(record["status"] == "failed" for record in records)
+    print(f"📋 {len(records)} files validated, {failed} failed; {writer.written} audit rows written.")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,138 +1,132 @@
 import streamlit as st
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
 from graphviz import Digraph
 import streamlit.components.v1 as components
-from sqlglot import parse_one, exp
-
-# --- Updated sqlglot lineage extractor (no main) ---
-def extract_lineage_with_sqlglot_no_main(sql: str, schema: Dict[str, List[str]]) -> Tuple[
-    Dict[str, List[str]], Dict[str, List[Tuple[str, str]]], Dict[str, str]]:
-
-    parsed = parse_one(sql)
-    cte_columns = {}
-    cte_edges = {}
-    alias_map = {}
-
-    def resolve_columns(select_exp, alias_lookup):
-        columns = []
-        for col_exp in select_exp.expressions:
-            if isinstance(col_exp, exp.Star):
-                for alias, table in alias_lookup.items():
-                    for col in schema.get(table, []):
-                        columns.append(f"{alias}.{col}")
-            elif isinstance(col_exp, exp.Alias):
-                inner = col_exp.this
-                if isinstance(inner, exp.Column):
-                    columns.append(f"{inner.table}.{inner.name}")
-            elif isinstance(col_exp, exp.Column):
-                if col_exp.table:
-                    columns.append(f"{col_exp.table}.{col_exp.name}")
-                else:
-                    columns.append(col_exp.name)
-        return columns
-
-    def extract_from_select(select_exp, cte_name=None, parent_sources=None):
-        alias_lookup = {}
-        sources = []
-
-        for from_exp in select_exp.find_all(exp.From):
-            for table_ref in from_exp.find_all(exp.Table):
-                alias = table_ref.alias_or_name
-                alias_lookup[alias] = table_ref.name
-                sources.append((table_ref.name, alias))
-
-        for join_exp in select_exp.find_all(exp.Join):
-            table_ref = join_exp.this
-            if isinstance(table_ref, exp.Subquery):
-                sub_select = table_ref.unnest()
-                sub_alias = table_ref.alias_or_name
-                sub_name = f"subquery_{sub_alias}"
-                alias_map[sub_alias] = "subquery"
-                sub_cols = resolve_columns(sub_select, alias_lookup)
-                cte_columns[sub_alias] = sub_cols
-                parent_link = [(src, sub_alias) for src, _ in (parent_sources or [])]
-                cte_edges[sub_alias] = parent_link
-                alias_lookup[sub_alias] = sub_name
-                sources.append((sub_name, sub_alias))
-            elif isinstance(table_ref, exp.Table):
-                alias = table_ref.alias_or_name
-                alias_lookup[alias] = table_ref.name
-                sources.append((table_ref.name, alias))
-
-        columns = resolve_columns(select_exp, alias_lookup)
-        if cte_name:
-            cte_columns[cte_name] = columns
-            cte_edges[cte_name] = sources
-
-    for cte in parsed.find_all(exp.CTE):
-        extract_from_select(cte.this, cte.alias)
-
-    final_select = parsed.find(exp.Select)
-    if final_select:
-        sources = list(final_select.find_all(exp.Table))
-        if len(sources) > 1 or final_select.expressions[0].sql() != "*":
-            extract_from_select(final_select, cte_name="main")
-
-    return cte_columns, cte_edges, alias_map
+
+from lineage_cache import LineageCache, cache_key
+from lineage_graph import LineageGraph
+from lineage_render import DOT_MAX_NODES, PrunedGraph, RenderCache, layered_svg, prune_lineage
+from schema_provider import BigQuerySchemaProvider, DictSchemaProvider, SchemaProvider
+from sqlglot_lineage import extract_lineage_with_sqlglot_no_main
+
+# Parsed lineage kept across reruns; set LINEAGE_CACHE_PATH to a file for a disk tier
+LINEAGE_CACHE_ENTRIES = 64
+LINEAGE_CACHE_PATH = None
+
+# Rendered SVGs kept per (query, selection, pruning settings)
+RENDER_CACHE_ENTRIES = 64
+
+# Set SCHEMA_PROJECT to resolve SELECT * from BigQuery (one INFORMATION_SCHEMA
+# query per dataset, snapshotted locally); otherwise the mock schema is used
+SCHEMA_PROJECT = None
+SCHEMA_DEFAULT_DATASET = None  # "project.dataset" for bare table names
+
+# Mock schema to resolve SELECT *
+mock_schema = {
+    "sales_data": ["id", "amount", "region"],
+    "users": ["user_id", "name", "signup_date"]
+}
+
+
+@st.cache_resource
+def get_lineage_cache() -> LineageCache:
+    return LineageCache(max_entries=LINEAGE_CACHE_ENTRIES, disk_path=LINEAGE_CACHE_PATH)
+
+
+@st.cache_resource
+def get_render_cache() -> RenderCache:
+    return RenderCache(max_entries=RENDER_CACHE_ENTRIES)
+
+
+@st.cache_resource
+def get_schema_provider() -> SchemaProvider:
+    if SCHEMA_PROJECT:
+        return BigQuerySchemaProvider(SCHEMA_PROJECT, SCHEMA_DEFAULT_DATASET)
+    return DictSchemaProvider(mock_schema)
+
+
+def extract_lineage_cached(sql: str, schema: Mapping[str, List[str]]):
+    """Parse + lineage for sql, reusing results for the same normalized SQL and schema."""
+    def extract():
+        cte_columns, cte_edges, alias_map = extract_lineage_with_sqlglot_no_main(sql, schema)
+        all_fields = sorted(set(f for cols in cte_columns.values() for f in cols))
+        lineage_graph = LineageGraph.from_extraction(cte_columns, cte_edges)
+        return cte_columns, cte_edges, alias_map, all_fields, lineage_graph
+    return get_lineage_cache().get_or_compute(sql, schema, extract)
+
 
 # --- SVG renderer ---
-def build_svg_graphviz_sqlglot(
+def prune_for_selection(
     cte_columns: Dict[str, List[str]],
     cte_edges: Dict[str, List[Tuple[str, str]]],
-    alias_map: Dict[str, str],
-    schema: Dict[str, List[str]],
-    selected_field: str
-) -> str:
-    graph = Digraph(format='svg')
-    graph.attr(rankdir='LR', fontname="Arial", nodesep='0.8')
+    schema: Mapping[str, List[str]],
+    selected_field: str,
+    lineage_graph: Optional[LineageGraph] = None,
+    max_depth: int = 3,
+    max_fanout: int = 8,
+    expanded: Iterable[str] = ()
+) -> PrunedGraph:
+    """Nodes relevant to selected_field, pruned around the selection."""
+    if lineage_graph is None:
+        lineage_graph = LineageGraph.from_extraction(cte_columns, cte_edges)
 
     relevant_nodes = set()
+    start_nodes: List[str] = []
 
     if selected_field == "All Fields":
+        # Every node the query touches; a catalog-backed schema may know thousands of unrelated tables
         relevant_nodes.update(cte_columns.keys())
-        relevant_nodes.update(schema.keys())
+        relevant_nodes.update(lineage_graph.node_names)
     else:
-        def find_field_node(field):
-            for node, cols in cte_columns.items():
-                if any(field in col for col in cols):
-                    return node
-            return None
-
-        def dfs(node):
-            if node in relevant_nodes:
-                return
-            relevant_nodes.add(node)
-            for source, _ in cte_edges.get(node, []):
-                dfs(source)
-
-        start_node = find_field_node(selected_field)
-        if start_node:
-            dfs(start_node)
-
-    for node in relevant_nodes:
+        # Exact field -> node index, then an iterative, memoized upstream closure
+        start_nodes = lineage_graph.nodes_with_field(selected_field)
+        relevant_nodes.update(lineage_graph.upstream_nodes(start_nodes))
+
+    return prune_lineage(lineage_graph, relevant_nodes, start_nodes, max_depth, max_fanout, expanded)
+
+
+def build_svg_graphviz_sqlglot(
+    cte_columns: Dict[str, List[str]],
+    alias_map: Dict[str, str],
+    schema: Mapping[str, List[str]],
+    selected_field: str,
+    pruned: PrunedGraph
+) -> str:
+    labels = {}
+    for node in pruned.nodes:
         cols = cte_columns.get(node, schema.get(node, []))
 
         if selected_field != "All Fields":
             cols = [c for c in cols if selected_field in c or selected_field.split('.')[-1] in c]
 
-        label = f"<<B>{node}</B>"
-        if cols:
-            label += "<BR ALIGN='LEFT'/>" + "<BR ALIGN='LEFT'/>".join(cols)
-        label += ">"
         fillcolor = (
             'lightblue' if node in alias_map
             else 'lightgray' if node in schema
             else 'white'
         )
-        graph.node(node, shape='rect', style='filled', fillcolor=fillcolor, label=label)
+        labels[node] = (node, cols, fillcolor)
+    for summary, (_, hidden) in pruned.summaries.items():
+        labels[summary] = (f"+{len(hidden)} more", hidden, 'lightyellow')
 
-    for target, sources in cte_edges.items():
-        if target not in relevant_nodes:
+    # dot layout time grows quickly with size; big graphs use the Python layout
+    if len(labels) > DOT_MAX_NODES:
+        return layered_svg(labels, pruned.edges)
+
+    graph = Digraph(format='svg')
+    graph.attr(rankdir='LR', fontname="Arial", nodesep='0.8')
+
+    for node, (title, cols, fillcolor) in labels.items():
+        if node in pruned.summaries:
+            graph.node(node, shape='rect', style='filled,dashed', fillcolor=fillcolor, label=title)
             continue
-        for source, alias in sources:
-            if source in relevant_nodes:
-                label = f"AS {alias}" if alias and alias != source else ""
-                graph.edge(source, target, xlabel=label)
+        label = f"<<B>{title}</B>"
+        if cols:
+            label += "<BR ALIGN='LEFT'/>" + "<BR ALIGN='LEFT'/>".join(cols)
+        label += ">"
+        graph.node(node, shape='rect', style='filled', fillcolor=fillcolor, label=label)
+
+    for source, target, label in pruned.edges:
+        graph.edge(source, target, xlabel=label)
 
     return graph.pipe().decode('utf-8')
 
@@ -141,20 +135,29 @@ st.set_page_config(layout="wide")
 st.title("🧠 SQL Lineage Visualizer (sqlglot, Clean Final Graph)")
 
 sql_query = st.text_area("📥 Paste your SQL query:", height=300)
-
-# Mock schema to resolve SELECT *
-mock_schema = {
-    "sales_data": ["id", "amount", "region"],
-    "users": ["user_id", "name", "signup_date"]
-}
+schema = get_schema_provider()
 
 if sql_query.strip():
     try:
-        cte_columns, cte_edges, alias_map = extract_lineage_with_sqlglot_no_main(sql_query, mock_schema)
-        all_fields = sorted(set(f for cols in cte_columns.values() for f in cols))
+        # Only filtering and rendering rerun when the selected field changes
+        cte_columns, cte_edges, alias_map, all_fields, lineage_graph = extract_lineage_cached(sql_query, schema)
         selected_field = st.selectbox("🎯 Select field to trace lineage:", ["All Fields"] + all_fields)
-        svg = build_svg_graphviz_sqlglot(
-            cte_columns, cte_edges, alias_map, mock_schema, selected_field
+        col1, col2 = st.columns(2)
+        max_depth = col1.slider("🔭 Max depth (hops from the selection)", 1, 10, 3)
+        max_fanout = col2.slider("🌿 Max neighbours per node", 1, 50, 8)
+        expanded = st.session_state.get("expanded_nodes", [])
+
+        pruned = prune_for_selection(
+            cte_columns, cte_edges, schema, selected_field, lineage_graph, max_depth, max_fanout, expanded
+        )
+        anchors = sorted({anchor for anchor, _ in pruned.summaries.values()} | set(expanded))
+        if anchors:
+            st.multiselect("➕ Expand collapsed nodes:", anchors, key="expanded_nodes")
+
+        render_key = (cache_key(sql_query, schema), selected_field, max_depth, max_fanout, tuple(sorted(expanded)))
+        svg = get_render_cache().get_or_render(
+            render_key,
+            lambda: build_svg_graphviz_sqlglot(cte_columns, alias_map, schema, selected_field, pruned),
         )
         components.html(svg, height=600, scrolling=True)
     except Exception as e:
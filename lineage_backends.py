@@ -0,0 +1,76 @@
+# lineage_backends.py
+
+import argparse
+import csv
+import os
+from typing import Callable, Dict, List, Mapping, Optional
+
+from regex_lineage import extract_regex_lineage
+from schema_provider import BigQuerySchemaProvider, load_schema_file
+
+# Output schema shared by every back end
+EDGE_COLUMNS = ["source_table", "source_column", "destination_table", "destination_column"]
+
+
+def _sqlglot_lineage(sql: str, schema: Mapping[str, List[str]]) -> List[Dict[str, str]]:
+    from sqlglot_lineage import extract_column_lineage
+
+    return extract_column_lineage(sql, schema)
+
+
+BACKENDS: Dict[str, Callable[[str, Mapping[str, List[str]]], List[Dict[str, str]]]] = {
+    "sqlglot": _sqlglot_lineage,
+    "regex": extract_regex_lineage,
+}
+
+
+def extract_lineage(sql: str, schema: Optional[Mapping[str, List[str]]] = None,
+                    backend: str = "sqlglot") -> List[Dict[str, str]]:
+    """Column-level lineage edges of sql, with rows keyed by EDGE_COLUMNS."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown lineage backend {backend!r}; expected one of {sorted(BACKENDS)}")
+    return BACKENDS[backend](sql, {} if schema is None else schema)
+
+
+def write_edges_csv(edges: List[Dict[str, str]], path: str) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=EDGE_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(edges)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from lineage_cache import schema_hash
+    from lineage_store import DEFAULT_STORE, LineageStore, content_hash
+
+    parser = argparse.ArgumentParser(description="Extract column-level lineage from SQL files into the lineage store.")
+    parser.add_argument("paths", nargs="+", help="SQL files to parse")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="sqlglot")
+    parser.add_argument("--schema", help="JSON file {table: [columns]} or schema snapshot used to expand SELECT *")
+    parser.add_argument("--bq-project", help="Resolve SELECT * from BigQuery (one query per dataset, snapshotted)")
+    parser.add_argument("--default-dataset", help="project.dataset used to qualify bare table names")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="LineageStore SQLite file (one partition per script)")
+    parser.add_argument("--csv", help="Also export the extracted edges to this CSV file")
+    args = parser.parse_args(argv)
+
+    schema = None
+    if args.bq_project:
+        schema = BigQuerySchemaProvider(args.bq_project, args.default_dataset)
+    elif args.schema:
+        schema = load_schema_file(args.schema)
+
+    store = LineageStore(args.store)
+    edges = []
+    for path in args.paths:
+        with open(path, encoding="utf-8") as f:
+            sql = f.read()
+        script_edges = extract_lineage(sql, schema, args.backend)
+        store.upsert_script(os.path.normpath(path), content_hash(sql, args.backend, schema_hash(schema or {})), script_edges)
+        edges.extend(script_edges)
+    if args.csv:
+        write_edges_csv(edges, args.csv)
+    print(f"✅ {len(edges)} lineage edges from {len(args.paths)} scripts saved to {args.store}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# lineage_batch.py
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lineage_backends import BACKENDS, extract_lineage
+from lineage_cache import schema_hash
+from lineage_store import DEFAULT_STORE, LineageStore, content_hash
+from schema_provider import load_schema_file
+
+DEFAULT_OUTPUT = DEFAULT_STORE
+
+
+def discover_sql_files(source: str) -> List[str]:
+    """SQL files under a directory, the paths listed in a manifest file, or one .sql file.
+
+    A manifest is either a JSON list of paths or a text file with one path
+    per line; relative paths are resolved against the manifest's directory.
+    """
+    if source.lower().endswith(".sql"):
+        return [source]
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(source)
+            for name in names
+            if name.lower().endswith(".sql")
+        )
+
+    with open(source) as f:
+        content = f.read()
+    paths = json.loads(content) if source.endswith(".json") else [
+        line.strip() for line in content.splitlines() if line.strip() and not line.startswith("#")
+    ]
+    base = os.path.dirname(os.path.abspath(source))
+    return [path if os.path.isabs(path) else os.path.join(base, path) for path in paths]
+
+
+# Per-process parsing context, set once by _init_worker rather than pickled into every job
+_worker: Dict[str, object] = {}
+
+
+def _init_worker(schema: Dict[str, List[str]], schema_key: str, backend: str) -> None:
+    _worker.update(schema=schema, schema_key=schema_key, backend=backend)
+
+
+def _read_sql(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def _parse_script(path: str) -> Tuple[str, str, List[Dict[str, str]], Optional[str]]:
+    """Worker: path -> (path, content hash of the SQL parsed, edges, error)."""
+    backend = _worker["backend"]
+    try:
+        sql = _read_sql(path)
+    except OSError as e:
+        return path, "", [], f"{type(e).__name__}: {e}"
+    digest = content_hash(sql, backend, _worker["schema_key"])
+    try:
+        return path, digest, extract_lineage(sql, _worker["schema"], backend), None
+    except Exception as e:
+        return path, digest, [], f"{type(e).__name__}: {e}"
+
+
+def run_batch(
+    paths: Iterable[str],
+    output: str = DEFAULT_OUTPUT,
+    schema: Optional[Dict[str, List[str]]] = None,
+    workers: Optional[int] = None,
+    force: bool = False,
+    backend: str = "sqlglot",
+    prune: bool = False,
+) -> Dict[str, int]:
+    """Extract column lineage for many SQL files into a LineageStore.
+
+    Files whose content hash matches the one recorded in the store are
+    skipped unless force is set. Each parsed file's edges replace its
+    previous edges in a single transaction. Workers receive the schema once,
+    through the pool initializer, and read their scripts themselves; jobs
+    are only paths. A single changed file is parsed in-process, so an
+    incremental update does not pay for a process pool.
+    With prune set, paths is taken as the complete set of scripts: stored
+    scripts missing from it (deleted or renamed) lose their edges.
+    """
+    schema = schema or {}
+    store = LineageStore(output)
+    paths = [os.path.normpath(path) for path in paths]
+    stored = store.known_hashes()
+    known = {} if force else stored
+
+    schema_key = schema_hash(schema)
+    summary = {"parsed": 0, "skipped": 0, "failed": 0, "edges": 0, "removed": 0}
+    if prune:
+        for path in set(stored) - set(paths):
+            store.remove_script(path)
+            summary["removed"] += 1
+
+    jobs = []
+    for path in paths:
+        if known.get(path) == content_hash(_read_sql(path), backend, schema_key):
+            summary["skipped"] += 1
+        else:
+            jobs.append(path)
+
+    context = (schema, schema_key, backend)
+    if len(jobs) == 1 or workers == 1:
+        _init_worker(*context)
+        results = map(_parse_script, jobs)
+        pool = None
+    elif jobs:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=context)
+        chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+        results = pool.map(_parse_script, jobs, chunksize=chunksize)
+    else:
+        results, pool = [], None
+
+    try:
+        for path, digest, edges, error in results:
+            if force:
+                store.remove_script(path)
+            store.upsert_script(path, digest, edges, error)
+            if error:
+                summary["failed"] += 1
+                print(f"❌ {path}: {error}")
+            else:
+                summary["parsed"] += 1
+                summary["edges"] += len(edges)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Extract column-level lineage from a repository of SQL scripts.")
+    parser.add_argument(
+        "source", help="Directory of .sql files, a single .sql file, or a manifest (JSON list or one path per line)"
+    )
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="LineageStore SQLite file receiving the lineage edges")
+    parser.add_argument("--schema", help="JSON file {table: [columns]} or schema snapshot used to expand SELECT *")
+    parser.add_argument("--workers", type=int, help="Parser processes (default: CPU count)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="sqlglot", help="Lineage extractor")
+    parser.add_argument("--force", action="store_true", help="Re-parse files even if their content is unchanged")
+    parser.add_argument(
+        "--keep-missing", action="store_true",
+        help="Keep stored lineage of scripts no longer under the directory or in the manifest",
+    )
+    args = parser.parse_args(argv)
+
+    schema = None
+    if args.schema:
+        schema = load_schema_file(args.schema)
+
+    start = time.perf_counter()
+    # A directory or manifest lists every script; a single file says nothing about the others
+    prune = not args.keep_missing and not args.source.lower().endswith(".sql")
+    summary = run_batch(
+        discover_sql_files(args.source), args.output, schema, args.workers, args.force, args.backend, prune
+    )
+    print(
+        f"✅ {summary['parsed']} parsed, {summary['skipped']} unchanged, {summary['failed']} failed, "
+        f"{summary['removed']} removed, "
+        f"{summary['edges']} edges written to {args.output} in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# lineage_benchmark.py
+
+import argparse
+import random
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import pandas as pd
+
+from lineage_backends import BACKENDS, EDGE_COLUMNS, extract_lineage
+
+Edge = Tuple[str, str, str, str]
+
+
+def synthetic_script(n_ctes: int, depth: int, n_cols: int = 6, seed: int = 0) -> Tuple[str, Dict[str, List[str]], Set[Edge]]:
+    """(sql, schema, expected edges) for a chain of n_ctes CTEs.
+
+    Every CTE after the first joins its predecessor to a subquery nested
+    depth levels deep, renames one column and references another through
+    an expression, so the script exercises aliases, nesting and computed
+    columns. The expected edges follow the shared output schema: CTEs and
+    subqueries are nodes named after themselves, the outer SELECT is "main".
+    """
+    rng = random.Random(seed)
+    cols = [f"col_{i}" for i in range(n_cols)]
+    schema = {f"base_{i}": ["k"] + cols for i in range(n_ctes)}
+    expected: Set[Edge] = set()
+    ctes = []
+
+    for i in range(n_ctes):
+        name = f"cte_{i}"
+        if i == 0:
+            body = f"SELECT t.k, {', '.join(f't.{c}' for c in cols)} FROM base_0 t"
+            expected.update(("base_0", c, name, c) for c in ["k"] + cols)
+            ctes.append(f"{name} AS (\n    {body}\n)")
+            continue
+
+        # Innermost subquery first, each level wrapping the previous one in a JOIN
+        base = f"base_{i}"
+        subquery = f"(SELECT r.k, r.{cols[0]} FROM {base} r)"
+        if depth:
+            expected.update((base, c, f"q{i}_{depth}", c) for c in ("k", cols[0]))
+        for level in range(depth - 1, 0, -1):
+            inner = f"q{i}_{level + 1}"
+            subquery = (
+                f"(SELECT r.k, {inner}.{cols[0]} FROM {base} r "
+                f"JOIN {subquery} {inner} ON r.k = {inner}.k)"
+            )
+            expected.add((base, "k", f"q{i}_{level}", "k"))
+            expected.add((inner, cols[0], f"q{i}_{level}", cols[0]))
+
+        prev = f"cte_{i - 1}"
+        renamed, computed = rng.sample(cols[1:], 2) if n_cols > 2 else (cols[-1], cols[-1])
+        items = ["p.k"] + [f"p.{c}" for c in cols[1:] if c not in (renamed, computed)]
+        items += [f"p.{renamed} AS {renamed}_renamed", f"UPPER(CAST(p.{computed} AS STRING)) AS {computed}"]
+        expected.update((prev, c.split(".")[1], name, c.split(".")[1]) for c in items[:-2])
+        expected.add((prev, renamed, name, f"{renamed}_renamed"))
+        expected.add((prev, computed, name, computed))
+
+        from_clause = f"FROM {prev} p"
+        if depth:
+            join = f"q{i}_1"
+            items.append(f"{join}.{cols[0]} AS {cols[0]}_joined")
+            expected.add((join, cols[0], name, f"{cols[0]}_joined"))
+            from_clause += f"\n    JOIN {subquery} {join} ON p.k = {join}.k"
+        else:
+            items.append(f"p.{cols[0]}")
+            expected.add((prev, cols[0], name, cols[0]))
+        ctes.append(f"{name} AS (\n    SELECT {', '.join(items)}\n    {from_clause}\n)")
+
+    last = f"cte_{n_ctes - 1}"
+    sql = "WITH " + ",\n".join(ctes) + f"\nSELECT m.k FROM {last} m WHERE m.k IS NOT NULL;"
+    expected.add((last, "k", "main", "k"))
+    return sql, schema, expected
+
+
+def build_corpus(sizes: Sequence[int] = (2, 8, 32, 128), depths: Sequence[int] = (0, 2, 6)) -> List[Dict]:
+    return [
+        {"n_ctes": n, "depth": d, **dict(zip(("sql", "schema", "expected"), synthetic_script(n, d, seed=n * 31 + d)))}
+        for n in sizes for d in depths
+    ]
+
+
+def _score(edges: List[Dict[str, str]], expected: Set[Edge]) -> Tuple[float, float]:
+    found = {tuple(edge[c] for c in EDGE_COLUMNS) for edge in edges}
+    hits = len(found & expected)
+    precision = hits / len(found) if found else 0.0
+    recall = hits / len(expected) if expected else 1.0
+    return precision, recall
+
+
+def run_benchmark(corpus: List[Dict], backends: Sequence[str] = tuple(BACKENDS), repeat: int = 3) -> pd.DataFrame:
+    """Throughput (best of repeat) and edge precision/recall per backend and script."""
+    rows = []
+    for script in corpus:
+        for backend in backends:
+            row = {"backend": backend, "n_ctes": script["n_ctes"], "depth": script["depth"],
+                   "kb": len(script["sql"]) / 1024}
+            try:
+                best = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    edges = extract_lineage(script["sql"], script["schema"], backend)
+                    best = min(best, time.perf_counter() - start)
+                row["seconds"] = best
+                row["kb_per_s"] = row["kb"] / best if best else float("inf")
+                row["precision"], row["recall"] = _score(edges, script["expected"])
+                row["error"] = ""
+            except Exception as e:
+                row.update(seconds=None, kb_per_s=None, precision=None, recall=None, error=f"{type(e).__name__}: {e}")
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def summarize(results: pd.DataFrame) -> pd.DataFrame:
+    """Per-backend totals: throughput over the whole corpus and mean accuracy."""
+    ok = results[results["error"] == ""]
+    summary = ok.groupby("backend").agg(
+        scripts=("kb", "size"), kb=("kb", "sum"), seconds=("seconds", "sum"),
+        precision=("precision", "mean"), recall=("recall", "mean"),
+    )
+    summary["kb_per_s"] = summary["kb"] / summary["seconds"]
+    summary["failed"] = results[results["error"] != ""].groupby("backend").size()
+    return summary.fillna({"failed": 0})
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compare lineage back ends on a synthetic SQL corpus.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2, 8, 32, 128], help="CTEs per script")
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 2, 6], help="Subquery nesting depths")
+    parser.add_argument("--backends", nargs="+", choices=sorted(BACKENDS), default=sorted(BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Optional CSV file for the per-script results")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(build_corpus(args.sizes, args.depths), args.backends, args.repeat)
+    if args.output:
+        results.to_csv(args.output, index=False)
+    with pd.option_context("display.width", 160, "display.max_rows", None):
+        print(results.drop(columns="error").round(4).to_string(index=False))
+        print("\n📊 Summary")
+        print(summarize(results).round(4).to_string())
+    for row in results[results["error"] != ""].itertuples():
+        print(f"❌ {row.backend} n_ctes={row.n_ctes} depth={row.depth}: {row.error}")
+
+
+if __name__ == "__main__":
+    main()
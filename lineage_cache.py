@@ -0,0 +1,99 @@
+# lineage_cache.py
+
+import hashlib
+import json
+import pickle
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, List, Mapping, Optional
+
+# String literals and quoted identifiers are kept verbatim; comments are
+# dropped and whitespace runs collapse to one space.
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<literal>'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*"|`[^`]*`)
+    | (?P<gap>(?:\s+|--[^\n]*|\#[^\n]*|/\*.*?\*/)+)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """SQL text with comments removed and whitespace collapsed, literals untouched."""
+    def replace(match):
+        if match.group("literal"):
+            return match.group("literal")
+        return " "
+    return _TOKEN_RE.sub(replace, sql).strip().rstrip(";").strip()
+
+
+def schema_hash(schema: Mapping[str, List[str]]) -> str:
+    # Schema providers (schema_provider.py) may load lazily; they hash themselves
+    if hasattr(schema, "fingerprint"):
+        return schema.fingerprint()
+    return hashlib.sha256(json.dumps(schema, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def cache_key(sql: str, schema: Mapping[str, List[str]]) -> str:
+    normalized = normalize_sql(sql)
+    return hashlib.sha256(f"{schema_hash(schema)}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+class LineageCache:
+    """LRU cache of lineage extraction results with an optional SQLite disk tier.
+
+    Keys are derived from the normalized SQL and the schema hash, so edits to
+    whitespace or comments, and widget changes that rerun the app, hit the
+    cache instead of re-parsing.
+    """
+
+    def __init__(self, max_entries: int = 128, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.disk_path = disk_path
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_path:
+            with sqlite3.connect(disk_path) as conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS lineage_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+
+    def _disk_get(self, key: str) -> Optional[Any]:
+        if not self.disk_path:
+            return None
+        conn = sqlite3.connect(self.disk_path)
+        try:
+            row = conn.execute("SELECT value FROM lineage_cache WHERE key = ?", (key,)).fetchone()
+        finally:
+            conn.close()
+        return pickle.loads(row[0]) if row else None
+
+    def _disk_put(self, key: str, value: Any) -> None:
+        if not self.disk_path:
+            return
+        conn = sqlite3.connect(self.disk_path)
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO lineage_cache VALUES (?, ?)", (key, pickle.dumps(value)))
+        finally:
+            conn.close()
+
+    def get_or_compute(self, sql: str, schema: Mapping[str, List[str]], compute: Callable[[], Any]) -> Any:
+        """Return the cached result for (sql, schema), calling compute() on a miss."""
+        key = cache_key(sql, schema)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        value = self._disk_get(key)
+        if value is None:
+            value = compute()
+            self._disk_put(key, value)
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
@@ -0,0 +1,172 @@
+# lineage_graph.py
+
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple
+
+
+class LineageGraph:
+    """Interned, doubly-indexed lineage graph.
+
+    Nodes (tables, CTEs, subqueries) and columns get dense integer IDs.
+    Column edges and node edges are stored as adjacency lists in both
+    directions, and an exact field index maps every spelling of a column
+    ("node.col", and the "alias.col" labels the extractor emits) to its
+    nodes, so lookups never scan. Closures are computed iteratively (no
+    recursion limit) and memoized until the graph changes.
+    """
+
+    def __init__(self) -> None:
+        self.node_names: List[str] = []
+        self._node_ids: Dict[str, int] = {}
+        self.columns: List[Tuple[int, str]] = []
+        self._column_ids: Dict[Tuple[int, str], int] = {}
+
+        self.column_upstream: List[List[int]] = []
+        self.column_downstream: List[List[int]] = []
+        self.node_upstream: List[Dict[int, str]] = []    # source node -> alias
+        self.node_downstream: List[Set[int]] = []
+
+        self.field_index: Dict[str, Set[int]] = {}      # field label -> node ids
+        self._memo: Dict[Tuple[str, int], FrozenSet[int]] = {}
+
+    # --- construction -------------------------------------------------
+    def intern_node(self, name: str) -> int:
+        node_id = self._node_ids.get(name)
+        if node_id is None:
+            node_id = len(self.node_names)
+            self._node_ids[name] = node_id
+            self.node_names.append(name)
+            self.node_upstream.append({})
+            self.node_downstream.append(set())
+        return node_id
+
+    def intern_column(self, node: str, column: str) -> int:
+        key = (self.intern_node(node), column)
+        column_id = self._column_ids.get(key)
+        if column_id is None:
+            column_id = len(self.columns)
+            self._column_ids[key] = column_id
+            self.columns.append(key)
+            self.column_upstream.append([])
+            self.column_downstream.append([])
+            self.index_field(f"{node}.{column}", key[0])
+        return column_id
+
+    def index_field(self, label: str, node_id: int) -> None:
+        self.field_index.setdefault(label, set()).add(node_id)
+
+    def add_node_edge(self, source: str, target: str, alias: str = "") -> None:
+        source_id, target_id = self.intern_node(source), self.intern_node(target)
+        if alias or source_id not in self.node_upstream[target_id]:
+            self.node_upstream[target_id][source_id] = alias
+        self.node_downstream[source_id].add(target_id)
+        self._memo.clear()
+
+    def add_column_edge(self, source_table: str, source_column: str,
+                        destination_table: str, destination_column: str) -> None:
+        target_id = self.intern_column(destination_table, destination_column)
+        if not source_table:
+            return  # Unresolved source (ambiguous unqualified column)
+        source_id = self.intern_column(source_table, source_column)
+        self.column_upstream[target_id].append(source_id)
+        self.column_downstream[source_id].append(target_id)
+        self.add_node_edge(source_table, destination_table)
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Mapping[str, str]]) -> "LineageGraph":
+        """Build from column edges (source_table, source_column, destination_table, destination_column)."""
+        graph = cls()
+        for edge in edges:
+            graph.add_column_edge(edge["source_table"], edge["source_column"],
+                                  edge["destination_table"], edge["destination_column"])
+        return graph
+
+    @classmethod
+    def from_extraction(cls, cte_columns: Dict[str, List[str]],
+                        cte_edges: Dict[str, List[Tuple[str, str]]]) -> "LineageGraph":
+        """Build from extract_lineage_with_sqlglot_no_main output."""
+        from sqlglot_lineage import column_edges
+
+        graph = cls.from_edges(column_edges(cte_columns, cte_edges))
+        for target, sources in cte_edges.items():
+            for source, alias in sources:
+                graph.add_node_edge(source, target, alias)
+        for node, cols in cte_columns.items():
+            node_id = graph.intern_node(node)
+            for label in cols:
+                graph.index_field(label, node_id)
+        return graph
+
+    # --- lookups ----------------------------------------------------------
+    def node_id(self, name: str) -> Optional[int]:
+        return self._node_ids.get(name)
+
+    def nodes_with_field(self, field: str) -> List[str]:
+        """Nodes whose columns include exactly this field label."""
+        return [self.node_names[i] for i in sorted(self.field_index.get(field, ()))]
+
+    def column_id(self, node: str, column: str) -> Optional[int]:
+        node_id = self._node_ids.get(node)
+        return None if node_id is None else self._column_ids.get((node_id, column))
+
+    # --- closures -----------------------------------------------------------
+    def _closure(self, kind: str, start: int, adjacency) -> FrozenSet[int]:
+        key = (kind, start)
+        cached = self._memo.get(key)
+        if cached is not None:
+            return cached
+        seen = {start}
+        stack = [start]
+        while stack:
+            current = stack.pop()
+            for neighbour in adjacency(current):
+                if neighbour in seen:
+                    continue
+                memoized = self._memo.get((kind, neighbour))
+                if memoized is not None:
+                    seen |= memoized
+                    continue
+                seen.add(neighbour)
+                stack.append(neighbour)
+        result = frozenset(seen)
+        self._memo[key] = result
+        return result
+
+    def upstream_nodes(self, names: Iterable[str]) -> Set[str]:
+        """The given nodes plus everything they read from, transitively."""
+        result: Set[int] = set()
+        for name in names:
+            node_id = self._node_ids.get(name)
+            if node_id is not None:
+                result |= self._closure("node_up", node_id, lambda n: self.node_upstream[n].keys())
+        return {self.node_names[i] for i in result}
+
+    def downstream_nodes(self, names: Iterable[str]) -> Set[str]:
+        """The given nodes plus everything built from them, transitively."""
+        result: Set[int] = set()
+        for name in names:
+            node_id = self._node_ids.get(name)
+            if node_id is not None:
+                result |= self._closure("node_down", node_id, lambda n: self.node_downstream[n])
+        return {self.node_names[i] for i in result}
+
+    def upstream_columns(self, node: str, column: str) -> List[Tuple[str, str]]:
+        """Every (node, column) that column is derived from, itself included."""
+        column_id = self.column_id(node, column)
+        if column_id is None:
+            return []
+        closure = self._closure("col_up", column_id, lambda c: self.column_upstream[c])
+        return sorted((self.node_names[self.columns[c][0]], self.columns[c][1]) for c in closure)
+
+    def downstream_columns(self, node: str, column: str) -> List[Tuple[str, str]]:
+        """Impact analysis: every (node, column) derived from column, itself included."""
+        column_id = self.column_id(node, column)
+        if column_id is None:
+            return []
+        closure = self._closure("col_down", column_id, lambda c: self.column_downstream[c])
+        return sorted((self.node_names[self.columns[c][0]], self.columns[c][1]) for c in closure)
+
+    def node_edges(self) -> Iterable[Tuple[str, str, str]]:
+        """(source, target, alias) for every node-level edge."""
+        for target_id, sources in enumerate(self.node_upstream):
+            for source_id, alias in sources.items():
+                yield self.node_names[source_id], self.node_names[target_id], alias
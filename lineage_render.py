@@ -0,0 +1,221 @@
+# lineage_render.py
+
+import html
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Iterable, List, NamedTuple, Set, Tuple
+
+from lineage_graph import LineageGraph
+
+# Beyond this many visible nodes Graphviz `dot` is skipped for the Python layout
+DOT_MAX_NODES = 150
+
+
+class PrunedGraph(NamedTuple):
+    nodes: Set[str]                          # real nodes to draw
+    summaries: Dict[str, Tuple[str, List[str]]]   # summary id -> (anchor node, hidden nodes)
+    edges: List[Tuple[str, str, str]]        # (source, target, label) between drawn nodes
+
+
+def summary_id(anchor: str, upstream: bool) -> str:
+    return f"⋯ {anchor}" if upstream else f"{anchor} ⋯"
+
+
+def prune_lineage(
+    graph: LineageGraph,
+    relevant: Set[str],
+    focus: Iterable[str],
+    max_depth: int = 3,
+    max_fanout: int = 8,
+    expanded: Iterable[str] = (),
+) -> PrunedGraph:
+    """Keep the neighbourhood of focus within max_depth hops and max_fanout neighbours.
+
+    Neighbours past either limit are folded into one summary node per anchor.
+    Anchors listed in expanded show all their neighbours, one hop further
+    than the limits would otherwise allow.
+    """
+    expanded = set(expanded)
+
+    def downstream(node: str) -> Set[str]:
+        node_id = graph.node_id(node)
+        return set() if node_id is None else {graph.node_names[i] for i in graph.node_downstream[node_id]}
+
+    def upstream(node: str) -> Set[str]:
+        node_id = graph.node_id(node)
+        return set() if node_id is None else {graph.node_names[i] for i in graph.node_upstream[node_id]}
+
+    depth: Dict[str, int] = {}
+    queue = deque()
+    roots = sorted(set(focus) & relevant)
+    if not roots:
+        # Nothing to focus on: start from the sinks (final outputs)
+        roots = sorted(node for node in relevant if not downstream(node) & relevant)
+    for node in roots:
+        depth[node] = 0
+        queue.append(node)
+
+    hidden_by_anchor: Dict[Tuple[str, bool], List[str]] = {}
+    while queue:
+        node = queue.popleft()
+        sources = upstream(node)
+        neighbours = sorted(sources | downstream(node))
+        new = [n for n in neighbours if n in relevant and n not in depth]
+        if not new:
+            continue
+
+        if node in expanded:
+            shown, hidden = new, []
+        elif depth[node] >= max_depth:
+            shown, hidden = [], new
+        else:
+            shown, hidden = new[:max_fanout], new[max_fanout:]
+
+        for neighbour in shown:
+            depth[neighbour] = depth[node] + 1
+            queue.append(neighbour)
+        # One summary per anchor and direction so arrows keep pointing downstream
+        for n in hidden:
+            hidden_by_anchor.setdefault((node, n in sources), []).append(n)
+
+    nodes = set(depth)
+    summaries = {}
+    summary_edges = []
+    for (anchor, is_upstream), hidden in hidden_by_anchor.items():
+        still_hidden = [n for n in hidden if n not in nodes]
+        if still_hidden:
+            sid = summary_id(anchor, is_upstream)
+            summaries[sid] = (anchor, still_hidden)
+            summary_edges.append((sid, anchor, "") if is_upstream else (anchor, sid, ""))
+
+    edges = [
+        (source, target, f"AS {alias}" if alias and alias != source else "")
+        for source, target, alias in graph.node_edges()
+        if source in nodes and target in nodes
+    ] + summary_edges
+    return PrunedGraph(nodes, summaries, edges)
+
+
+def layered_svg(
+    labels: Dict[str, Tuple[str, List[str], str]],
+    edges: List[Tuple[str, str, str]],
+    max_lines: int = 8,
+) -> str:
+    """Left-to-right layered SVG layout computed in Python (no Graphviz).
+
+    labels maps node -> (title, body lines, fill colour). Layers come from
+    longest-path ranking (back edges of cycles are ignored) and nodes within
+    a layer are ordered by the mean position of their predecessors.
+    """
+    successors: Dict[str, List[str]] = {node: [] for node in labels}
+    predecessors: Dict[str, List[str]] = {node: [] for node in labels}
+    for source, target, _ in edges:
+        if source in labels and target in labels and source != target:
+            successors[source].append(target)
+            predecessors[target].append(source)
+
+    # Longest-path layering over a DFS order; edges closing a cycle are skipped
+    rank: Dict[str, int] = {}
+    state: Dict[str, int] = {}
+    order: List[str] = []
+    for root in sorted(labels):
+        if root in state:
+            continue
+        stack = [(root, iter(sorted(successors[root])))]
+        state[root] = 1
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                state[node] = 2
+                order.append(node)
+                stack.pop()
+            elif child not in state:
+                state[child] = 1
+                stack.append((child, iter(sorted(successors[child]))))
+    topological = order[::-1]
+    position_in_order = {node: i for i, node in enumerate(topological)}
+    for node in topological:
+        forward_preds = [p for p in predecessors[node] if position_in_order[p] < position_in_order[node]]
+        rank[node] = max((rank[p] + 1 for p in forward_preds), default=0)
+
+    layers: Dict[int, List[str]] = {}
+    for node in topological:
+        layers.setdefault(rank[node], []).append(node)
+    slot: Dict[str, float] = {}
+    for layer in sorted(layers):
+        members = layers[layer]
+        members.sort(key=lambda n: (
+            sum(slot[p] for p in predecessors[n] if p in slot) / max(1, sum(1 for p in predecessors[n] if p in slot)),
+            n,
+        ))
+        for i, node in enumerate(members):
+            slot[node] = i
+
+    line_height, width, gap_x, gap_y, pad = 16, 220, 80, 24, 10
+
+    def box_height(node):
+        _, lines, _ = labels[node]
+        return pad * 2 + line_height * (1 + min(len(lines), max_lines + 1))
+
+    boxes: Dict[str, Tuple[float, float, float]] = {}
+    total_height = 0.0
+    for layer, members in layers.items():
+        y = gap_y
+        for node in members:
+            boxes[node] = (gap_y + layer * (width + gap_x), y, box_height(node))
+            y += box_height(node) + gap_y
+        total_height = max(total_height, y)
+    total_width = gap_y * 2 + (max(layers, default=0) + 1) * (width + gap_x)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{total_width:.0f}" height="{total_height:.0f}" '
+        f'font-family="Arial" font-size="12">',
+        '<defs><marker id="arrow" markerWidth="10" markerHeight="7" refX="10" refY="3.5" orient="auto">'
+        '<polygon points="0 0, 10 3.5, 0 7"/></marker></defs>',
+    ]
+    for source, target, label in edges:
+        if source not in boxes or target not in boxes:
+            continue
+        sx, sy, sh = boxes[source]
+        tx, ty, th = boxes[target]
+        x1, y1, x2, y2 = sx + width, sy + sh / 2, tx, ty + th / 2
+        mid = (x1 + x2) / 2
+        parts.append(
+            f'<path d="M{x1:.0f},{y1:.0f} C{mid:.0f},{y1:.0f} {mid:.0f},{y2:.0f} {x2:.0f},{y2:.0f}" '
+            f'fill="none" stroke="#555" marker-end="url(#arrow)"/>'
+        )
+        if label:
+            parts.append(f'<text x="{mid:.0f}" y="{(y1 + y2) / 2 - 4:.0f}" fill="#555">{html.escape(label)}</text>')
+    for node, (x, y, h) in boxes.items():
+        title, lines, fill = labels[node]
+        parts.append(f'<rect x="{x:.0f}" y="{y:.0f}" width="{width}" height="{h:.0f}" fill="{fill}" stroke="black"/>')
+        parts.append(f'<text x="{x + pad:.0f}" y="{y + pad + 12:.0f}" font-weight="bold">{html.escape(title)}</text>')
+        shown = lines[:max_lines] + ([f"… {len(lines) - max_lines} more"] if len(lines) > max_lines else [])
+        for i, line in enumerate(shown, start=1):
+            parts.append(
+                f'<text x="{x + pad:.0f}" y="{y + pad + 12 + i * line_height:.0f}">{html.escape(line)}</text>'
+            )
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+class RenderCache:
+    """LRU of rendered SVGs keyed by (graph hash, selection)."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key: tuple, render: Callable[[], str]) -> str:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        svg = render()
+        with self._lock:
+            self._entries[key] = svg
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return svg
@@ -0,0 +1,161 @@
+# lineage_store.py
+
+import hashlib
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from lineage_backends import EDGE_COLUMNS
+
+DEFAULT_STORE = os.environ.get("LINEAGE_STORE", "lineage.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scripts (
+    script_path TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    parsed_at TEXT NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS lineage_edges (
+    script_path TEXT NOT NULL,
+    source_table TEXT,
+    source_column TEXT,
+    destination_table TEXT,
+    destination_column TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_lineage_edges_script ON lineage_edges (script_path);
+CREATE INDEX IF NOT EXISTS idx_lineage_edges_source ON lineage_edges (source_table, source_column);
+CREATE INDEX IF NOT EXISTS idx_lineage_edges_destination ON lineage_edges (destination_table, destination_column);
+"""
+
+
+def content_hash(sql: str, backend: str, schema_key: str = "") -> str:
+    # The back end and schema (lineage_cache.schema_hash, computed once per run)
+    # are part of the hash so switching extractors or changing the schema's
+    # SELECT * expansions re-parses everything
+    return hashlib.sha256(f"{backend}\n{schema_key}\n{sql}".encode("utf-8")).hexdigest()
+
+
+def scope_edges(script_path: str, edges: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Prefix nodes produced inside a script (CTEs, subqueries, "main") with "<script>::".
+
+    Without this, same-named CTEs of different scripts would merge in the
+    global graph; base tables keep their names so scripts join up on them.
+    """
+    internal = {edge["destination_table"] for edge in edges}
+
+    def scoped(node):
+        return f"{script_path}::{node}" if node in internal else node
+
+    return [
+        {**edge, "source_table": scoped(edge["source_table"]), "destination_table": scoped(edge["destination_table"])}
+        for edge in edges
+    ]
+
+
+class LineageStore:
+    """Persistent lineage graph partitioned by source script.
+
+    Each script's edges are replaced as a unit, keyed by its content hash,
+    so re-processing one changed script rewrites only that script's rows.
+    Edges are indexed by script, source and destination column, and graph
+    queries run as recursive SQL over those indexes.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # --- writes -------------------------------------------------------------
+    def known_hashes(self) -> Dict[str, str]:
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT script_path, content_hash FROM scripts"))
+
+    def is_current(self, script_path: str, script_hash: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT content_hash FROM scripts WHERE script_path = ?", (script_path,)).fetchone()
+        return row is not None and row[0] == script_hash
+
+    def upsert_script(self, script_path: str, script_hash: str, edges: List[Dict[str, str]],
+                      error: Optional[str] = None) -> bool:
+        """Replace script_path's edges unless script_hash is already stored; returns whether it wrote."""
+        rows = [(script_path, *(edge[c] for c in EDGE_COLUMNS)) for edge in scope_edges(script_path, edges)]
+        parsed_at = datetime.now(timezone.utc).isoformat()
+        with self._lock, self._connect() as conn, conn:
+            row = conn.execute("SELECT content_hash FROM scripts WHERE script_path = ?", (script_path,)).fetchone()
+            if row is not None and row[0] == script_hash:
+                return False
+            conn.execute("DELETE FROM lineage_edges WHERE script_path = ?", (script_path,))
+            conn.executemany("INSERT INTO lineage_edges VALUES (?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO scripts VALUES (?, ?, ?, ?)",
+                (script_path, script_hash, parsed_at, error),
+            )
+        return True
+
+    def remove_script(self, script_path: str) -> None:
+        with self._lock, self._connect() as conn, conn:
+            conn.execute("DELETE FROM lineage_edges WHERE script_path = ?", (script_path,))
+            conn.execute("DELETE FROM scripts WHERE script_path = ?", (script_path,))
+
+    # --- queries ------------------------------------------------------------
+    def edges(self, script_path: Optional[str] = None) -> List[Dict[str, str]]:
+        query = "SELECT script_path, source_table, source_column, destination_table, destination_column FROM lineage_edges"
+        params: Tuple = ()
+        if script_path is not None:
+            query += " WHERE script_path = ?"
+            params = (script_path,)
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [dict(zip(["script_path"] + EDGE_COLUMNS, row)) for row in rows]
+
+    def _closure(self, table: str, column: str, upstream: bool) -> List[Tuple[str, str]]:
+        # UNION (not UNION ALL) de-duplicates visited columns, so cycles terminate
+        near, far = ("destination", "source") if upstream else ("source", "destination")
+        query = f"""
+            WITH RECURSIVE reached(table_name, column_name) AS (
+                SELECT ?, ?
+                UNION
+                SELECT e.{far}_table, e.{far}_column
+                FROM lineage_edges AS e
+                JOIN reached ON e.{near}_table = reached.table_name AND e.{near}_column = reached.column_name
+                WHERE e.{far}_table != ''
+            )
+            SELECT table_name, column_name FROM reached ORDER BY table_name, column_name
+        """
+        with self._connect() as conn:
+            return conn.execute(query, (table, column)).fetchall()
+
+    def upstream_columns(self, table: str, column: str) -> List[Tuple[str, str]]:
+        """Every (table, column) that column is derived from, across all scripts, itself included."""
+        return self._closure(table, column, upstream=True)
+
+    def downstream_columns(self, table: str, column: str) -> List[Tuple[str, str]]:
+        """Impact analysis: every (table, column) derived from column, itself included."""
+        return self._closure(table, column, upstream=False)
+
+    def scripts_reading(self, table: str) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT script_path FROM lineage_edges WHERE source_table = ? ORDER BY script_path", (table,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def graph(self):
+        """The whole store as an in-memory LineageGraph."""
+        from lineage_graph import LineageGraph
+
+        return LineageGraph.from_edges(self.edges())
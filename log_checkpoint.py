@@ -0,0 +1,63 @@
+# log_checkpoint.py
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+# Where the last-seen log timestamp of each fetcher is persisted between runs
+CHECKPOINT_FILE = os.environ.get("LOG_CHECKPOINT_FILE", ".log_checkpoints.json")
+
+# Lower bound used on the very first run, before any checkpoint exists
+DEFAULT_LOOKBACK = timedelta(days=7)
+
+_lock = threading.Lock()
+
+
+def split_gcs_pattern(file_pattern):
+    """Split gs://bucket/prefix-*.csv into (bucket, object_glob, literal_prefix)."""
+    path = file_pattern[len("gs://"):] if file_pattern.startswith("gs://") else file_pattern
+    bucket, _, object_glob = path.partition("/")
+    wildcard_positions = [i for i in (object_glob.find(c) for c in "*?[") if i >= 0]
+    literal_prefix = object_glob[:min(wildcard_positions)] if wildcard_positions else object_glob
+    return bucket, object_glob, literal_prefix
+
+
+def timestamp_filter(since, inclusive=True):
+    """Logging filter clause restricting entries to timestamp >= since (or > since)."""
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    operator = ">=" if inclusive else ">"
+    return f'timestamp{operator}"{since.astimezone(timezone.utc).isoformat()}"'
+
+
+def _read_all():
+    if not os.path.exists(CHECKPOINT_FILE):
+        return {}
+    with open(CHECKPOINT_FILE) as f:
+        return json.load(f)
+
+
+def load_checkpoint(key, default_lookback=DEFAULT_LOOKBACK):
+    """Return (lower_bound, from_checkpoint) for key.
+
+    Without a saved checkpoint the bound is now - default_lookback.
+    """
+    with _lock:
+        saved = _read_all().get(key)
+    if saved:
+        return datetime.fromisoformat(saved), True
+    return datetime.now(timezone.utc) - default_lookback, False
+
+
+def save_checkpoint(key, timestamp):
+    """Persist timestamp as the new lower bound for key."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    with _lock:
+        checkpoints = _read_all()
+        checkpoints[key] = timestamp.isoformat()
+        tmp_path = CHECKPOINT_FILE + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoints, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, CHECKPOINT_FILE)
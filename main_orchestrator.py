@@ -2,90 +2,246 @@
 
 from gcs_logging_fetcher import fetch_gcs_uploads
 from dataproc_logging_fetcher import fetch_dataproc_jobs
-from bq_metadata_collector import collect_bq_table_metadata
-from datacatalog_tagging import attach_tags
+from bq_metadata_cache import get_default_cache
+from bq_metadata_collector import collect_bq_dataset_metadata, collect_bq_table_metadata
+from datacatalog_tagging import MAX_TAG_WRITERS, attach_tags
+from log_checkpoint import save_checkpoint
 
-from datetime import datetime
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 
 # Configurations
 PROJECT_ID = "gbmamgdataeval"
 LOCATION = "europe-west2"
 
-# --- User input ---
-FILE_PATTERN = "gs://amgdatabucket/sales-data-*.csv"
-
-def orchestrate_metadata_collection(file_pattern):
-    print(f"🔍 Starting Metadata Collection for file pattern: {file_pattern}")
+# Upper bound on in-flight BigQuery / Data Catalog requests in concurrent mode
+MAX_WORKERS = 8
 
-    # 1. Fetch GCS Upload Events
-    gcs_files = fetch_gcs_uploads(file_pattern, PROJECT_ID)
-    print(f"✅ Found {len(gcs_files)} matching GCS files.")
+# Datasets with at least this many output tables are warmed with one
+# INFORMATION_SCHEMA query instead of one get_table call per table
+BULK_DATASET_THRESHOLD = 5
 
-    # 2. Fetch Dataproc Jobs Processing Those Files
-    dataproc_jobs = fetch_dataproc_jobs(file_pattern, PROJECT_ID)
-    print(f"✅ Found {len(dataproc_jobs)} matching Dataproc jobs.")
+# --- User input ---
+FILE_PATTERN = "gs://amgdatabucket/sales-data-*.csv"
 
-    if not dataproc_jobs:
-        print("⚠️ No Dataproc jobs found matching the file pattern!")
-        return
 
-    # 3. For each Dataproc Job
+def _timed(func, *args):
+    """Run func(*args) and return (result, elapsed_seconds)."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class _TimedExecutor:
+    """Executor facade that adds up how long its tasks ran, excluding queueing."""
+
+    def __init__(self, executor):
+        self._executor = executor
+        self._lock = threading.Lock()
+        self.busy_seconds = 0.0
+
+    def _run(self, func, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.busy_seconds += time.perf_counter() - start
+
+    def submit(self, func, *args, **kwargs):
+        return self._executor.submit(self._run, func, *args, **kwargs)
+
+
+def _fetch_all(fetcher, file_pattern, checkpoints):
+    """Drain a streaming log fetcher, collecting its new checkpoint into checkpoints."""
+    return list(fetcher(file_pattern, PROJECT_ID, checkpoints=checkpoints))
+
+
+def _commit_checkpoints(checkpoints):
+    for key, timestamp in checkpoints.items():
+        save_checkpoint(key, timestamp)
+
+
+def process_output_table(table_id, job, gcs_files, tag_executor=None):
+    """Collect BigQuery metadata for one output table and attach its tags.
+
+    Tables unchanged since the last collection keep their tags untouched.
+    tag_executor is a pool shared by every table's tag calls; it must not
+    be the pool process_output_table itself runs on. Returns the seconds
+    spent on this table's own work, i.e. without the tag calls.
+    """
+    start = time.perf_counter()
+    # Expecting format: project.dataset.table
+    project_id, dataset_id, table_name = table_id.split('.')
+
+    # Fetch Technical Metadata
+    bq_metadata = collect_bq_table_metadata(project_id, dataset_id, table_name)
+    if not bq_metadata.get("changed", True):
+        print(f"⏭️ {table_id} unchanged since last collection; tags left as they are.")
+        return time.perf_counter() - start
+
+    # Build Operational Metadata
+    operational_metadata = {
+        "source_file": gcs_files[0]['bucket'] + "/" + gcs_files[0]['object'] if gcs_files else "unknown",
+        "job_id": job["job_id"],
+        "job_status": job["status"],  # You might extend to detect true job status from job logs
+        "start_time": datetime.now(timezone.utc),
+        "end_time": datetime.now(timezone.utc),
+        "freshness_status": "FRESH",
+    }
+
+    # Build Technical Metadata
+    technical_metadata = {
+        "owner": "data.owner@example.com",
+        "last_modified": bq_metadata.get("last_modified"),
+        "last_queried": bq_metadata.get("last_modified"),  # Simplification
+        "num_rows": bq_metadata.get("num_rows"),
+        "size_bytes": bq_metadata.get("size_bytes"),
+        "table_type": bq_metadata.get("table_type"),
+    }
+
+    # Build Business Metadata
+    business_metadata = {
+        "business_owner": "sales@company.com",
+        "criticality": "HIGH",
+        "sla_hours": 24,
+        "business_process": "Sales Reporting",
+    }
+
+    # Attach Tags
+    print(f"🏷️ Attaching tags to {table_id}...")
+    own_seconds = time.perf_counter() - start
+    try:
+        attach_tags(
+            entry_name=bq_metadata.get("entry_resource_name"),
+            project_id=PROJECT_ID,
+            location=LOCATION,
+            operational_data=operational_metadata,
+            technical_data=technical_metadata,
+            business_data=business_metadata,
+            executor=tag_executor,
+        )
+    except Exception:
+        # Otherwise the next run would see the table as unchanged and never retry its tags
+        get_default_cache().forget(table_id)
+        raise
+    return own_seconds
+
+
+def _table_tasks(dataproc_jobs):
+    """Yield (job, table_id) for every output table of every Dataproc job."""
     for job in dataproc_jobs:
         print(f"🔎 Processing Dataproc Job ID: {job['job_id']}")
 
         # (Optional enhancement: match which output tables belong to which file)
         output_tables = job.get("output_tables", [])
-        
+
         if not output_tables:
             print(f"⚠️ No output tables linked to job {job['job_id']}. Skipping tagging.")
             continue
 
-        # 4. For each output table
         for table_id in output_tables:
-            # Expecting format: project.dataset.table
-            project_id, dataset_id, table_name = table_id.split('.')
-
-            # Fetch Technical Metadata
-            bq_metadata = collect_bq_table_metadata(project_id, dataset_id, table_name)
-
-            # Build Operational Metadata
-            operational_metadata = {
-                "source_file": gcs_files[0]['bucket'] + "/" + gcs_files[0]['object'] if gcs_files else "unknown",
-                "job_id": job["job_id"],
-                "job_status": job["status"],  # You might extend to detect true job status from job logs
-                "start_time": datetime.now(),
-                "end_time": datetime.now(),
-                "freshness_status": "FRESH",
-            }
+            yield job, table_id
 
-            # Build Technical Metadata
-            technical_metadata = {
-                "owner": "data.owner@example.com",
-                "last_modified": bq_metadata.get("last_modified"),
-                "last_queried": bq_metadata.get("last_modified"),  # Simplification
-                "num_rows": bq_metadata.get("num_rows"),
-                "size_bytes": bq_metadata.get("size_bytes"),
-                "table_type": bq_metadata.get("table_type"),
-            }
 
-            # Build Business Metadata
-            business_metadata = {
-                "business_owner": "sales@company.com",
-                "criticality": "HIGH",
-                "sla_hours": 24,
-                "business_process": "Sales Reporting",
+def _prefetch_datasets(tasks):
+    """Warm the metadata cache for datasets that many output tables share."""
+    datasets = Counter(tuple(table_id.split('.')[:2]) for _, table_id in tasks)
+    for (project_id, dataset_id), count in datasets.items():
+        if count < BULK_DATASET_THRESHOLD:
+            continue
+        try:
+            collect_bq_dataset_metadata(project_id, dataset_id)
+        except Exception as e:
+            print(f"⚠️ Bulk metadata fetch failed for {project_id}.{dataset_id}, falling back to per-table: {e}")
+
+
+def orchestrate_metadata_collection(file_pattern, concurrent=True, max_workers=MAX_WORKERS):
+    """Collect and tag metadata for every table produced from file_pattern.
+
+    With concurrent=True the two log fetches run side by side and the
+    per-table metadata/tagging work is spread over at most max_workers
+    threads. A failing table is reported and does not stop the run, but the
+    log checkpoints only advance when every table succeeded, so the next
+    run picks the failed entries up again.
+    """
+    print(f"🔍 Starting Metadata Collection for file pattern: {file_pattern}")
+    run_start = time.perf_counter()
+    busy_seconds = 0.0
+    failures = []
+    checkpoints = {}
+
+    if concurrent:
+        # 1 + 2. Fetch GCS upload events and Dataproc jobs in parallel
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            gcs_future = pool.submit(_timed, _fetch_all, fetch_gcs_uploads, file_pattern, checkpoints)
+            dataproc_future = pool.submit(_timed, _fetch_all, fetch_dataproc_jobs, file_pattern, checkpoints)
+            gcs_files, gcs_seconds = gcs_future.result()
+            dataproc_jobs, dataproc_seconds = dataproc_future.result()
+        busy_seconds += gcs_seconds + dataproc_seconds
+    else:
+        # 1. Fetch GCS Upload Events
+        gcs_files, gcs_seconds = _timed(_fetch_all, fetch_gcs_uploads, file_pattern, checkpoints)
+        # 2. Fetch Dataproc Jobs Processing Those Files
+        dataproc_jobs, dataproc_seconds = _timed(_fetch_all, fetch_dataproc_jobs, file_pattern, checkpoints)
+        busy_seconds += gcs_seconds + dataproc_seconds
+
+    print(f"✅ Found {len(gcs_files)} matching GCS files.")
+    print(f"✅ Found {len(dataproc_jobs)} matching Dataproc jobs.")
+
+    if not dataproc_jobs:
+        print("⚠️ No Dataproc jobs found matching the file pattern!")
+        _commit_checkpoints(checkpoints)
+        return failures
+
+    # 3 + 4. For each output table of each Dataproc job
+    tasks = list(_table_tasks(dataproc_jobs))
+    _prefetch_datasets(tasks)
+
+    if concurrent:
+        # Tables and their tag calls use separate pools: a table worker blocks
+        # on its tag calls, so sharing one pool could starve it. Tag calls are
+        # timed where they run, so waiting for a tag writer is not counted
+        with ThreadPoolExecutor(max_workers=max_workers) as pool, \
+                ThreadPoolExecutor(max_workers=MAX_TAG_WRITERS) as tag_pool:
+            tag_executor = _TimedExecutor(tag_pool)
+            futures = {
+                pool.submit(process_output_table, table_id, job, gcs_files, tag_executor): table_id
+                for job, table_id in tasks
             }
+            for future in as_completed(futures):
+                table_id = futures[future]
+                try:
+                    busy_seconds += future.result()
+                except Exception as e:
+                    failures.append((table_id, e))
+                    print(f"❌ Failed to process {table_id}: {e}")
+        busy_seconds += tag_executor.busy_seconds
+    else:
+        for job, table_id in tasks:
+            try:
+                busy_seconds += process_output_table(table_id, job, gcs_files)
+            except Exception as e:
+                failures.append((table_id, e))
+                print(f"❌ Failed to process {table_id}: {e}")
+
+    # 5. Summary
+    wall_seconds = time.perf_counter() - run_start
+    print(f"🏁 Processed {len(tasks) - len(failures)}/{len(tasks)} tables in {wall_seconds:.1f}s.")
+    if failures:
+        print(f"⚠️ {len(failures)} table(s) failed: {', '.join(t for t, _ in failures)}")
+        print("↩️ Log checkpoints not advanced; the next run retries these entries.")
+    else:
+        _commit_checkpoints(checkpoints)
+    if concurrent:
+        saved = max(busy_seconds - wall_seconds, 0.0)
+        print(f"⏱️ Sequential estimate {busy_seconds:.1f}s, saved {saved:.1f}s with {max_workers} workers.")
+
+    return failures
 
-            # 5. Attach Tags
-            print(f"🏷️ Attaching tags to {table_id}...")
-            attach_tags(
-                entry_name=bq_metadata.get("entry_resource_name"),
-                project_id=PROJECT_ID,
-                location=LOCATION,
-                operational_data=operational_metadata,
-                technical_data=technical_metadata,
-                business_data=business_metadata
-            )
 
 if __name__ == "__main__":
     orchestrate_metadata_collection(FILE_PATTERN)
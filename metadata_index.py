@@ -0,0 +1,417 @@
+# metadata_index.py
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+# Local mirror of catalog entries, tags and schemas; searched instead of the API
+INDEX_PATH = os.environ.get("METADATA_INDEX", "metadata_index.sqlite")
+
+# Filterable entry attributes, filled from tag fields of the same name
+FACETS = ("criticality", "owner", "business_process")
+
+# Tag field -> facet; business_owner wins over the technical owner when both are set
+_TAG_FACETS = {"criticality": "criticality", "business_process": "business_process",
+               "owner": "owner", "business_owner": "owner"}
+
+# Tag edits don't move an entry's modify_time, so every source's tags are
+# re-listed in full at least this often
+FULL_TAG_SYNC_HOURS = 24
+
+# bm25 weights of the FTS columns below: a name hit outranks a column or tag hit
+_RANK = "bm25(entries_fts, 10.0, 4.0, 2.0, 1.0)"
+
+# Bumped when stored entries can't be carried over; the next sync rebuilds them
+_SCHEMA_VERSION = 1
+
+# Data Catalog resource names of BigQuery tables, normalized to project.dataset.table
+_BQ_RESOURCE_RE = re.compile(r"^(?://bigquery\.googleapis\.com/)?projects/([^/]+)/datasets/([^/]+)/tables/([^/]+)$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    asset_id TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    display_name TEXT NOT NULL,
+    asset_type TEXT,
+    criticality TEXT,
+    owner TEXT,
+    business_process TEXT,
+    description TEXT,
+    columns TEXT,
+    tags TEXT,
+    fingerprint TEXT NOT NULL,
+    synced_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_source ON entries (source);
+CREATE INDEX IF NOT EXISTS idx_entries_criticality ON entries (criticality);
+CREATE INDEX IF NOT EXISTS idx_entries_owner ON entries (owner);
+CREATE INDEX IF NOT EXISTS idx_entries_business_process ON entries (business_process);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5 (
+    display_name, asset_id, columns, tags,
+    content='entries', content_rowid='id', prefix='2 3 4'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, display_name, asset_id, columns, tags)
+    VALUES (new.id, new.display_name, new.asset_id, new.columns, new.tags || ' ' || COALESCE(new.description, ''));
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, display_name, asset_id, columns, tags)
+    VALUES ('delete', old.id, old.display_name, old.asset_id, old.columns, old.tags || ' ' || COALESCE(old.description, ''));
+END;
+CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, display_name, asset_id, columns, tags)
+    VALUES ('delete', old.id, old.display_name, old.asset_id, old.columns, old.tags || ' ' || COALESCE(old.description, ''));
+    INSERT INTO entries_fts (rowid, display_name, asset_id, columns, tags)
+    VALUES (new.id, new.display_name, new.asset_id, new.columns, new.tags || ' ' || COALESCE(new.description, ''));
+END;
+CREATE TABLE IF NOT EXISTS entry_sources (
+    asset_id TEXT NOT NULL,
+    source TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    PRIMARY KEY (asset_id, source)
+);
+CREATE INDEX IF NOT EXISTS idx_entry_sources_source ON entry_sources (source);
+CREATE TABLE IF NOT EXISTS sync_state (
+    source TEXT PRIMARY KEY,
+    watermark TEXT
+);
+"""
+
+_ENTRY_FIELDS = ("asset_id", "source", "display_name", "asset_type") + FACETS + ("description", "columns", "tags")
+
+
+def match_expression(text):
+    """FTS5 query matching every word of text, the last one as a prefix (as-you-type)."""
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*']
+    return " ".join(terms)
+
+
+def normalize_asset_id(resource):
+    """One ID per table whichever source names it: project.dataset.table."""
+    match = _BQ_RESOURCE_RE.match(resource)
+    return ".".join(match.groups()) if match else resource
+
+
+def _fingerprint(row):
+    return hashlib.sha256(json.dumps(row, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class MetadataIndex:
+    """SQLite FTS5 index of data assets for as-you-type search.
+
+    Entries come from the BigQuery metadata cache (schemas) and Data
+    Catalog (display names, tags). Each source's fields are kept per asset
+    in entry_sources and merged into one searchable entry per table, with
+    catalog values winning over the cache's. A sync only rewrites entries
+    whose content fingerprint changed, and FTS rows follow through
+    triggers. Searches match every word, the last as a prefix, rank by
+    bm25 and filter on the FACETS columns, all without touching any API.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            if conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+                # Older entries have no per-source rows to merge from; resync from scratch
+                conn.execute("DELETE FROM entries")
+                conn.execute("DELETE FROM sync_state")
+                conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+                conn.commit()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # --- sync ---------------------------------------------------------------
+    def upsert_entries(self, entries, source):
+        """Insert or update entries of one source; returns the number actually written.
+
+        Each entry is a dict with asset_id (either naming scheme, see
+        normalize_asset_id) and display_name, optionally asset_type,
+        description, the FACETS, columns (list of names) and tags
+        ({template: {field: value}}).
+        """
+        rows = {}
+        for entry in entries:
+            row = {name: entry.get(name) for name in _ENTRY_FIELDS if name != "source"}
+            row["asset_id"] = normalize_asset_id(entry["asset_id"])
+            row["columns"] = " ".join(entry.get("columns") or [])
+            row["tags"] = " ".join(
+                f"{field} {value}" for fields in (entry.get("tags") or {}).values() for field, value in fields.items()
+            )
+            rows[row["asset_id"]] = row
+
+        with self._lock, self._connect() as conn, conn:
+            current = dict(conn.execute("SELECT asset_id, fingerprint FROM entry_sources WHERE source = ?", (source,)))
+            changed = []
+            for asset_id, row in rows.items():
+                fingerprint = _fingerprint(row)
+                if current.get(asset_id) != fingerprint:
+                    changed.append((asset_id, source, json.dumps(row), fingerprint))
+            conn.executemany(
+                """
+                INSERT INTO entry_sources VALUES (?, ?, ?, ?)
+                ON CONFLICT (asset_id, source) DO UPDATE SET
+                    fields = excluded.fields, fingerprint = excluded.fingerprint
+                """,
+                changed,
+            )
+            self._merge(conn, [asset_id for asset_id, *_ in changed])
+        return len(changed)
+
+    def _merge(self, conn, asset_ids):
+        """Rebuild the searchable entries of asset_ids from their per-source rows."""
+        synced_at = datetime.now().isoformat()
+        merged, gone = [], []
+        for start in range(0, len(asset_ids), 500):
+            batch = asset_ids[start:start + 500]
+            parts = {}
+            for asset_id, source, fields in conn.execute(
+                f"SELECT asset_id, source, fields FROM entry_sources WHERE asset_id IN ({', '.join('?' * len(batch))})",
+                batch,
+            ):
+                parts.setdefault(asset_id, []).append((source, json.loads(fields)))
+            for asset_id in batch:
+                if asset_id not in parts:
+                    gone.append(asset_id)
+                    continue
+                # Catalog values (curated names, tags) override the BigQuery cache's
+                sources = sorted(parts[asset_id], key=lambda part: part[0] != "bigquery")
+                row = {name: None for name in _ENTRY_FIELDS}
+                for _, fields in sources:
+                    row.update({name: value for name, value in fields.items() if value not in (None, "")})
+                row["asset_id"] = asset_id
+                row["source"] = ",".join(source for source, _ in sources)
+                row["display_name"] = row["display_name"] or asset_id.rsplit(".", 1)[-1]
+                row["fingerprint"] = _fingerprint(row)
+                merged.append({**row, "synced_at": synced_at})
+        conn.executemany(
+            f"""
+            INSERT INTO entries ({", ".join(_ENTRY_FIELDS)}, fingerprint, synced_at)
+            VALUES ({", ".join(f":{name}" for name in _ENTRY_FIELDS)}, :fingerprint, :synced_at)
+            ON CONFLICT (asset_id) DO UPDATE SET
+                {", ".join(f"{name} = excluded.{name}" for name in _ENTRY_FIELDS[1:])},
+                fingerprint = excluded.fingerprint, synced_at = excluded.synced_at
+            WHERE entries.fingerprint != excluded.fingerprint
+            """,
+            merged,
+        )
+        conn.executemany("DELETE FROM entries WHERE asset_id = ?", [(a,) for a in gone])
+
+    def asset_ids(self, source):
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT asset_id FROM entry_sources WHERE source = ?", (source,))]
+
+    def remove_entries(self, asset_ids, source):
+        """Drop source's rows of asset_ids; an entry disappears once no source has it."""
+        asset_ids = list(asset_ids)
+        with self._lock, self._connect() as conn, conn:
+            conn.executemany("DELETE FROM entry_sources WHERE asset_id = ? AND source = ?",
+                             [(a, source) for a in asset_ids])
+            self._merge(conn, asset_ids)
+
+    def watermark(self, source):
+        with self._connect() as conn:
+            row = conn.execute("SELECT watermark FROM sync_state WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, source, watermark):
+        with self._lock, self._connect() as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (source, watermark))
+
+    # --- search -------------------------------------------------------------
+    def _where(self, query, filters):
+        clauses, params = [], []
+        expression = match_expression(query or "")
+        if expression:
+            clauses.append("entries_fts MATCH ?")
+            params.append(expression)
+        for facet, values in (filters or {}).items():
+            if facet not in FACETS:
+                raise ValueError(f"Unknown facet {facet!r}; expected one of {FACETS}")
+            if values:
+                clauses.append(f"e.{facet} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        # CROSS JOIN keeps the FTS lookup as the outer loop instead of a MATCH per entry
+        source = "entries_fts CROSS JOIN entries AS e ON e.id = entries_fts.rowid" if expression else "entries AS e"
+        return source, (" WHERE " + " AND ".join(clauses)) if clauses else "", params, bool(expression)
+
+    def search(self, query, filters=None, limit=20, offset=0):
+        """(page of matching entries, total matches) for query and {facet: [values]} filters."""
+        source, where, params, ranked = self._where(query, filters)
+        order = _RANK if ranked else "e.display_name"
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM {source}{where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"""
+                SELECT e.asset_id, e.display_name, e.asset_type, e.criticality, e.owner, e.business_process,
+                       e.description, e.columns
+                FROM {source}{where}
+                ORDER BY {order} LIMIT ? OFFSET ?
+                """,
+                params + [int(limit), int(offset)],
+            ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def facets(self, query="", filters=None):
+        """{facet: [(value, count)]} over the entries matching query and filters."""
+        counts = {}
+        with self._connect() as conn:
+            for facet in FACETS:
+                # A facet's own filter is left out so its other values stay selectable
+                others = {name: values for name, values in (filters or {}).items() if name != facet}
+                source, where, params, _ = self._where(query, others)
+                rows = conn.execute(
+                    f"SELECT e.{facet}, COUNT(*) FROM {source}{where} "
+                    f"{'AND' if where else 'WHERE'} e.{facet} IS NOT NULL "
+                    f"GROUP BY e.{facet} ORDER BY COUNT(*) DESC",
+                    params,
+                ).fetchall()
+                counts[facet] = [tuple(row) for row in rows]
+        return counts
+
+
+# --- sources ----------------------------------------------------------------
+def sync_bigquery_cache(index, cache=None):
+    """Mirror table schemas from the BigQuery metadata cache; returns entries written.
+
+    Tables no longer in the cache lose their schema contribution.
+    """
+    from bq_metadata_cache import get_default_cache
+
+    cache = cache or get_default_cache()
+    entries = [
+        {
+            "asset_id": metadata["table_id"],
+            "display_name": metadata["table_id"].split(".")[-1],
+            "asset_type": metadata.get("table_type"),
+            "description": None,
+            "columns": [name for name, _ in metadata.get("schema", [])],
+        }
+        for metadata in cache.all_metadata()
+    ]
+    written = index.upsert_entries(entries, source="bigquery")
+    index.remove_entries(set(index.asset_ids("bigquery")) - {entry["asset_id"] for entry in entries}, "bigquery")
+    print(f"📚 Indexed {len(entries)} BigQuery tables ({written} changed).")
+    return written
+
+
+def _tag_value(field):
+    from google.cloud import datacatalog_v1
+
+    kind = datacatalog_v1.TagField.pb(field).WhichOneof("kind")
+    value = getattr(field, kind) if kind else None
+    return value.display_name if kind == "enum_value" else value
+
+
+def sync_datacatalog(index, project_id, query="type=table", full=None):
+    """Mirror Data Catalog entries and their tags for project_id.
+
+    Tags are listed only for entries modified since the previous sync
+    (search results carry modify_time); unchanged entries cost nothing
+    beyond the search pages themselves, and entries the search no longer
+    returns are dropped. modify_time follows the source table, not tag
+    edits, so a full sync re-lists every entry's tags when full is set or,
+    by default, once FULL_TAG_SYNC_HOURS have passed since the last one.
+    Returns entries written.
+    """
+    from google.cloud import datacatalog_v1
+
+    from gcp_clients import call_with_client
+
+    source = f"datacatalog:{project_id}"
+    now = datetime.now(timezone.utc)
+    if full is None:
+        last_full = index.watermark(f"{source}:full")
+        full = last_full is None or now - datetime.fromisoformat(last_full) >= timedelta(hours=FULL_TAG_SYNC_HOURS)
+    since = None if full else index.watermark(source)
+    scope = datacatalog_v1.types.SearchCatalogRequest.Scope(include_project_ids=[project_id])
+    results = call_with_client("datacatalog", project_id, lambda datacatalog: list(
+        datacatalog.search_catalog(request={"scope": scope, "query": query})
+    ))
+
+    entries, seen, newest = [], set(), since
+    for result in results:
+        asset_id = normalize_asset_id(result.linked_resource or result.relative_resource_name)
+        seen.add(asset_id)
+        modified = result.modify_time.isoformat() if result.modify_time else None
+        if since and modified and modified <= since:
+            continue
+        newest = max(filter(None, [newest, modified]), default=None)
+        tags = call_with_client("datacatalog", project_id, lambda datacatalog: list(
+            datacatalog.list_tags(parent=result.relative_resource_name)
+        ))
+        entry = {
+            "asset_id": asset_id,
+            "display_name": result.display_name or result.linked_resource.rsplit("/", 1)[-1],
+            "asset_type": result.search_result_subtype,
+            "description": getattr(result, "description", None),
+            "tags": {},
+        }
+        for tag in tags:
+            fields = {name: _tag_value(field) for name, field in tag.fields.items()}
+            entry["tags"][tag.template_display_name or tag.template] = fields
+            for field, value in fields.items():
+                facet = _TAG_FACETS.get(field)
+                if facet and value is not None and (field == "business_owner" or not entry.get(facet)):
+                    entry[facet] = str(value)
+        entries.append(entry)
+
+    written = index.upsert_entries(entries, source=source)
+    # Entries no longer returned by the search were deleted from the catalog
+    index.remove_entries(set(index.asset_ids(source)) - seen, source)
+    if newest:
+        index.set_watermark(source, newest)
+    if full:
+        index.set_watermark(f"{source}:full", now.isoformat())
+    print(f"🏷️ Indexed {len(entries)} {'' if full else 'changed '}Data Catalog entries of {project_id} ({written} written).")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync or query the local metadata search index.")
+    parser.add_argument("--index", default=INDEX_PATH, help="Index database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync = commands.add_parser("sync", help="Pull changed entries from the BigQuery cache and Data Catalog")
+    sync.add_argument("--project", action="append", default=[], help="Data Catalog project (repeatable)")
+    sync.add_argument("--full", action="store_true", default=None, help="Re-list every entry's tags, not only changed entries'")
+    search = commands.add_parser("search", help="Search the index")
+    search.add_argument("query")
+    for facet in FACETS:
+        search.add_argument(f"--{facet.replace('_', '-')}", dest=facet, action="append")
+    search.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    index = MetadataIndex(args.index)
+    if args.command == "sync":
+        sync_bigquery_cache(index)
+        for project_id in args.project:
+            sync_datacatalog(index, project_id, full=args.full)
+        return
+
+    rows, total = index.search(args.query, {facet: getattr(args, facet) for facet in FACETS}, args.limit)
+    print(f"🔎 {total} matches for '{args.query}'")
+    for row in rows:
+        print(f"✅ {row['display_name']} ({row['asset_id']}) {row['criticality'] or ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# profile_features.py
+
+import numpy as np
+import pandas as pd
+
+# Columns fed to the rule recommender, in order
+FEATURE_COLUMNS = ['missing_ratio', 'unique_ratio', 'mean', 'std']
+
+
+def typed_features_frame(columns, missing_ratio, unique_ratio, mean, std):
+    """Assemble the column-oriented features table with fixed dtypes.
+
+    mean/std are always present (NaN for non-numeric columns), so the
+    recommender's feature selection works even when no column is numeric.
+    """
+    return pd.DataFrame({
+        'column': pd.Series(columns, dtype="string"),
+        'missing_ratio': np.asarray(missing_ratio, dtype=np.float64),
+        'unique_ratio': np.asarray(unique_ratio, dtype=np.float64),
+        'mean': np.asarray(mean, dtype=np.float64),
+        'std': np.asarray(std, dtype=np.float64),
+    })
+
+
+def _estimated_distinct(sample, n_rows):
+    """Per-column distinct-count estimate from a uniform row sample (GEE estimator).
+
+    D = sqrt(n / r) * f1 + (d - f1), where d is the number of distinct values
+    in the r-row sample and f1 how many of them occur exactly once. Columns
+    are counted one at a time, so memory stays at one column's value counts.
+    """
+    distinct, singletons = [], []
+    for _, values in sample.items():
+        counts = values.value_counts(dropna=True)
+        distinct.append(len(counts))
+        singletons.append(int((counts.to_numpy() == 1).sum()))
+    distinct = np.asarray(distinct, dtype=np.float64)
+    singletons = np.asarray(singletons, dtype=np.float64)
+    estimate = np.sqrt(n_rows / len(sample)) * singletons + (distinct - singletons)
+    return pd.Series(np.minimum(estimate, n_rows), index=sample.columns)
+
+
+def build_profile_features(df, sample_rows=None, random_state=42):
+    """Compute every column's profiling features in a few whole-frame passes.
+
+    Produces the same values as the old per-column loop (missing_ratio,
+    unique_ratio = nunique / rows, mean and sample std for numeric columns).
+    With sample_rows set and a larger frame, unique_ratio is estimated from a
+    uniform sample of that many rows instead of exact nunique counts.
+    """
+    n_rows = len(df)
+    missing_ratio = df.isna().mean() if n_rows else pd.Series(np.nan, index=df.columns)
+
+    if sample_rows and n_rows > sample_rows:
+        sample = df.sample(n=sample_rows, random_state=random_state)
+        unique_ratio = _estimated_distinct(sample, n_rows) / n_rows
+    else:
+        unique_ratio = df.nunique() / n_rows if n_rows else pd.Series(np.nan, index=df.columns)
+
+    numeric_cols = [col for col, dtype in df.dtypes.items() if pd.api.types.is_numeric_dtype(dtype)]
+    numeric = df[numeric_cols]
+    mean = numeric.mean().reindex(df.columns)
+    std = numeric.std().reindex(df.columns)
+
+    return typed_features_frame(df.columns.astype(str), missing_ratio, unique_ratio, mean, std)
@@ -0,0 +1,225 @@
+# regex_lineage.py
+
+import re
+from collections import ChainMap
+from typing import Dict, List, Mapping, Optional, Tuple
+
+# Lightweight lineage back end: no parser dependency, same edge schema as
+# lineage_backends.EDGE_COLUMNS. Parentheses are matched by a linear scan
+# instead of non-greedy DOTALL patterns, so nesting depth and script length
+# cannot cause backtracking.
+
+_KEYWORDS = {
+    "on", "using", "where", "group", "order", "having", "limit", "qualify", "window",
+    "join", "inner", "left", "right", "full", "outer", "cross", "natural", "union",
+    "intersect", "except", "select", "from", "with", "as", "lateral",
+}
+_CTE_HEAD_RE = re.compile(r"\s*(\w+)\s+AS\s*\(", re.IGNORECASE)
+_WITH_RE = re.compile(r"\s*WITH\s+(?:RECURSIVE\s+)?", re.IGNORECASE)
+_SELECT_RE = re.compile(r"\bSELECT\s+(?:DISTINCT\s+)?", re.IGNORECASE)
+_FROM_RE = re.compile(r"\bFROM\b", re.IGNORECASE)
+_FROM_END_RE = re.compile(r"\b(?:WHERE|GROUP|ORDER|HAVING|LIMIT|QUALIFY|WINDOW|UNION|INTERSECT|EXCEPT)\b", re.IGNORECASE)
+_SOURCE_RE = re.compile(
+    r"(?:\bFROM|\bJOIN|,)\s+(?:(?P<table>[\w.`-]+)|(?P<subquery>\(\s*\)))(?:\s+(?:AS\s+)?(?P<alias>\w+))?",
+    re.IGNORECASE,
+)
+_ALIAS_RE = re.compile(r"\s+(?:AS\s+)?(\w+)$", re.IGNORECASE)
+_QUALIFIED_RE = re.compile(r"^(?:(?P<qualifier>\w+)\.)?(?P<column>\w+|\*)$")
+_COLUMN_REF_RE = re.compile(r"\b(\w+)\.(\w+)\b")
+# Literals, identifiers and comments are consumed whole so parentheses inside them are ignored
+_MASK_TOKEN_RE = re.compile(
+    r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`|--[^\n]*|\#[^\n]*|/\*.*?\*/|[()]""",
+    re.DOTALL,
+)
+
+
+def mask_nested(sql: str) -> str:
+    """sql with string literals, comments and everything inside parentheses blanked.
+
+    The result has the same length as sql, so positions found in it index
+    the original text. Top-level keywords, commas, backquoted identifiers
+    and the outermost parentheses themselves are kept.
+    """
+    blanks = []
+    depth, start = 0, 0
+    for match in _MASK_TOKEN_RE.finditer(sql):
+        token = match.group()
+        if token == "(":
+            if not depth:
+                start = match.end()
+            depth += 1
+        elif token == ")":
+            if not depth:
+                continue  # Stray closing parenthesis
+            depth -= 1
+            if not depth:
+                blanks.append((start, match.start()))
+        elif not depth and token[0] != "`":
+            blanks.append(match.span())
+    if depth:
+        blanks.append((start, len(sql)))
+
+    pieces, pos = [], 0
+    for begin, end in blanks:
+        pieces.append(sql[pos:begin])
+        pieces.append(" " * (end - begin))
+        pos = end
+    pieces.append(sql[pos:])
+    return "".join(pieces)
+
+
+def matching_paren(masked: str, open_index: int) -> int:
+    """Index of the parenthesis closing the one at open_index in a mask_nested() text."""
+    close = masked.find(")", open_index + 1)
+    if close < 0:
+        raise ValueError(f"Unbalanced parenthesis at offset {open_index}")
+    return close
+
+
+def split_ctes(sql: str) -> Tuple[Dict[str, str], str]:
+    """({cte name: body}, main statement) of a WITH query."""
+    sql = sql.strip().rstrip(";")
+    masked = mask_nested(sql)
+    ctes: Dict[str, str] = {}
+    match = _WITH_RE.match(masked)
+    if not match:
+        return ctes, sql
+    pos = match.end()
+    while True:
+        head = _CTE_HEAD_RE.match(masked, pos)
+        if not head:
+            break
+        close = matching_paren(masked, head.end() - 1)
+        ctes[sql[head.start(1):head.end(1)]] = sql[head.end():close]
+        pos = close + 1
+        comma = re.match(r"\s*,", masked[pos:])
+        if not comma:
+            break
+        pos += comma.end()
+    return ctes, sql[pos:]
+
+
+def extract_ctes(sql: str) -> Dict[str, str]:
+    return split_ctes(sql)[0]
+
+
+def _split_top_level(text: str, masked: str) -> List[str]:
+    parts, start = [], 0
+    for i, ch in enumerate(masked):
+        if ch == ",":
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def map_subquery_sources(select_sql: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """({alias: table or subquery alias}, {subquery alias: subquery body}) of a SELECT's FROM clause."""
+    masked = mask_nested(select_sql)
+    from_match = _FROM_RE.search(masked)
+    if not from_match:
+        return {}, {}
+    end_match = _FROM_END_RE.search(masked, from_match.end())
+    end = end_match.start() if end_match else len(masked)
+
+    aliases: Dict[str, str] = {}
+    subqueries: Dict[str, str] = {}
+    for match in _SOURCE_RE.finditer(masked, from_match.start(), end):
+        alias = match.group("alias")
+        if alias and alias.lower() in _KEYWORDS:
+            alias = None
+        if match.group("subquery"):
+            if not alias:
+                continue
+            open_index = match.start("subquery")
+            subqueries[alias] = select_sql[open_index + 1:matching_paren(masked, open_index)]
+            aliases[alias] = alias
+        else:
+            table = match.group("table").strip("`")
+            aliases[alias or table.split(".")[-1]] = table
+    return aliases, subqueries
+
+
+def extract_columns_from_select(
+    select_sql: str,
+    schema: Optional[Mapping[str, List[str]]] = None,
+    aliases: Optional[Dict[str, str]] = None,
+) -> List[Tuple[str, str, str]]:
+    """(qualifier, source column, output column) for each item of the top-level SELECT list.
+
+    Stars expand through schema; computed expressions contribute one entry
+    per qualified column they reference.
+    """
+    schema = {} if schema is None else schema
+    masked = mask_nested(select_sql)
+    select_match = _SELECT_RE.search(masked)
+    if not select_match:
+        return []
+    from_match = _FROM_RE.search(masked, select_match.end())
+    end = from_match.start() if from_match else len(masked)
+    if aliases is None:
+        aliases = map_subquery_sources(select_sql)[0]
+
+    results = []
+    for item in _split_top_level(select_sql[select_match.end():end], masked[select_match.end():end]):
+        expr, output = item, None
+        qualified = _QUALIFIED_RE.match(item)
+        if not qualified:
+            alias_match = _ALIAS_RE.search(item)
+            head = item[:alias_match.start()].rstrip() if alias_match else ""
+            if head and head[-1] not in "+-*/%|=<>,(" and alias_match.group(1).lower() not in _KEYWORDS:
+                expr, output = head, alias_match.group(1)
+                qualified = _QUALIFIED_RE.match(expr)
+
+        if qualified and qualified.group("column") == "*":
+            qualifier = qualified.group("qualifier")
+            for alias, table in aliases.items():
+                if qualifier in (None, alias):
+                    results.extend((alias, col, col) for col in schema.get(table, []))
+        elif qualified:
+            column = qualified.group("column")
+            results.append((qualified.group("qualifier") or "", column, output or column))
+        elif output:
+            results.extend((qualifier, column, output) for qualifier, column in _COLUMN_REF_RE.findall(expr))
+    return results
+
+
+def _select_edges(node: str, select_sql: str, columns: ChainMap, edges: List[Dict[str, str]]) -> None:
+    """Append node's edges to edges; columns maps known tables/nodes to their columns and is extended with node."""
+    aliases, subqueries = map_subquery_sources(select_sql)
+    for alias, body in subqueries.items():
+        _select_edges(alias, body, columns, edges)
+
+    sources = set(aliases.values())
+    only_source = next(iter(sources)) if len(sources) == 1 else ""
+    outputs = []
+    for qualifier, column, output in extract_columns_from_select(select_sql, columns, aliases):
+        edges.append({
+            "source_table": aliases.get(qualifier, qualifier) if qualifier else only_source,
+            "source_column": column,
+            "destination_table": node,
+            "destination_column": output,
+        })
+        outputs.append(output)
+    # Later SELECT * over this node expands to what it produced
+    columns[node] = list(dict.fromkeys(outputs))
+
+
+def extract_regex_lineage(sql: str, schema: Optional[Mapping[str, List[str]]] = None) -> List[Dict[str, str]]:
+    """Column-level lineage edges of one SQL script (see lineage_backends.EDGE_COLUMNS).
+
+    CTEs and aliased subqueries become nodes named after themselves; the
+    outer statement becomes "main" unless it is a bare SELECT * of one source.
+    """
+    # Node outputs shadow the schema without copying it (providers load lazily)
+    columns = ChainMap({}, {} if schema is None else schema)
+    ctes, main_sql = split_ctes(sql)
+    edges: List[Dict[str, str]] = []
+    for name, body in ctes.items():
+        _select_edges(name, body, columns, edges)
+
+    aliases, _ = map_subquery_sources(main_sql)
+    bare_star = re.match(r"\s*SELECT\s+\*\s+FROM\b", main_sql, re.IGNORECASE) and len(aliases) <= 1
+    if main_sql.strip() and not bare_star:
+        _select_edges("main", main_sql, columns, edges)
+    return edges
@@ -0,0 +1,174 @@
+# rule_recommender.py
+
+import glob
+import json
+import os
+import re
+import threading
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+# Append-only feedback segments and versioned models (folder structure.py layout)
+FEEDBACK_DIR = "data_quality_checks/ai_ml_checks/outputs/results/feedback"
+MODEL_ARTIFACT_DIR = "data_quality_checks/ai_ml_checks/outputs/model_artifacts"
+
+# Trees added to the forest per incremental update
+TREES_PER_UPDATE = 20
+
+# Older feedback rows replayed alongside new ones so every update sees both classes
+HISTORY_SAMPLE_ROWS = 10_000
+
+_SEGMENT_RE = re.compile(r"segment_(\d+)_X\.npy$")
+
+
+class FeedbackStore:
+    """Append-only store of (features, label) feedback batches.
+
+    Every append writes one immutable segment of .npy files; reads map them
+    with mmap_mode='r', so loading history costs no copy and nothing is ever
+    rewritten.
+    """
+
+    def __init__(self, path=FEEDBACK_DIR):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def _segment_ids(self):
+        ids = []
+        for name in glob.glob(os.path.join(self.path, "segment_*_X.npy")):
+            match = _SEGMENT_RE.search(name)
+            if match:
+                ids.append(int(match.group(1)))
+        return sorted(ids)
+
+    def append(self, X, y):
+        """Persist one feedback batch and return its segment id."""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.int8)
+        with self._lock:
+            ids = self._segment_ids()
+            segment_id = ids[-1] + 1 if ids else 0
+            prefix = os.path.join(self.path, f"segment_{segment_id:06d}")
+            # Labels first: a segment only becomes visible once its X file exists
+            np.save(f"{prefix}_y.npy", y)
+            np.save(f"{prefix}_X.npy", X)
+        return segment_id
+
+    def _mapped(self, after=-1, through=None):
+        ids = [i for i in self._segment_ids() if i > after and (through is None or i <= through)]
+        X = [np.load(os.path.join(self.path, f"segment_{i:06d}_X.npy"), mmap_mode="r") for i in ids]
+        y = [np.load(os.path.join(self.path, f"segment_{i:06d}_y.npy"), mmap_mode="r") for i in ids]
+        return ids, X, y
+
+    def load(self, after=-1):
+        """(X, y, last_segment_id) for all segments with id > after."""
+        ids, X, y = self._mapped(after=after)
+        if not ids:
+            return None, None, after
+        return np.concatenate(X), np.concatenate(y), ids[-1]
+
+    def sample(self, n, through=None, random_state=42):
+        """Uniform sample of up to n rows from segments with id <= through.
+
+        Only the sampled rows are read from the memory-mapped segments.
+        """
+        _, X, y = self._mapped(through=through)
+        sizes = np.array([len(part) for part in X], dtype=np.int64)
+        if sizes.sum() == 0:
+            return None, None
+        rng = np.random.default_rng(random_state)
+        picks = np.sort(rng.choice(sizes.sum(), size=min(n, sizes.sum()), replace=False))
+        offsets = np.cumsum(sizes) - sizes
+        segment_of = np.searchsorted(offsets, picks, side="right") - 1
+        X_parts, y_parts = [], []
+        for segment in np.unique(segment_of):
+            rows = picks[segment_of == segment] - offsets[segment]
+            X_parts.append(X[segment][rows])
+            y_parts.append(y[segment][rows])
+        return np.concatenate(X_parts), np.concatenate(y_parts)
+
+
+def latest_version(artifact_dir=MODEL_ARTIFACT_DIR):
+    """Newest published artifact version (cheap: reads the LATEST pointer), or None."""
+    pointer = os.path.join(artifact_dir, "LATEST")
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer) as f:
+        return int(f.read().strip())
+
+
+def load_latest_model(artifact_dir=MODEL_ARTIFACT_DIR):
+    """(model, metadata) of the newest versioned artifact, or (None, None)."""
+    version = latest_version(artifact_dir)
+    if version is None:
+        return None, None
+    return load_model_version(version, artifact_dir)
+
+
+def load_model_version(version, artifact_dir=MODEL_ARTIFACT_DIR):
+    """(model, metadata) of a specific artifact version."""
+    prefix = os.path.join(artifact_dir, f"rule_recommender_v{version:04d}")
+    with open(f"{prefix}.json") as f:
+        metadata = json.load(f)
+    return joblib.load(f"{prefix}.joblib"), metadata
+
+
+def _save_model(model, metadata, artifact_dir):
+    os.makedirs(artifact_dir, exist_ok=True)
+    version = (latest_version(artifact_dir) or 0) + 1
+    prefix = os.path.join(artifact_dir, f"rule_recommender_v{version:04d}")
+    joblib.dump(model, f"{prefix}.joblib")
+    with open(f"{prefix}.json", "w") as f:
+        json.dump({**metadata, "version": version}, f, indent=2)
+    # Publish the new version last so readers never see a half-written artifact
+    tmp_pointer = os.path.join(artifact_dir, "LATEST.tmp")
+    with open(tmp_pointer, "w") as f:
+        f.write(str(version))
+    os.replace(tmp_pointer, os.path.join(artifact_dir, "LATEST"))
+    return version
+
+
+def train_incremental(store, artifact_dir=MODEL_ARTIFACT_DIR, trees_per_update=TREES_PER_UPDATE,
+                      history_sample_rows=HISTORY_SAMPLE_ROWS, random_state=42):
+    """Warm-start the latest model on feedback it has not seen yet.
+
+    Each update adds trees_per_update trees fitted on the new segments plus a
+    bounded sample of older feedback, so the cost of a retrain depends on the
+    new feedback, not on the full history. Returns (model, version) or
+    (latest model, latest version) when there is nothing new to learn from.
+    """
+    model, metadata = load_latest_model(artifact_dir)
+    trained_through = metadata["trained_through_segment"] if metadata else -1
+
+    X_new, y_new, last_segment = store.load(after=trained_through)
+    if X_new is None:
+        return model, metadata and metadata["version"]
+
+    X_train, y_train = np.asarray(X_new), np.asarray(y_new)
+    if trained_through >= 0:
+        X_old, y_old = store.sample(history_sample_rows, through=trained_through, random_state=random_state)
+        if X_old is not None:
+            X_train = np.vstack([X_train, X_old])
+            y_train = np.concatenate([y_train, y_old])
+
+    if len(np.unique(y_train)) < 2:
+        # Warm-started trees must all agree on the class set
+        print("⚠️ Feedback so far contains a single label; keeping the current model.")
+        return model, metadata and metadata["version"]
+
+    if model is None:
+        model = RandomForestClassifier(n_estimators=trees_per_update, warm_start=True, random_state=random_state)
+    else:
+        model.n_estimators += trees_per_update
+    model.fit(X_train, y_train)
+
+    version = _save_model(
+        model,
+        {"trained_through_segment": last_segment, "n_estimators": model.n_estimators, "rows_fitted": len(X_train)},
+        artifact_dir,
+    )
+    print(f"✅ Saved rule recommender v{version} ({model.n_estimators} trees).")
+    return model, version
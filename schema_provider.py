@@ -0,0 +1,227 @@
+# schema_provider.py
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+from gcp_clients import call_with_client
+
+# Column lists fetched from BigQuery are kept here; it doubles as the offline schema
+SNAPSHOT_PATH = os.environ.get("SCHEMA_SNAPSHOT", "schema_snapshot.json")
+
+
+class SchemaProvider(Mapping):
+    """Read-only {table: [columns]} mapping used to expand SELECT *.
+
+    Lookups accept fully qualified ("project.dataset.table"), partially
+    qualified or bare table names, with or without backquotes; a bare name
+    resolves when it matches exactly one known table. Subclasses may load
+    tables lazily through _load_for(), so iteration only covers the tables
+    loaded so far.
+    """
+
+    def __init__(self) -> None:
+        self._tables: Dict[str, List[str]] = {}
+        self._by_suffix: Dict[str, set] = {}
+        self._lock = threading.RLock()
+        self.version = 0
+        self._fingerprint = (-1, "")
+
+    def _add_tables(self, tables: Dict[str, List[str]]) -> None:
+        with self._lock:
+            for table_id, columns in tables.items():
+                self._tables[table_id] = list(columns)
+                parts = table_id.split(".")
+                for i in range(1, len(parts)):
+                    self._by_suffix.setdefault(".".join(parts[i:]), set()).add(table_id)
+            self.version += 1
+
+    def _remove_tables(self, table_ids) -> None:
+        with self._lock:
+            for table_id in table_ids:
+                self._tables.pop(table_id, None)
+                parts = table_id.split(".")
+                for i in range(1, len(parts)):
+                    self._by_suffix.get(".".join(parts[i:]), set()).discard(table_id)
+            self.version += 1
+
+    def _qualify(self, name: str) -> str:
+        return name
+
+    def _load_for(self, table_id: str) -> None:
+        """Hook for lazy providers: make table_id's columns available if possible."""
+
+    def resolve(self, table: str) -> Optional[str]:
+        """The known table ID that table refers to, or None."""
+        raw = table.replace("`", "").strip()
+        name = self._qualify(raw)
+        if name not in self._tables:
+            self._load_for(name)
+        if name in self._tables:
+            return name
+        for candidate in (name, raw):
+            matches = self._by_suffix.get(candidate, ())
+            if len(matches) == 1:
+                return next(iter(matches))
+        return None
+
+    def __getitem__(self, table: str) -> List[str]:
+        table_id = self.resolve(table)
+        if table_id is None:
+            raise KeyError(table)
+        return self._tables[table_id]
+
+    def __contains__(self, table) -> bool:
+        return isinstance(table, str) and self.resolve(table) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._tables))
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    def fingerprint(self) -> str:
+        """Hash of the loaded columns for cache keys, stable across processes and restarts.
+
+        Recomputed only after the loaded tables change (tracked by version).
+        """
+        with self._lock:
+            if self._fingerprint[0] != self.version:
+                payload = json.dumps(self._tables, sort_keys=True).encode("utf-8")
+                self._fingerprint = (self.version, hashlib.sha256(payload).hexdigest())
+            return self._fingerprint[1]
+
+
+class DictSchemaProvider(SchemaProvider):
+    """Provider over an in-memory {table: [columns]} dict (e.g. a mock schema)."""
+
+    def __init__(self, tables: Dict[str, List[str]]):
+        super().__init__()
+        self._add_tables(tables)
+
+
+def load_snapshot(path: str) -> Dict:
+    """{"tables": {table_id: [columns]}, "datasets": {"project.dataset": fetched_at}}.
+
+    A plain {table: [columns]} JSON file is accepted as well.
+    """
+    if not os.path.exists(path):
+        return {"tables": {}, "datasets": {}}
+    with open(path) as f:
+        snapshot = json.load(f)
+    if "tables" not in snapshot:
+        snapshot = {"tables": snapshot, "datasets": {}}
+    snapshot.setdefault("datasets", {})
+    return snapshot
+
+
+def save_snapshot(path: str, snapshot: Dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def load_schema_file(path: str) -> Dict[str, List[str]]:
+    """Plain {table: [columns]} dict from a schema JSON or snapshot file (picklable for workers)."""
+    return load_snapshot(path)["tables"]
+
+
+class SnapshotSchemaProvider(SchemaProvider):
+    """Provider over a local snapshot file; never touches the network."""
+
+    def __init__(self, path: str = SNAPSHOT_PATH):
+        super().__init__()
+        self.path = path
+        snapshot = load_snapshot(path)
+        self._datasets: Dict[str, str] = snapshot["datasets"]
+        self._add_tables(snapshot["tables"])
+
+    def save(self) -> None:
+        with self._lock:
+            save_snapshot(self.path, {"tables": self._tables, "datasets": self._datasets})
+
+
+class BigQuerySchemaProvider(SnapshotSchemaProvider):
+    """Snapshot-backed provider that fills in missing datasets from BigQuery.
+
+    The first reference to a table of a dataset absent from the snapshot
+    loads every column of that dataset with one INFORMATION_SCHEMA.COLUMNS
+    query and persists the snapshot, so later lookups for any table in it
+    (and later runs) cost no network call. Bare table names are qualified
+    with default_dataset ("project.dataset") when given.
+    """
+
+    def __init__(self, project_id: str, default_dataset: Optional[str] = None,
+                 path: str = SNAPSHOT_PATH, offline: bool = False):
+        super().__init__(path)
+        self.project_id = project_id
+        self.default_dataset = default_dataset
+        self.offline = offline
+        self._failed: set = set()
+
+    def _qualify(self, name: str) -> str:
+        parts = name.split(".")
+        if len(parts) == 1 and self.default_dataset:
+            return f"{self.default_dataset}.{name}"
+        if len(parts) == 2:
+            return f"{self.project_id}.{name}"
+        return name
+
+    def _load_for(self, table_id: str) -> None:
+        parts = table_id.split(".")
+        if self.offline or len(parts) != 3:
+            return
+        dataset = ".".join(parts[:2])
+        if dataset in self._datasets or dataset in self._failed:
+            return
+        with self._lock:
+            if dataset in self._datasets or dataset in self._failed:
+                return
+            try:
+                self.refresh_dataset(*parts[:2])
+            except Exception as e:
+                # Unknown/forbidden datasets resolve to no columns instead of failing the parse
+                self._failed.add(dataset)
+                print(f"⚠️ Could not load schema of {dataset}: {e}")
+
+    def refresh_dataset(self, project_id: str, dataset_id: str) -> int:
+        """(Re)load every table's columns of a dataset in one query; returns the table count."""
+        query = f"""
+            SELECT table_name, ARRAY_AGG(column_name ORDER BY ordinal_position) AS columns
+            FROM `{project_id}.{dataset_id}`.INFORMATION_SCHEMA.COLUMNS
+            GROUP BY table_name
+        """
+        rows = call_with_client("bigquery", project_id, lambda client: list(client.query(query).result()))
+        tables = {f"{project_id}.{dataset_id}.{row['table_name']}": list(row["columns"]) for row in rows}
+        prefix = f"{project_id}.{dataset_id}."
+        with self._lock:
+            # Tables dropped from the dataset must disappear from the snapshot too
+            self._remove_tables([t for t in self._tables if t.startswith(prefix)])
+            self._add_tables(tables)
+            self._datasets[f"{project_id}.{dataset_id}"] = datetime.now(timezone.utc).isoformat()
+            self.save()
+        print(f"📚 Loaded columns of {len(tables)} tables from {project_id}.{dataset_id}.")
+        return len(tables)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Snapshot BigQuery column lists for offline SELECT * expansion.")
+    parser.add_argument("datasets", nargs="+", help="Datasets as project.dataset")
+    parser.add_argument("--output", default=SNAPSHOT_PATH, help="Snapshot JSON file to update")
+    args = parser.parse_args(argv)
+
+    provider = None
+    for dataset in args.datasets:
+        project_id, dataset_id = dataset.split(".", 1)
+        provider = provider or BigQuerySchemaProvider(project_id, path=args.output)
+        provider.refresh_dataset(project_id, dataset_id)
+
+
+if __name__ == "__main__":
+    main()
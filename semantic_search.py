@@ -2,12 +2,11 @@
 
 from google.cloud import datacatalog_v1
 
+from gcp_clients import call_with_client
+
 def semantic_search_metadata(query_text, project_id):
     """Perform a semantic free-text search across Data Catalog."""
 
-    # Initialize Data Catalog client
-    datacatalog = datacatalog_v1.DataCatalogClient()
-
     # Define Scope
     scope = datacatalog_v1.types.SearchCatalogRequest.Scope(
         include_project_ids=[project_id]
@@ -15,12 +14,12 @@ def semantic_search_metadata(query_text, project_id):
 
     # Perform search
     print(f"🔎 Performing semantic search for: '{query_text}'")
-    response = datacatalog.search_catalog(
+    response = call_with_client("datacatalog", project_id, lambda datacatalog: list(datacatalog.search_catalog(
         request={
             "scope": scope,
             "query": query_text,
         }
-    )
+    )))
 
     results = []
     for result in response:
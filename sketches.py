@@ -0,0 +1,222 @@
+# sketches.py
+
+import base64
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+def _hash_series(values):
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+
+
+def _hash_numbers(values):
+    """Hashes of numbers: integral values as int64, the rest as float64."""
+    if pd.api.types.is_integer_dtype(values):
+        return _hash_series(pd.Series(values.to_numpy(dtype=np.int64)))
+    floats = values.to_numpy(dtype=np.float64)
+    integral = np.isfinite(floats) & (floats == np.round(floats)) & (np.abs(floats) < 2.0 ** 63)
+    hashes = np.empty(len(floats), dtype=np.uint64)
+    hashes[integral] = _hash_series(pd.Series(floats[integral].astype(np.int64)))
+    hashes[~integral] = _hash_series(pd.Series(floats[~integral]))
+    return hashes
+
+
+def _hash64(values):
+    """Stable 64-bit hashes of a Series' values (NaNs must be dropped first).
+
+    hash_pandas_object hashes by dtype, and a CSV column's dtype can change
+    from chunk to chunk (int64, then float64 once a blank appears, object
+    once a stray string does). Values are canonicalized first so each one
+    hashes the same either way: numbers, including numeric strings, as
+    int64 when integral and float64 otherwise; anything else as its string.
+    """
+    if pd.api.types.is_bool_dtype(values):
+        return _hash_series(values.astype(str))
+    if pd.api.types.is_numeric_dtype(values):
+        return _hash_numbers(values)
+    if values.dtype != object:
+        return _hash_series(values)
+    numbers = pd.to_numeric(values, errors="coerce")
+    is_number = numbers.notna().to_numpy()
+    hashes = np.empty(len(values), dtype=np.uint64)
+    hashes[is_number] = _hash_numbers(numbers[is_number])
+    hashes[~is_number] = _hash_series(values[~is_number].astype(str))
+    return hashes
+
+
+def _leading_zeros64(x):
+    """Vectorised count of leading zero bits in uint64 values (x > 0)."""
+    x = x.copy()
+    zeros = np.zeros(len(x), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = x < np.uint64(1 << (64 - shift))
+        zeros[mask] += shift
+        x[mask] <<= np.uint64(shift)
+    return zeros
+
+
+class HyperLogLog:
+    """Mergeable distinct-count estimate with 2**p one-byte registers."""
+
+    def __init__(self, p=14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, values):
+        """Add the non-null values of a Series."""
+        values = values.dropna()
+        if values.empty:
+            return
+        hashes = _hash64(values)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        # Sentinel bit keeps the rank bounded when the remaining bits are all zero
+        remaining = (hashes << np.uint64(self.p)) | np.uint64(1 << (self.p - 1))
+        rank = _leading_zeros64(remaining) + 1
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def to_dict(self):
+        # Registers are mostly small repeated values, so they compress well
+        return {"p": self.p, "registers": base64.b64encode(zlib.compress(self.registers.tobytes())).decode("ascii")}
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(state["p"])
+        sketch.registers = np.frombuffer(zlib.decompress(base64.b64decode(state["registers"])), dtype=np.uint8).copy()
+        return sketch
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and empty:
+            # Linear counting is far more accurate for small cardinalities
+            estimate = m * np.log(m / empty)
+        return int(round(estimate))
+
+
+class TDigest:
+    """Mergeable quantile sketch (merging t-digest with the k1 scale function)."""
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means = np.empty(0, dtype=np.float64)
+        self.weights = np.empty(0, dtype=np.float64)
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="mergesort")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        if total == 0:
+            self.means, self.weights = means, weights
+            return
+        # Each centroid may span at most one unit of k1(q) = delta/(2*pi) * asin(2q - 1)
+        q_left = (np.cumsum(weights) - weights) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(np.clip(2 * q_left - 1, -1, 1))
+        bucket = np.floor(k - k[0]).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+    def update(self, values):
+        """Add an array of finite numeric values."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+        self._compress(np.concatenate([self.means, values]), np.concatenate([self.weights, np.ones(values.size)]))
+
+    def merge(self, other):
+        self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+        return self
+
+    def to_dict(self):
+        return {"compression": self.compression, "means": self.means.tolist(), "weights": self.weights.tolist()}
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(state["compression"])
+        sketch.means = np.asarray(state["means"], dtype=np.float64)
+        sketch.weights = np.asarray(state["weights"], dtype=np.float64)
+        return sketch
+
+    def _centers(self):
+        return (np.cumsum(self.weights) - self.weights / 2) / self.weights.sum()
+
+    def quantile(self, q):
+        """Approximate value at quantile q (scalar or array in [0, 1])."""
+        if self.weights.size == 0:
+            return np.nan
+        return np.interp(q, self._centers(), self.means)
+
+    def cdf(self, x):
+        """Approximate fraction of values <= x (scalar or array)."""
+        if self.weights.size == 0:
+            return np.nan
+        return np.interp(x, self.means, self._centers(), left=0.0, right=1.0)
+
+
+class TopK:
+    """Mergeable heavy-hitters sketch (Misra-Gries) holding at most capacity counters.
+
+    Tracked counts undercount by at most self.error, and any value more
+    frequent than error is tracked. Values are keyed by their string form.
+    """
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.counts = {}
+        self.error = 0
+
+    def _absorb(self, counts, error):
+        """Add {value: count} (at most about capacity entries) and reduce back to capacity counters."""
+        merged = dict(self.counts)
+        for value, count in counts.items():
+            merged[value] = merged.get(value, 0) + count
+        threshold = 0
+        if len(merged) > self.capacity:
+            # Misra-Gries: lower every counter by the (capacity+1)-th largest and drop the non-positive
+            threshold = sorted(merged.values(), reverse=True)[self.capacity]
+            merged = {value: count - threshold for value, count in merged.items() if count > threshold}
+        self.counts = merged
+        self.error += error + threshold
+
+    def update(self, values):
+        """Add the non-null values of a Series."""
+        values = values.dropna()
+        if values.empty:
+            return
+        # Reduce the chunk's exact counts first (vectorized), so the merge is O(capacity)
+        counts = values.astype(str).value_counts()
+        threshold = int(counts.iloc[self.capacity]) if len(counts) > self.capacity else 0
+        counts = counts.iloc[:self.capacity] - threshold
+        self._absorb({value: int(count) for value, count in counts[counts > 0].items()}, threshold)
+
+    def merge(self, other):
+        self._absorb(other.counts, other.error)
+        return self
+
+    def top(self, n=None):
+        """[(value, count)] by decreasing count."""
+        return sorted(self.counts.items(), key=lambda item: -item[1])[:n]
+
+    def to_dict(self):
+        return {"capacity": self.capacity, "counts": self.counts, "error": self.error}
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(state["capacity"])
+        sketch.counts = dict(state["counts"])
+        sketch.error = state["error"]
+        return sketch
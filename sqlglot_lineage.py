@@ -0,0 +1,144 @@
+# sqlglot_lineage.py
+
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from sqlglot import parse_one, exp
+
+
+# --- Updated sqlglot lineage extractor (no main) ---
+def _table_name(table_ref: exp.Table) -> str:
+    """Fully qualified name as written ("p.ds.users"); the schema resolves partial ones."""
+    return ".".join(part.name for part in table_ref.parts)
+
+
+def _column_label(column: exp.Column) -> str:
+    return f"{column.table}.{column.name}" if column.table else column.name
+
+
+def _output_name(label: str) -> str:
+    """Output column of a label: "q.col" -> "col", "q.col AS out" -> "out"."""
+    ref, _, output = label.partition(" AS ")
+    return output or ref.rpartition(".")[2]
+
+
+def _as_select(expression: exp.Expression) -> Optional[exp.Select]:
+    # A UNION body is traced through its first SELECT
+    return expression if isinstance(expression, exp.Select) else expression.find(exp.Select)
+
+
+def extract_lineage_with_sqlglot_no_main(sql: str, schema: Mapping[str, List[str]]) -> Tuple[
+    Dict[str, List[str]], Dict[str, List[Tuple[str, str]]], Dict[str, str]]:
+    """({node: column labels}, {node: [(source, alias)]}, {subquery alias: "subquery"}).
+
+    CTEs and aliased subqueries are nodes named after themselves, the outer
+    SELECT is "main". A label is "alias.col" for a column selected as is
+    and "alias.col AS out" for one renamed or used in an expression named
+    out (one label per column the expression references).
+    """
+    parsed = parse_one(sql)
+    cte_columns: Dict[str, List[str]] = {}
+    cte_edges: Dict[str, List[Tuple[str, str]]] = {}
+    alias_map: Dict[str, str] = {}
+
+    def columns_of(table: str) -> List[str]:
+        if table in cte_columns:
+            return list(dict.fromkeys(_output_name(label) for label in cte_columns[table]))
+        return schema.get(table, [])
+
+    def item_labels(item: exp.Expression) -> List[str]:
+        output = item.alias if isinstance(item, exp.Alias) else None
+        inner = item.this if isinstance(item, exp.Alias) else item
+        if isinstance(inner, exp.Column):
+            label = _column_label(inner)
+            return [label if output in (None, inner.name) else f"{label} AS {output}"]
+        if output:
+            return list(dict.fromkeys(f"{_column_label(col)} AS {output}" for col in inner.find_all(exp.Column)))
+        return []
+
+    def resolve_columns(select_exp: exp.Select, alias_lookup: Dict[str, str]) -> List[str]:
+        columns = []
+        for item in select_exp.expressions:
+            if isinstance(item, exp.Star) or (isinstance(item, exp.Column) and isinstance(item.this, exp.Star)):
+                qualifier = item.table if isinstance(item, exp.Column) else ""
+                for alias, table in alias_lookup.items():
+                    if qualifier in ("", alias):
+                        columns.extend(f"{alias}.{col}" for col in columns_of(table))
+            else:
+                columns.extend(item_labels(item))
+        return columns
+
+    def source_refs(select_exp: exp.Select) -> List[exp.Expression]:
+        # Only this SELECT's own FROM and JOINs; nested queries are nodes of their own
+        from_exp = select_exp.args.get("from_") or select_exp.args.get("from")
+        refs = [from_exp.this] if from_exp else []
+        return refs + [join.this for join in select_exp.args.get("joins") or []]
+
+    def extract_from_select(select_exp: exp.Select, node: str) -> None:
+        alias_lookup = {}
+        sources = []
+        for table_ref in source_refs(select_exp):
+            if isinstance(table_ref, exp.Subquery):
+                sub_alias = table_ref.alias_or_name
+                sub_select = _as_select(table_ref.unnest())
+                if not sub_alias or sub_select is None:
+                    continue
+                alias_map[sub_alias] = "subquery"
+                extract_from_select(sub_select, sub_alias)
+                alias_lookup[sub_alias] = sub_alias
+                sources.append((sub_alias, sub_alias))
+            elif isinstance(table_ref, exp.Table):
+                alias = table_ref.alias_or_name
+                alias_lookup[alias] = _table_name(table_ref)
+                sources.append((_table_name(table_ref), alias))
+
+        cte_columns[node] = resolve_columns(select_exp, alias_lookup)
+        cte_edges[node] = sources
+
+    for cte in parsed.find_all(exp.CTE):
+        cte_select = _as_select(cte.this)
+        if cte_select is not None:
+            extract_from_select(cte_select, cte.alias)
+
+    final_select = _as_select(parsed)
+    if final_select:
+        bare_star = len(final_select.expressions) == 1 and isinstance(final_select.expressions[0], exp.Star)
+        if len(source_refs(final_select)) > 1 or not bare_star:
+            extract_from_select(final_select, "main")
+
+    return cte_columns, cte_edges, alias_map
+
+
+def column_edges(
+    cte_columns: Dict[str, List[str]],
+    cte_edges: Dict[str, List[Tuple[str, str]]],
+) -> List[Dict[str, str]]:
+    """Flatten extractor output into column-level edges (see lineage_backends.EDGE_COLUMNS).
+
+    A qualified column "alias.col" of node N is attributed to the source of N
+    registered under that alias; an unqualified one to N's only source, if
+    it has exactly one. The destination column is the label's output name.
+    """
+    edges = []
+    for node, cols in cte_columns.items():
+        sources = cte_edges.get(node, [])
+        by_alias = {alias: source for source, alias in sources}
+        for col in cols:
+            ref = col.partition(" AS ")[0]
+            alias, _, name = ref.rpartition(".")
+            if alias:
+                source = by_alias.get(alias, alias)
+            else:
+                source = sources[0][0] if len(sources) == 1 else ""
+            edges.append({
+                "source_table": source,
+                "source_column": name,
+                "destination_table": node,
+                "destination_column": _output_name(col),
+            })
+    return edges
+
+
+def extract_column_lineage(sql: str, schema: Mapping[str, List[str]]) -> List[Dict[str, str]]:
+    """Column-level lineage edges of one SQL script."""
+    cte_columns, cte_edges, _ = extract_lineage_with_sqlglot_no_main(sql, schema)
+    return column_edges(cte_columns, cte_edges)
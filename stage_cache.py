@@ -0,0 +1,98 @@
+# stage_cache.py
+
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Default memory budget for cached profiler stage results
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+def file_digest(uploaded_file, block_size=1024 * 1024, cache=None):
+    """SHA-256 of an uploaded file's bytes, read in blocks; rewinds the file.
+
+    With a dict-like cache (e.g. st.session_state) the digest is remembered
+    per (file_id, size), so reruns of the same upload don't re-read it.
+    """
+    file_id = getattr(uploaded_file, "file_id", None)
+    cache_key = f"file_digest:{file_id}:{getattr(uploaded_file, 'size', None)}"
+    if cache is not None and file_id is not None and cache_key in cache:
+        return cache[cache_key]
+
+    digest = hashlib.sha256()
+    uploaded_file.seek(0)
+    for block in iter(lambda: uploaded_file.read(block_size), b""):
+        digest.update(block)
+    uploaded_file.seek(0)
+    if cache is not None and file_id is not None:
+        cache[cache_key] = digest.hexdigest()
+    return digest.hexdigest()
+
+
+def estimate_size(value):
+    """Rough in-memory size of a cached stage result, in bytes."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(value, pd.DataFrame) else int(usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value.values())
+    return sys.getsizeof(value)
+
+
+class StageCache:
+    """LRU cache of expensive profiler stages, bounded by estimated memory.
+
+    Entries are keyed by (stage, data key, stage parameters), so a rerun that
+    only changes a downstream input (a rule selection, a retrain) reuses every
+    upstream result. Cached values are shared: callers must not mutate them.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(stage, data_key, params):
+        return stage, data_key, json.dumps(params or {}, sort_keys=True, default=str)
+
+    def get_or_compute(self, stage, data_key, compute, params=None, size_hint=None):
+        """Return the cached result for this stage/input, computing it on a miss."""
+        key = self._key(stage, data_key, params)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        value = compute()
+        size = size_hint if size_hint is not None else estimate_size(value)
+        if size > self.max_bytes:
+            return value  # Too large to keep; never evict everything for one entry
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (value, size)
+                self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
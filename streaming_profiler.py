@@ -0,0 +1,169 @@
+# streaming_profiler.py
+
+import numpy as np
+import pandas as pd
+
+from profile_features import typed_features_frame
+from sketches import HyperLogLog, TDigest, TopK
+
+# Rows read per pd.read_csv chunk
+DEFAULT_CHUNKSIZE = 100_000
+
+
+class ColumnProfile:
+    """Mergeable per-column statistics; memory does not grow with the row count."""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0          # rows seen, including nulls
+        self.null_count = 0
+        self.numeric = None     # None until a chunk with non-null values is seen
+        self.n = 0              # numeric values seen (Welford / Chan)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.distinct = HyperLogLog()
+        self.digest = TDigest()
+        self.top = TopK()
+
+    def update(self, series):
+        """Fold one chunk of the column into the running statistics."""
+        self.count += len(series)
+        self.null_count += int(series.isna().sum())
+        non_null = series.dropna()
+        if non_null.empty:
+            return
+
+        self.distinct.update(non_null)
+        self.numeric = pd.api.types.is_numeric_dtype(series) and self.numeric is not False
+        if not self.numeric:
+            # Heavy hitters only feed categorical drift; numeric columns use the digest
+            self.top.update(non_null)
+            self.min = self.max = None
+            return
+
+        values = non_null.to_numpy(dtype=np.float64)
+        self._merge_moments(values.size, float(values.mean()), float(((values - values.mean()) ** 2).sum()))
+        chunk_min, chunk_max = float(values.min()), float(values.max())
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+        self.digest.update(values)
+
+    def _merge_moments(self, n, mean, m2):
+        """Combine (n, mean, M2) of another batch (Chan et al. parallel Welford)."""
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+
+    def merge(self, other):
+        """Fold another profile of the same column (e.g. from another file shard)."""
+        self.count += other.count
+        self.null_count += other.null_count
+        self.distinct.merge(other.distinct)
+        self.top.merge(other.top)
+        if other.numeric is not None:
+            self.numeric = other.numeric and self.numeric is not False
+        if not self.numeric:
+            self.min = self.max = None
+            return self
+        self._merge_moments(other.n, other.mean, other.m2)
+        for bound, pick in (("min", min), ("max", max)):
+            values = [v for v in (getattr(self, bound), getattr(other, bound)) if v is not None]
+            setattr(self, bound, pick(values) if values else None)
+        self.digest.merge(other.digest)
+        return self
+
+    def to_dict(self):
+        """JSON-serializable state; from_dict(to_dict()) is an equivalent, still mergeable profile."""
+        scalars = ("name", "count", "null_count", "numeric", "n", "mean", "m2", "min", "max")
+        return {
+            **{key: getattr(self, key) for key in scalars},
+            "distinct": self.distinct.to_dict(),
+            "digest": self.digest.to_dict(),
+            "top": self.top.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        profile = cls(state["name"])
+        for key in ("count", "null_count", "numeric", "n", "mean", "m2", "min", "max"):
+            setattr(profile, key, state[key])
+        profile.distinct = HyperLogLog.from_dict(state["distinct"])
+        profile.digest = TDigest.from_dict(state["digest"])
+        profile.top = TopK.from_dict(state["top"])
+        return profile
+
+    @property
+    def null_rate(self):
+        return self.null_count / self.count if self.count else np.nan
+
+    @property
+    def std(self):
+        """Sample standard deviation (ddof=1), as pandas' Series.std()."""
+        return float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else np.nan
+
+    def features(self, n_rows):
+        """Same keys the profiler's per-column features loop produced."""
+        stats = {
+            'column': self.name,
+            'missing_ratio': self.null_count / n_rows if n_rows else np.nan,
+            'unique_ratio': self.distinct.count() / n_rows if n_rows else np.nan,
+        }
+        if self.numeric:
+            stats.update({'mean': self.mean, 'std': self.std})
+        return stats
+
+
+def profile_csv_in_chunks(source, chunksize=DEFAULT_CHUNKSIZE, sample_rows=0, random_state=42, **read_csv_kwargs):
+    """Profile a CSV chunk by chunk.
+
+    Returns (profiles, n_rows, sample) where profiles maps column name to
+    ColumnProfile and sample is a uniform random sample of up to sample_rows
+    rows (bottom-k of a random key per row, so it is also bounded in memory).
+    """
+    rng = np.random.default_rng(random_state)
+    profiles = {}
+    n_rows = 0
+    sample = None
+
+    for chunk in pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs):
+        n_rows += len(chunk)
+        for col in chunk.columns:
+            profiles.setdefault(col, ColumnProfile(col)).update(chunk[col])
+
+        if sample_rows:
+            chunk = chunk.assign(_sample_key=rng.random(len(chunk)))
+            # read_csv chunks keep a running index, so sort_index restores file order
+            sample = chunk if sample is None else pd.concat([sample, chunk])
+            sample = sample.nsmallest(sample_rows, "_sample_key")
+
+    if sample is not None:
+        sample = sample.drop(columns="_sample_key").sort_index()
+    return profiles, n_rows, sample
+
+
+def profile_frame(df, chunksize=DEFAULT_CHUNKSIZE):
+    """ColumnProfiles of an in-memory DataFrame, built slice by slice as from a CSV."""
+    profiles = {col: ColumnProfile(col) for col in df.columns}
+    for start in range(0, len(df), chunksize):
+        chunk = df.iloc[start:start + chunksize]
+        for col in df.columns:
+            profiles[col].update(chunk[col])
+    return profiles, len(df)
+
+
+def features_frame(profiles, n_rows):
+    """Build the profiler's features table from streamed column profiles."""
+    features = [profile.features(n_rows) for profile in profiles.values()]
+    return typed_features_frame(
+        [f['column'] for f in features],
+        [f['missing_ratio'] for f in features],
+        [f['unique_ratio'] for f in features],
+        [f.get('mean', np.nan) for f in features],
+        [f.get('std', np.nan) for f in features],
+    )
@@ -0,0 +1,18 @@
+# tests/test_dq_rule_engine.py
+
+import numpy as np
+import pandas as pd
+
+from dq_rule_engine import RuleEngine, RuleSet, key_strings
+
+
+def test_key_strings_ignore_the_rest_of_the_chunk():
+    assert list(key_strings(pd.Series([7.0, 2.5, np.nan]))[:2]) == ["7", "2.5"]
+    assert list(key_strings(pd.Series([7.0, np.nan]))[:1]) == ["7"]
+    assert list(key_strings(pd.Series([7]))) == ["7"]
+
+
+def test_uniqueness_across_chunks_with_different_dtypes():
+    engine = RuleEngine(RuleSet([{"id": "unique", "type": "uniqueness", "column": "k"}]))
+    engine.run([pd.DataFrame({"k": [7.0, 2.5]}), pd.DataFrame({"k": [7.0, np.nan]}), pd.DataFrame({"k": [7]})])
+    assert engine.failures["unique"] == 2
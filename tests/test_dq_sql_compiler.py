@@ -0,0 +1,36 @@
+# tests/test_dq_sql_compiler.py
+
+import sqlite3
+
+import pandas as pd
+
+from dq_rule_engine import RULES_PATH, RuleEngine, RuleSet
+from dq_sql_compiler import SQLITE, run_table_check, sqlite_executor
+
+ORDERS = pd.DataFrame({
+    "order_id": [1, 2, 2, None, 5, 6, 6, 8],
+    "amount": [10.0, -1.0, 50.0, 2_000_000.0, None, 30.0, 7.5, 0.0],
+    "email": ["a@b.co", "bad", None, "x@y.org", "c@d", "e@f.io", "g@h.com", "no at"],
+    "status": ["NEW", "PAID", "LOST", None, "SHIPPED", "paid", "CANCELLED", "NEW"],
+    "customer_id": [100, 101, 999, 100, None, 102, 103, 101],
+})
+CUSTOMERS = pd.DataFrame({"customer_id": [100, 101, 102]})
+
+
+def test_sqlite_counts_match_rule_engine(tmp_path):
+    rule_set = RuleSet.from_yaml(RULES_PATH)
+    reference = rule_set.get("customer_exists")["reference"]
+    reference["path"] = str(tmp_path / "customers.csv")
+    CUSTOMERS.to_csv(reference["path"], index=False)
+
+    conn = sqlite3.connect(":memory:")
+    ORDERS.to_sql(rule_set.table, conn, index=False)
+    CUSTOMERS.to_sql(reference["table"], conn, index=False)
+    pushed_down = run_table_check(rule_set, sqlite_executor(conn), dialect=SQLITE)
+    in_memory = RuleEngine(rule_set).run([ORDERS.iloc[:4], ORDERS.iloc[4:]])
+
+    expected = {"order_id_not_null": 1, "order_id_unique": 2, "amount_range": 2,
+                "email_format": 3, "status_accepted": 2, "customer_exists": 2}
+    assert dict(zip(pushed_down["rule_id"], pushed_down["failed"])) == expected
+    assert dict(zip(in_memory["rule_id"], in_memory["failed"])) == expected
+    assert (pushed_down["rows_checked"] == len(ORDERS)).all()
@@ -0,0 +1,22 @@
+# tests/test_ingestion_validator.py
+
+import io
+
+from ingestion_validator import scan_stream
+
+
+def _records(data, block_size=4):
+    return scan_stream(io.BytesIO(data), block_size=block_size)[2]
+
+
+def test_literal_quote_in_unquoted_field():
+    assert _records(b'a,b\n5" tv,2\n3,4\n5,6\n') == 4
+
+
+def test_quoted_newlines_and_escapes():
+    assert _records(b'a,b\n"x\ny",2\n"say ""hi""",3\n') == 3
+
+
+def test_trailing_blank_lines_are_not_records():
+    assert _records(b"a,b\n1,2\n\n\n") == 2
+    assert _records(b"a;b\n1;2\r\n\r\n", block_size=1) == 2
@@ -0,0 +1,22 @@
+# tests/test_metadata_index.py
+
+from metadata_index import MetadataIndex
+
+
+def test_sources_merge_into_one_entry(tmp_path):
+    index = MetadataIndex(str(tmp_path / "index.db"))
+    index.upsert_entries([{"asset_id": "p.d.t", "display_name": "t", "columns": ["cust_id"]}], "bigquery")
+    index.upsert_entries(
+        [{"asset_id": "//bigquery.googleapis.com/projects/p/datasets/d/tables/t", "display_name": "Sales",
+          "tags": {"governance": {"owner": "finance"}}}],
+        "datacatalog:p",
+    )
+    for query in ("cust_id", "finance"):
+        results, total = index.search(query)
+        assert total == 1 and results[0]["asset_id"] == "p.d.t"
+
+    index.remove_entries({"p.d.t"}, "bigquery")
+    assert index.search("cust_id")[1] == 0
+    assert index.search("finance")[1] == 1
+    index.remove_entries({"p.d.t"}, "datacatalog:p")
+    assert index.search("finance")[1] == 0
@@ -0,0 +1,39 @@
+# tests/test_sketches.py
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from sketches import HyperLogLog, _hash64
+from streaming_profiler import profile_csv_in_chunks
+
+
+def test_hash_ignores_chunk_dtype():
+    as_int = _hash64(pd.Series([1, 2, 3]))
+    as_float = _hash64(pd.Series([1.0, 2.0, 3.0]))
+    as_text = _hash64(pd.Series(["1", "2", "3"], dtype=object))
+    assert (as_int == as_float).all()
+    assert (as_int == as_text).all()
+
+
+def test_distinct_count_across_int_and_float_chunks():
+    sketch = HyperLogLog()
+    sketch.update(pd.Series(np.arange(1000)))
+    # Same values again, read as float64 because the chunk has a blank
+    sketch.update(pd.Series(np.r_[np.arange(1000), np.nan]))
+    assert abs(sketch.count() - 1000) <= 20
+
+
+def test_top_k_only_for_non_numeric_columns():
+    csv = "n,c\n" + "\n".join(f"{i % 7},v{i % 3}" for i in range(500)) + "\n"
+    profiles, _, _ = profile_csv_in_chunks(io.StringIO(csv), chunksize=100)
+    assert profiles["n"].top.counts == {}
+    assert sorted(profiles["c"].top.counts) == ["v0", "v1", "v2"]
+
+
+def test_profile_csv_distinct_across_chunks():
+    csv = "v\n" + "\n".join(map(str, range(1000))) + "\n\n" + "\n".join(map(str, range(1000))) + "\n"
+    profiles, n_rows, _ = profile_csv_in_chunks(io.StringIO(csv), chunksize=1000, skip_blank_lines=False)
+    assert n_rows == 2001
+    assert abs(profiles["v"].distinct.count() - 1000) <= 20
@@ -0,0 +1,40 @@
+# tests/test_sqlglot_lineage.py
+
+from schema_provider import DictSchemaProvider
+from sqlglot_lineage import extract_column_lineage
+
+
+def _edges(sql, schema=None):
+    return {
+        (e["source_table"], e["source_column"], e["destination_table"], e["destination_column"])
+        for e in extract_column_lineage(sql, schema or {})
+    }
+
+
+def test_aliases_and_expressions_keep_output_names():
+    sql = "WITH a AS (SELECT u.id AS user_id, UPPER(u.name) AS nm FROM users u) SELECT x.user_id FROM a x"
+    assert _edges(sql) == {
+        ("users", "id", "a", "user_id"),
+        ("users", "name", "a", "nm"),
+        ("a", "user_id", "main", "user_id"),
+    }
+
+
+def test_nested_subquery_is_its_own_node():
+    sql = "SELECT p.k, q.v AS w FROM t p JOIN (SELECT r.k, r.v FROM s r) q ON p.k = q.k"
+    assert _edges(sql) == {
+        ("s", "k", "q", "k"),
+        ("s", "v", "q", "v"),
+        ("t", "k", "main", "k"),
+        ("q", "v", "main", "w"),
+    }
+
+
+def test_star_expands_fully_qualified_tables():
+    schema = DictSchemaProvider({"p.ds.users": ["id", "name"], "p.other.users": ["id", "x"]})
+    sql = "SELECT u.x, v.* FROM p.other.users u JOIN p.ds.users v ON u.id = v.id"
+    assert _edges(sql, schema) == {
+        ("p.other.users", "x", "main", "x"),
+        ("p.ds.users", "id", "main", "id"),
+        ("p.ds.users", "name", "main", "name"),
+    }